@@ -1,4 +1,4 @@
-import threading
+from datetime import datetime
 
 import sqlalchemy as sa
 import sqlalchemy.orm as so
@@ -6,9 +6,10 @@ from apscheduler.triggers.cron import CronTrigger
 from flask import Flask
 from jinja2 import StrictUndefined
 
-from app.extensions import db, login, mail, scheduler
+from app.extensions import db, login, mail, migrate, scheduler
 from app.logger import logger
-from app.tasks import scheduled_send_discount_email
+from app.tasks import (scheduled_manage_partitions, scheduled_reconcile_zone_totals, scheduled_refresh_forecasts,
+                       scheduled_send_discount_email)
 from app.views.auth import auth_bp
 from app.views.energy_analytics import energy_bp
 from app.views.food_expiry import smart_exp_bp
@@ -17,9 +18,6 @@ from app.views.user_dashboard import dash_bp
 from app.views.vendor_dashboard import vendors_bp
 from config import Config
 
-# Track whether the IoT simulator has already been started
-first_request_handled = False
-
 def create_app(config_class=Config, test_config=None):
     """
     Application factory to configure and return a Flask app instance.
@@ -38,10 +36,15 @@ def create_app(config_class=Config, test_config=None):
 
     # === Extension Setup ===
     db.init_app(app)
+    migrate.init_app(app, db)
     login.login_view = 'auth.login'  # Redirect unauthorized users to login
     login.init_app(app)
     mail.init_app(app)
 
+    # === Analytics Response Cache ===
+    from app.cache import ResponseCache    # Keyed on the ingest watermark
+    app.extensions['energy_cache'] = ResponseCache(app.config['ENERGY_CACHE_MAX_BYTES'])
+
     # === Blueprint Registration ===
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
@@ -50,6 +53,11 @@ def create_app(config_class=Config, test_config=None):
     app.register_blueprint(vendors_bp)
     app.register_blueprint(energy_bp)
 
+    # === CLI Commands ===
+    from app.cli import energy_cli, iot_cli    # flask energy ..., flask iot ...
+    app.cli.add_command(energy_cli)
+    app.cli.add_command(iot_cli)
+
     # === APScheduler Configuration ===
     if str(app.config.get('SCHEDULER_ENABLED', 'false')).lower() == 'true':
         scheduler.start()
@@ -63,6 +71,38 @@ def create_app(config_class=Config, test_config=None):
             replace_existing=True
         )
         logger.info("Scheduled daily_discount_email job for 7 AM.")
+
+        # Add daily energy_readings partition maintenance at 1:00 AM, plus one run at startup
+        scheduler.add_job(
+            func=scheduled_manage_partitions,
+            args=[app],
+            trigger=CronTrigger(hour=1, minute=0),
+            next_run_time=datetime.now(),
+            id='manage_energy_partitions',
+            replace_existing=True
+        )
+        logger.info("Scheduled manage_energy_partitions job for 1 AM.")
+
+        # Add hourly reconciliation of the dashboard's running zone totals
+        scheduler.add_job(
+            func=scheduled_reconcile_zone_totals,
+            args=[app],
+            trigger=CronTrigger(minute=30),
+            id='reconcile_zone_totals',
+            replace_existing=True
+        )
+        logger.info("Scheduled reconcile_zone_totals job for every hour at :30.")
+
+        # Add hourly incremental refit of the building forecasts, plus one run at startup
+        scheduler.add_job(
+            func=scheduled_refresh_forecasts,
+            args=[app],
+            trigger=CronTrigger(minute=5),
+            next_run_time=datetime.now(),
+            id='refresh_energy_forecasts',
+            replace_existing=True
+        )
+        logger.info("Scheduled refresh_energy_forecasts job for every hour at :05.")
     else:
         logger.info("Scheduler is disabled because SCHEDULER_ENABLED is set to False.")
 
@@ -78,21 +118,4 @@ def create_app(config_class=Config, test_config=None):
     def make_shell_context():
         return dict(db=db, sa=sa, so=so, reset_db=reset_db)
 
-    # === IoT Simulator (Background Thread) ===
-    from app.iot_simulator import simulator_thread  # Used for simulation of energy data
-
-    @app.before_request
-    def activate_simulator():
-        """
-        Starts the IoT simulator thread only once during the app lifecycle.
-        Controlled via IOT_SIMULATOR_ACTIVE flag.
-        """
-        global first_request_handled
-        if not first_request_handled and not str(app.config.get('IOT_SIMULATOR_ACTIVE', 'false')).lower() == 'true':
-            first_request_handled = True
-            if str(app.config.get('IOT_SIMULATOR_ACTIVE', 'false')).lower() == 'true':
-                thread = threading.Thread(target=simulator_thread, args=(app,))
-                thread.daemon = True
-                thread.start()
-
     return app
@@ -0,0 +1,192 @@
+from collections import namedtuple
+
+import numpy as np
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+from app.downsampling import EPOCH, epoch_seconds
+from app.extensions import db
+from app.models import ENERGY_CATEGORIES, ENERGY_CATEGORY_CODES, EnergyAlert
+
+# === Hour-of-Week Profiles ===
+# Usage follows the weekly timetable, so each sensor is compared with its own
+# readings at the same hour of the week (Monday 00:00 UTC is slot 0).
+HOURS_PER_WEEK = 7 * 24
+EPOCH_HOUR_OF_WEEK = EPOCH.weekday() * 24   # 1970-01-01 was a Thursday
+
+
+def hour_of_week(seconds):
+    """Maps epoch seconds (naive UTC) to hour-of-week slots 0-167."""
+    return (np.asarray(seconds, dtype=np.int64) // 3600 + EPOCH_HOUR_OF_WEEK) % HOURS_PER_WEEK
+
+
+# === Online Anomaly Detector ===
+# Statistics of the slots one batch touches (flat indexes into the detector's arrays), as scored
+SlotStatistics = namedtuple('SlotStatistics', 'slots count mean m2')
+
+
+class AnomalyDetector:
+    """
+    Flags readings far from their sensor's usual value for that hour of the week.
+
+    Keeps Welford running mean / variance per (sensor, category, hour-of-week)
+    slot in preallocated NumPy arrays indexed by registry id, i.e. a fixed
+    ~6.7 KB per sensor, and never reads history back from the database: each
+    batch is scored and folded into the statistics with a few vectorised array
+    operations. Statistics start empty when the process starts, so a slot only
+    scores readings once it has seen `min_samples` of them.
+
+    A reading is anomalous when |value - mean| exceeds `threshold` standard
+    deviations. The deviation is floored at `min_relative_std` of the mean so
+    near-constant sensors don't alert on tiny changes. Anomalous readings are
+    still folded in, so a lasting change of level stops alerting once learned.
+    The ingest writer scores a batch with score() and only folds it in with
+    apply() after the batch commits, so readings that were rolled back never
+    shape later scores.
+
+    Not thread-safe: feed it from one thread (the ingest writer's).
+    """
+    def __init__(self, threshold=4.0, min_samples=12, min_relative_std=0.01, capacity=1024):
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.min_relative_std = min_relative_std
+        self.count = np.zeros((0, len(ENERGY_CATEGORIES), HOURS_PER_WEEK), dtype=np.int32)
+        self.mean = np.zeros(self.count.shape)
+        self.m2 = np.zeros(self.count.shape)
+        self._grow(capacity)
+
+    def observe(self, rows):
+        """
+        Scores reading tuples (see app.ingest.READING_COLUMNS) against the
+        statistics so far, then folds them in. Returns alert dicts (see
+        EnergyAlert) for the anomalous ones, in input order.
+        """
+        alerts, update = self.score(rows)
+        self.apply(update)
+        return alerts
+
+    def score(self, rows):
+        """
+        Like observe, but leaves the statistics untouched: returns (alerts, update),
+        where `update` holds the slots' statistics with the readings folded in, for
+        apply() once the readings are stored.
+        """
+        if not rows:
+            return [], None
+
+        timestamps, building_ids, categories, values = zip(*rows)
+        sensors = np.fromiter(building_ids, dtype=np.intp, count=len(rows))
+        codes = np.fromiter((ENERGY_CATEGORY_CODES[category] for category in categories),
+                            dtype=np.intp, count=len(rows))
+        seconds = epoch_seconds(timestamps).astype(np.int64)
+        values = np.fromiter(values, dtype=np.float64, count=len(rows))
+        slots = hour_of_week(seconds)
+
+        if sensors.max() >= len(self.count):
+            self._grow(int(sensors.max()) + 1)
+
+        # Work on copies of the touched slots; readings hitting the same slot must be
+        # applied one after another, and a batched message has one reading per sensor,
+        # so this is normally one pass
+        flat = np.ravel_multi_index((sensors, codes, slots), self.count.shape)
+        touched, local = np.unique(flat, return_inverse=True)
+        stats = SlotStatistics(touched, self.count.flat[touched], self.mean.flat[touched], self.m2.flat[touched])
+        rounds = _occurrence_rank(flat)
+
+        expected = np.empty(len(rows))
+        deviation = np.empty(len(rows))
+        scored = np.zeros(len(rows), dtype=bool)
+        for current in range(int(rounds.max()) + 1):
+            index = np.flatnonzero(rounds == current)
+            expected[index], deviation[index], scored[index] = self._score(stats, local[index])
+            self._update(stats, local[index], values[index])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = (values - expected) / deviation
+        anomalous = np.flatnonzero(scored & (np.abs(z_scores) > self.threshold))
+        alerts = [
+            {
+                'timestamp': timestamps[i],
+                'building_id': building_ids[i],
+                'category': categories[i],
+                'value': float(values[i]),
+                'expected': float(expected[i]),
+                'z_score': float(z_scores[i]),
+            }
+            for i in anomalous
+        ]
+        return alerts, stats
+
+    def apply(self, update):
+        """Stores the slot statistics returned by score(); a no-op for None."""
+        if update is None:
+            return
+        self.count.flat[update.slots] = update.count
+        self.mean.flat[update.slots] = update.mean
+        self.m2.flat[update.slots] = update.m2
+
+    def _score(self, stats, local):
+        count = stats.count[local]
+        mean = stats.mean[local]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.sqrt(stats.m2[local] / (count - 1))
+        deviation = np.maximum(std, self.min_relative_std * np.abs(mean))
+        return mean, deviation, (count >= self.min_samples) & (deviation > 0)
+
+    def _update(self, stats, local, values):
+        """Welford's update for readings that each hit a different slot."""
+        count = stats.count[local] + 1
+        delta = values - stats.mean[local]
+        mean = stats.mean[local] + delta / count
+        stats.m2[local] += delta * (values - mean)
+        stats.mean[local] = mean
+        stats.count[local] = count
+
+    def _grow(self, sensors):
+        """Resizes the statistics to hold at least `sensors` ids, doubling to amortise growth."""
+        size = max(sensors, 2 * len(self.count))
+        pad = ((0, size - len(self.count)), (0, 0), (0, 0))
+        self.count = np.pad(self.count, pad)
+        self.mean = np.pad(self.mean, pad)
+        self.m2 = np.pad(self.m2, pad)
+
+
+def _occurrence_rank(keys):
+    """For each key, how many earlier entries have the same key (0 for the first)."""
+    order = np.argsort(keys, kind='stable')
+    ordered = keys[order]
+    first = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    group_start = np.repeat(first, np.diff(np.r_[first, len(keys)]))
+    rank = np.empty(len(keys), dtype=np.intp)
+    rank[order] = np.arange(len(keys)) - group_start
+    return rank
+
+
+# === Alert Storage ===
+def insert_alerts(alerts, session=None):
+    """
+    Writes alert dicts from AnomalyDetector.observe with one multi-row INSERT.
+    Joins the session's current transaction; committing is left to the caller.
+    """
+    if not alerts:
+        return 0
+    (session or db.session).connection().execute(sa.insert(EnergyAlert.__table__), alerts)
+    return len(alerts)
+
+
+def recent_alerts(limit=100, building_id=None, since=None):
+    """
+    Returns the newest alerts first, optionally for one building and / or from
+    `since` on, with their stored `building` rows loaded in the same query.
+    """
+    query = (
+        sa.select(EnergyAlert)
+        .options(so.joinedload(EnergyAlert.building))
+        .order_by(EnergyAlert.timestamp.desc(), EnergyAlert.id.desc())
+        .limit(limit)
+    )
+    if building_id is not None:
+        query = query.where(EnergyAlert.building_id == building_id)
+    if since is not None:
+        query = query.where(EnergyAlert.timestamp >= since)
+    return db.session.scalars(query).all()
@@ -0,0 +1,220 @@
+import csv
+import io
+import multiprocessing
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from app import logger
+from app.buildings import get_registry, sync_buildings
+from app.extensions import db
+from app.ingest import upsert_readings
+from app.models import ENERGY_CATEGORY_CODES
+from app.partitions import create_partition, is_partitioned, list_partitions, month_start
+from app.rollups import rebuild_rollups
+
+# === Import File Layout ===
+# Meter exports need a timestamp, a category ('electricity' / 'gas') and a value
+# column, and identify the meter by registry `building_id` or by `building` name.
+# Naive timestamps are taken as UTC; aware ones are converted to naive UTC.
+IMPORT_COLUMNS = ('timestamp', 'building', 'category', 'value')
+BUILDING_COLUMNS = ('building_id', 'building')
+
+CSV_CHUNK_BYTES = 8 * 1024 * 1024   # Raw CSV text parsed per task
+PARQUET_CHUNK_ROWS = 200_000        # Parquet rows parsed per task
+
+# Reported after every chunk; `done` and `total` are bytes for CSV and rows for Parquet
+BackfillProgress = namedtuple('BackfillProgress', 'rows rejected duplicates done total rows_per_s')
+
+
+# === Parsing (runs in the worker processes) ===
+_lookup = {}  # Set in each parser process by _init_parser
+
+
+def _init_parser(building_ids, by_id):
+    """Gives a parser process the building lookup: a set of ids, or a name -> id dict."""
+    _lookup['building_ids'] = building_ids
+    _lookup['by_id'] = by_id
+
+
+def _parse_records(records):
+    """
+    Converts (timestamp, building, category, value) records into reading tuples
+    (see app.ingest.READING_COLUMNS). Returns (rows, number of rejected records).
+    """
+    building_ids, by_id = _lookup['building_ids'], _lookup['by_id']
+    rows, rejected = [], 0
+    for timestamp, building, category, value in records:
+        try:
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp.strip().replace('Z', '+00:00'))
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+            building_id = int(building) if by_id else building_ids[building]
+            category = category.strip()
+            if (by_id and building_id not in building_ids) or category not in ENERGY_CATEGORY_CODES:
+                raise ValueError
+            rows.append((timestamp, building_id, category, float(value)))
+        except (AttributeError, KeyError, TypeError, ValueError):
+            rejected += 1
+    return rows, rejected
+
+
+def _parse_csv_chunk(data, indexes):
+    """Parses whole CSV lines of raw bytes, picking the import columns by position."""
+    reader = csv.reader(io.StringIO(data.decode('utf-8')))
+    return _parse_records(
+        tuple(line[index] for index in indexes) if len(line) > max(indexes) else (None,) * 4
+        for line in reader if line
+    )
+
+
+def _parse_parquet_batch(batch):
+    """Parses a pyarrow RecordBatch holding the import columns in IMPORT_COLUMNS order."""
+    return _parse_records(zip(*(column.to_pylist() for column in batch.columns)))
+
+
+# === Sources ===
+def _csv_chunks(path, chunk_bytes):
+    """
+    Reads the header and returns a generator of (raw bytes, bytes consumed) chunks
+    that end on a line break, so each can be parsed independently, the column
+    positions of IMPORT_COLUMNS, whether buildings are ids, and the bytes after the header.
+    Quoted fields must not span lines.
+    """
+    file = open(path, 'rb')
+    header = next(csv.reader([file.readline().decode('utf-8-sig')]), [])
+    header = [column.strip().lower() for column in header]
+    building = next((column for column in BUILDING_COLUMNS if column in header), None)
+    missing = [column for column in ('timestamp', 'category', 'value') if column not in header]
+    if building is None or missing:
+        file.close()
+        raise ValueError(f"{path}: missing columns {', '.join(missing or ['building_id or building'])}")
+    indexes = tuple(header.index(building if column == 'building' else column) for column in IMPORT_COLUMNS)
+
+    header_bytes = file.tell()
+
+    def chunks():
+        with file:
+            while True:
+                data = file.read(chunk_bytes)
+                if not data:
+                    return
+                data += file.readline()  # Finish the last line
+                yield data, len(data)
+
+    return chunks(), indexes, building == 'building_id', os.path.getsize(path) - header_bytes
+
+
+def _parquet_chunks(path, chunk_rows):
+    """
+    Returns a generator of (RecordBatch, rows consumed) chunks of the import
+    columns, whether buildings are ids, and the number of rows in the file.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Importing Parquet files needs pyarrow (pip install pyarrow).") from None
+
+    parquet = pq.ParquetFile(path)
+    names = [name.lower() for name in parquet.schema_arrow.names]
+    building = next((column for column in BUILDING_COLUMNS if column in names), None)
+    missing = [column for column in ('timestamp', 'category', 'value') if column not in names]
+    if building is None or missing:
+        raise ValueError(f"{path}: missing columns {', '.join(missing or ['building_id or building'])}")
+    columns = [parquet.schema_arrow.names[names.index(building if column == 'building' else column)]
+               for column in IMPORT_COLUMNS]
+
+    chunks = ((batch, batch.num_rows) for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns))
+    return chunks, building == 'building_id', parquet.metadata.num_rows
+
+
+# === Import Entry Point ===
+def import_readings(path, workers=None, chunk_size=None, progress=None):
+    """
+    Streams a CSV or Parquet file of historical readings (see IMPORT_COLUMNS)
+    into energy_readings through upsert_readings, then rebuilds the rollups for
+    the days it covered. Readings already stored are skipped and counted as
+    duplicates, so an interrupted or repeated import can simply be run again.
+
+    Chunks are parsed in `workers` processes (default: CPU count; 1 parses
+    inline) while the previous ones are written, with at most two chunks per
+    worker in flight, so memory stays flat however large the file. Each chunk is
+    committed on its own; on a partitioned table its months' partitions are
+    created first. Records with unknown buildings or categories, or unparsable
+    timestamps or values, are counted and skipped.
+
+    `chunk_size` is bytes per CSV chunk or rows per Parquet chunk, and
+    `progress(BackfillProgress)` is called after each chunk.
+    Returns the final BackfillProgress.
+    """
+    workers = workers or os.cpu_count() or 1
+    if path.lower().endswith('.parquet'):
+        chunks, by_id, total = _parquet_chunks(path, chunk_size or PARQUET_CHUNK_ROWS)
+        parse, extra = _parse_parquet_batch, ()
+    else:
+        chunks, indexes, by_id, total = _csv_chunks(path, chunk_size or CSV_CHUNK_BYTES)
+        parse, extra = _parse_csv_chunk, (indexes,)
+
+    sync_buildings()  # Resolve names with the ids stored in the buildings table
+    registry = get_registry()
+    lookup = ({sensor.id for sensor in registry.sensors()} if by_id
+              else {sensor.name: sensor.id for sensor in registry.sensors()})
+
+    connection = db.session.connection()
+    partitions = list_partitions(connection) if is_partitioned(connection) else None
+    written = rejected = duplicates = done = 0
+    first = last = None
+    started = time.perf_counter()
+
+    def write(parsed, consumed):
+        nonlocal written, rejected, duplicates, done, first, last
+        rows, chunk_rejected = parsed
+        if rows:
+            timestamps = [row[0] for row in rows]
+            first = min(first or timestamps[0], min(timestamps))
+            last = max(last or timestamps[0], max(timestamps))
+            if partitions is not None:
+                for month in sorted({month_start(timestamp) for timestamp in timestamps} - partitions.keys()):
+                    create_partition(db.session.connection(), month)
+                    partitions[month] = None
+            result = upsert_readings(rows, 'ignore')
+            db.session.commit()
+            written += len(result.inserted)
+            duplicates += result.duplicates
+        rejected += chunk_rejected
+        done += consumed
+        if progress:
+            elapsed = time.perf_counter() - started
+            progress(BackfillProgress(written, rejected, duplicates, done, total,
+                                      written / elapsed if elapsed else 0.0))
+
+    if workers == 1:
+        _init_parser(lookup, by_id)
+        for chunk, consumed in chunks:
+            write(parse(chunk, *extra), consumed)
+    else:
+        context = multiprocessing.get_context('spawn')  # Children must not share the parent's DB connections
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_parser,
+                                 initargs=(lookup, by_id)) as pool:
+            pending = deque()
+            for chunk, consumed in chunks:
+                pending.append((pool.submit(parse, chunk, *extra), consumed))
+                if len(pending) >= 2 * workers:
+                    future, consumed = pending.popleft()
+                    write(future.result(), consumed)
+            while pending:
+                future, consumed = pending.popleft()
+                write(future.result(), consumed)
+
+    if first is not None:
+        rebuild_rollups(first, last)  # Imported readings bypass the ingest writer that maintains the rollups
+        db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    result = BackfillProgress(written, rejected, duplicates, done, total, written / elapsed if elapsed else 0.0)
+    logger.info(f"Imported {written} readings from {path} ({rejected} rejected, {duplicates} already stored, "
+                f"{result.rows_per_s:,.0f} rows/s).")
+    return result
@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import sqlalchemy as sa
+
+from app import logger
+from app.extensions import db
+from app.models import Building
+
+# === Base Path Setup ===
+basedir = os.path.abspath(os.path.dirname(__file__))
+BUILDINGS_FILE = os.path.join(basedir, 'static', 'buildings_data.json')
+
+
+# === Building / Sensor Entry ===
+@dataclass(frozen=True)
+class BuildingInfo:
+    """
+    One metered building or accommodation flat, identified by a small integer id.
+    """
+    id: int
+    name: str
+    code: str
+    zone: str
+    group: str                      # Publish group: zone for buildings, parent building for flats
+    parent: Optional[str] = None    # Accommodation building a flat belongs to
+    is_accommodation: bool = False
+
+
+# === Cached Building Registry ===
+class BuildingRegistry:
+    """
+    Loads buildings_data.json once and reloads it only when the file's mtime changes.
+
+    Every university building and accommodation flat is interned to a small integer
+    id. Ids are append-only for the lifetime of the registry: a name keeps its id
+    across reloads, and new names get the next free id.
+    """
+
+    def __init__(self, path=BUILDINGS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._loaded = False
+        self._ids = {}                      # name -> id (never shrinks)
+        self._next_id = 0
+        self._by_id = []                    # id -> BuildingInfo, None for names no longer in the file
+        self._by_name = {}
+        self._by_code = {}
+        self._by_zone = {}
+        self.university_buildings = []      # Raw entries, as stored in the file
+        self.accommodation_buildings = []
+
+    # --- Loading ---
+    def refresh(self):
+        """Reloads the file if it changed since the last load. Returns True on reload."""
+        mtime = self._mtime_now()
+
+        if self._loaded and mtime == self._mtime:
+            return False
+
+        with self._lock:
+            if self._loaded and mtime == self._mtime:
+                return False
+            self._load(mtime)
+        return True
+
+    def _load(self, mtime):
+        try:
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            logger.error(f"File not found: {self.path}")
+            data = {}
+
+        university_buildings = data.get('university_buildings', [])
+        accommodation_buildings = data.get('accommodation_buildings', [])
+
+        entries = []
+        for building in university_buildings:
+            zone = building.get('zone', '')
+            entries.append(dict(
+                name=building['building'], code=building.get('building_code', ''), zone=zone, group=zone
+            ))
+
+        for building in accommodation_buildings:
+            for flat_number in range(1, building.get('total_flats', 0) + 1):
+                entries.append(dict(
+                    name=f"{building['building']} Flat {flat_number}", code=building.get('building_code', ''),
+                    zone='', group=building['building'], parent=building['building'], is_accommodation=True
+                ))
+
+        by_id = [None] * self._next_id
+        by_name, by_code, by_zone = {}, {}, {}
+        for entry in entries:
+            info = BuildingInfo(id=self._intern(entry['name']), **entry)
+            if info.id >= len(by_id):
+                by_id.extend([None] * (info.id + 1 - len(by_id)))
+            by_id[info.id] = info
+            by_name[info.name] = info
+            if info.code and not info.is_accommodation:
+                by_code.setdefault(info.code, info)
+            if info.zone:
+                by_zone.setdefault(info.zone, []).append(info)
+
+        # Swap in the new indexes together so readers never see a half-built registry
+        self.university_buildings = university_buildings
+        self.accommodation_buildings = accommodation_buildings
+        self._by_id, self._by_name, self._by_code, self._by_zone = by_id, by_name, by_code, by_zone
+        self._mtime = mtime
+        self._loaded = True
+        logger.debug(f"Loaded {len(entries)} buildings and flats from {self.path}.")
+
+    def _intern(self, name):
+        if name not in self._ids:
+            self._ids[name] = self._next_id
+            self._next_id += 1
+        return self._ids[name]
+
+    def adopt_ids(self, ids):
+        """
+        Takes over persisted name -> id assignments (e.g. from the buildings table)
+        and rebuilds the indexes. Names not in `ids` get ids after the highest one.
+        """
+        with self._lock:
+            self._ids = dict(ids)
+            self._next_id = max(self._ids.values(), default=-1) + 1
+            self._load(self._mtime_now())
+
+    def _mtime_now(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    # --- Lookups ---
+    def get(self, building_id):
+        """Returns the BuildingInfo for an id, or None if unknown."""
+        self.refresh()
+        if 0 <= building_id < len(self._by_id):
+            return self._by_id[building_id]
+        return None
+
+    def by_name(self, name):
+        """Returns the BuildingInfo for a building or flat name, or None."""
+        self.refresh()
+        return self._by_name.get(name)
+
+    def by_code(self, code):
+        """Returns the university building with the given building code, or None."""
+        self.refresh()
+        return self._by_code.get(code)
+
+    def by_zone(self, zone):
+        """Returns the university buildings in a campus zone."""
+        self.refresh()
+        return list(self._by_zone.get(zone, []))
+
+    def id_for(self, name):
+        """Returns the interned id for a name, or None if the name is not registered."""
+        info = self.by_name(name)
+        return info.id if info else None
+
+    def sensors(self):
+        """Returns every building and flat currently in the file, ordered by id."""
+        return [info for info in self.sensors_by_id() if info is not None]
+
+    def sensors_by_id(self):
+        """
+        Returns the id-indexed list (None for retired ids) for hot paths that look up
+        many ids at once without re-checking the file per lookup.
+        """
+        self.refresh()
+        return self._by_id
+
+    def building_names(self):
+        """Returns the names of university buildings (those with a building code)."""
+        return [info.name for info in self.sensors() if info.code and not info.is_accommodation]
+
+    def zones(self):
+        """Returns the campus zones in file order."""
+        self.refresh()
+        return list(self._by_zone)
+
+
+# === Shared Registry Instance ===
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Returns the process-wide BuildingRegistry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = BuildingRegistry()
+    return _registry
+
+
+# === Keep the Buildings Table and Registry in Step ===
+def adopt_building_ids(session=None):
+    """
+    Makes the shared registry use the ids stored in the buildings table, without
+    writing anything. Processes started after sync_buildings ran (e.g. the ingest
+    service's workers) call this instead, so they do not race to insert buildings.
+
+    Returns:
+        The stored {name: id} mapping.
+    """
+    session = session or db.session
+    stored = dict(session.execute(sa.select(Building.name, Building.id)).all())
+    get_registry().adopt_ids(stored)
+    return stored
+
+
+def sync_buildings(session=None):
+    """
+    Makes the buildings table and the shared registry agree on ids.
+
+    Names already stored keep their id, and the registry adopts them. Buildings or
+    flats that are new in buildings_data.json are inserted with the registry's next id.
+    Call this once at startup, before ids are handed out to publishers or ingest.
+
+    Returns:
+        Number of buildings inserted.
+    """
+    session = session or db.session
+    registry = get_registry()
+    stored = adopt_building_ids(session)
+
+    new_buildings = [
+        Building(
+            id=info.id,
+            name=info.name,
+            code=info.code,
+            zone=info.zone,
+            parent=info.parent,
+            is_accommodation=info.is_accommodation
+        )
+        for info in registry.sensors() if info.name not in stored
+    ]
+    if new_buildings:
+        session.add_all(new_buildings)
+        session.commit()
+        logger.info(f"Registered {len(new_buildings)} new buildings and flats.")
+
+    return len(new_buildings)
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from flask import current_app, request
+
+from app.rollups import read_watermark
+
+
+# === Response Cache ===
+class ResponseCache:
+    """
+    Thread-safe LRU cache for rendered analytics responses, bounded by the total
+    size of its values in bytes rather than the number of entries.
+
+    Entries belong to one ingest watermark version: the first lookup with a newer
+    version drops them all, since every new batch may change any chart.
+    A max_bytes of 0 disables caching.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, version):
+        """Returns the value cached for `key` at `version`, or None."""
+        with self._lock:
+            self._sync(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, version, value, size):
+        """Stores `value` (`size` bytes), evicting least recently used entries. Returns False if it doesn't fit."""
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            self._sync(version)
+            if self.version != version:
+                return False    # Built from data older than what is already cached
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _sync(self, version):
+        if self.version is None or version > self.version:
+            self._entries.clear()
+            self.size = 0
+            self.version = version
+
+
+def get_response_cache():
+    """Returns the app's ResponseCache (created in create_app)."""
+    return current_app.extensions['energy_cache']
+
+
+# === Cached Views ===
+def cache_key(endpoint, params, version):
+    """Canonical key for a request: the endpoint, its normalised parameters and the watermark version."""
+    return json.dumps([endpoint, version, params], sort_keys=True, separators=(',', ':'), default=str)
+
+
+def cached_response(endpoint, params, build):
+    """
+    Serves the response `build()` renders for `params` from the cache while the
+    ingest watermark is unchanged.
+
+    The ETag is a hash of the cache key, so a client revalidating with
+    If-None-Match gets a 304 without the response being rebuilt, even after
+    the entry was evicted. Cache-Control: no-cache makes browsers revalidate
+    every time, since any new batch of readings changes the ETag.
+    """
+    version, _ = read_watermark()
+    key = cache_key(endpoint, params, version)
+    etag = hashlib.sha1(key.encode()).hexdigest()
+
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+    else:
+        cache = get_response_cache()
+        entry = cache.get(key, version)
+        if entry is None:
+            built = build()
+            entry = (built.get_data(), built.mimetype)
+            cache.put(key, version, entry, len(entry[0]))
+        response = current_app.response_class(entry[0], mimetype=entry[1])
+
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    response.vary.add('Accept')
+    return response
+
+
+def cached_value(endpoint, build):
+    """Returns `build()` cached under the current ingest watermark; for JSON-serialisable page data."""
+    version, _ = read_watermark()
+    key = cache_key(endpoint, None, version)
+    cache = get_response_cache()
+    value = cache.get(key, version)
+    if value is None:
+        value = build()
+        cache.put(key, version, value, len(json.dumps(value)))
+    return value
@@ -0,0 +1,205 @@
+from collections import namedtuple
+from datetime import timedelta
+from itertools import chain, groupby
+from operator import itemgetter
+
+import numpy as np
+import sqlalchemy as sa
+
+from app.downsampling import EPOCH, epoch_seconds, lttb
+from app.emissions import factor_table
+from app.extensions import db
+from app.models import ENERGY_CATEGORIES, Building, EnergyReading, EnergyRollupDaily, EnergyRollupHourly
+
+# === Chart Specs ===
+# A normalised dashboard chart: 'usage' is the energy line chart (mean reading
+# over time), 'emissions' the daily CO₂ chart. `start` / `stop` are the resolved
+# half-open range; `max_points` only applies to usage charts.
+ChartSpec = namedtuple('ChartSpec', 'id kind buildings energy_types start stop max_points')
+CHART_KINDS = ('usage', 'emissions')
+
+# Rows fetched per round trip while scanning
+SCAN_FETCH_BATCH = 10_000
+
+
+# === Scan Planning ===
+class PlannedScan:
+    """
+    One grouped pass over a source table ('raw' readings, 'hourly' or 'daily'
+    rollups) covering [start, stop) for the (building, energy type) series its
+    charts ask for. Every chart planned onto it is cut from the same rows.
+    """
+    def __init__(self, source, start, stop):
+        self.source = source
+        self.start = start
+        self.stop = stop
+        self.charts = []
+
+    def add(self, chart, start):
+        self.start = min(self.start, start)
+        self.stop = max(self.stop, chart.stop)
+        self.charts.append(chart)
+
+    @property
+    def series(self):
+        """The (building, energy type) pairs requested by any of the charts."""
+        return sorted({(building, etype) for chart in self.charts
+                       for building in chart.buildings for etype in chart.energy_types})
+
+    def __repr__(self):
+        return f'PlannedScan({self.source}, {self.start} - {self.stop}, charts={[c.id for c in self.charts]})'
+
+
+def plan_scans(charts, raw_max_days):
+    """
+    Assigns chart specs to as few scans as possible:
+
+    - Usage charts read raw readings for ranges up to `raw_max_days` and hourly
+      rollups beyond (like /get_energy_data); charts on the same source with
+      overlapping ranges share one scan over the union of their ranges.
+    - Emissions charts only need daily totals, which any source provides, so
+      they join a scan that covers their days once it is widened back to
+      midnight of its first day (a usage window ending now starts mid-day).
+      Otherwise they share a scan of the daily rollups with other overlapping
+      emissions charts.
+    """
+    scans = []
+    usage = sorted((chart for chart in charts if chart.kind == 'usage'), key=lambda chart: chart.start)
+    for chart in usage:
+        source = 'hourly' if chart.stop - chart.start > timedelta(days=raw_max_days) else 'raw'
+        _merge_or_add(scans, source, chart, chart.start)
+
+    emissions = sorted((chart for chart in charts if chart.kind == 'emissions'), key=lambda chart: chart.start)
+    for chart in emissions:
+        first_day = _midnight(chart.start)
+        covering = next((scan for scan in scans if scan.source != 'daily'
+                         and _midnight(scan.start) <= first_day and scan.stop >= chart.stop), None)
+        if covering is not None:
+            covering.add(chart, first_day)
+        else:
+            _merge_or_add(scans, 'daily', chart, first_day)
+    return scans
+
+
+def _merge_or_add(scans, source, chart, start):
+    overlapping = next((scan for scan in scans
+                        if scan.source == source and start <= scan.stop and chart.stop >= scan.start), None)
+    if overlapping is None:
+        overlapping = PlannedScan(source, start, chart.stop)
+        scans.append(overlapping)
+    overlapping.add(chart, start)
+
+
+def _midnight(moment):
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+# === Scan Execution ===
+def chart_series(charts, raw_max_days):
+    """
+    Plans and runs the scans for `charts` and returns {chart id: series}:
+
+    - usage: [(building, category, epoch seconds, values)] in request order,
+      each LTTB-downsampled to the chart's max_points.
+    - emissions: (datetime64[D] days, {building: kg CO₂ per day}), NaN for
+      days without readings, as app.emissions.daily_emissions returns.
+    """
+    usage = {chart.id: {} for chart in charts if chart.kind == 'usage'}
+    emissions = {chart.id: _empty_emissions(chart) for chart in charts if chart.kind == 'emissions'}
+
+    for scan in plan_scans(charts, raw_max_days):
+        if scan.series:
+            _run_scan(scan, usage, emissions)
+
+    series = {chart_id: (days, kg) for chart_id, (days, kg, _) in emissions.items()}
+    for chart in charts:
+        if chart.kind == 'usage':
+            traces = usage[chart.id]
+            series[chart.id] = [
+                (building, etype, *traces[building, etype])
+                for building in chart.buildings for etype in chart.energy_types if (building, etype) in traces
+            ]
+    return series
+
+
+def _empty_emissions(chart):
+    first = np.datetime64(chart.start.date())
+    last = np.datetime64((chart.stop - timedelta(microseconds=1)).date())
+    days = np.arange(first, last + 1, dtype='datetime64[D]')
+    return days, {building: np.full(len(days), np.nan) for building in chart.buildings}, factor_table(days)
+
+
+def _run_scan(scan, usage, emissions):
+    """Reads the scan's rows once, grouped by (building, category), and cuts every chart's series from them."""
+    result = db.session.connection().execute(
+        _scan_query(scan).execution_options(yield_per=SCAN_FETCH_BATCH)
+    )
+    rows = chain.from_iterable(result.partitions())
+
+    for (building, code), group in groupby(rows, key=itemgetter(0, 1)):
+        _, _, timestamps, totals, counts = zip(*group)
+        seconds = epoch_seconds(timestamps)
+        totals = np.array(totals, dtype=np.float64)
+        etype = ENERGY_CATEGORIES[code]
+
+        for chart in scan.charts:
+            if building not in chart.buildings or etype not in chart.energy_types:
+                continue
+            if chart.kind == 'usage':
+                start = chart.start if scan.source == 'raw' else chart.start.replace(minute=0, second=0, microsecond=0)
+                lo, hi = np.searchsorted(seconds, [_seconds(start), _seconds(chart.stop)])
+                if hi > lo:
+                    means = totals[lo:hi] / np.array(counts[lo:hi], dtype=np.float64)
+                    keep = lttb(seconds[lo:hi], means, chart.max_points)
+                    usage[chart.id][building, etype] = seconds[lo:hi][keep].astype(np.int64), means[keep]
+            else:
+                _add_emissions(emissions[chart.id], chart, building, code, seconds, totals)
+
+
+def _add_emissions(state, chart, building, code, seconds, totals):
+    """Adds one category's daily usage × factor in force into the building's emissions series."""
+    days, series, factors = state
+    lo, hi = np.searchsorted(seconds, [_seconds(_midnight(chart.start)), _seconds(chart.stop)])
+    day = (seconds[lo:hi] // 86400).astype(np.int64) - days[0].astype(np.int64)
+    usage = np.bincount(day, weights=totals[lo:hi], minlength=len(days))
+    present = (np.bincount(day, minlength=len(days)) > 0) & ~np.isnan(factors[code])
+    kg = series[building]
+    kg[present] = np.nan_to_num(kg[present]) + usage[present] * factors[code][present]
+
+
+def _seconds(moment):
+    return (moment - EPOCH).total_seconds()
+
+
+def _scan_query(scan):
+    """
+    Selects (building, category code, timestamp / bucket, total, count) rows for
+    the scan, ordered by building id, category and time like the tables' indexes.
+    Raw readings count as a total of their value over one reading.
+
+    The plain IN filters let the (building, category, time) index narrow the
+    scan; the row-value IN then drops pairs no chart asked for, e.g. gas for a
+    building only charted for electricity.
+    """
+    if scan.source == 'raw':
+        model, time, total, count = EnergyReading, EnergyReading.timestamp, EnergyReading.value, sa.literal(1)
+        start = scan.start
+    else:
+        model = EnergyRollupHourly if scan.source == 'hourly' else EnergyRollupDaily
+        time, total, count = model.bucket, model.total, model.count
+        start = scan.start.replace(minute=0, second=0, microsecond=0)
+
+    series = scan.series
+    buildings, energy_types = map(sorted, map(set, zip(*series)))
+    return (
+        sa.select(Building.name, sa.type_coerce(model.category, sa.SmallInteger), time, total, count)
+        .join(Building, Building.id == model.building_id)
+        .where(
+            Building.name.in_(buildings),
+            model.category.in_(energy_types),
+            sa.tuple_(Building.name, model.category).in_(series),
+            time >= start,
+            time < scan.stop
+        )
+        .order_by(model.building_id, model.category, time)
+    )
@@ -0,0 +1,127 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.backfill import import_readings
+from app.debug_utils import SEED_SCOPES, generate_sensor_data
+from app.emissions import set_emission_factor
+from app.extensions import db
+from app.forecast import refresh_forecasts
+from app.ingest_service import SHARD_KEYS, run_service
+from app.models import ENERGY_CATEGORIES
+from app.rollups import rebuild_rollups
+
+# === `flask energy ...` Commands ===
+energy_cli = AppGroup('energy', help='Energy data maintenance commands.')
+
+
+@energy_cli.command('rebuild-rollups')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='First day to rebuild (default: all history).')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Last day to rebuild, inclusive (default: all history).')
+def rebuild_rollups_command(start, end):
+    """
+    Recomputes the hourly and daily rollups and load histograms from energy_readings,
+    e.g. after backfilling or deleting readings outside the ingest writer.
+    """
+    written = rebuild_rollups(start, end)
+    db.session.commit()
+    click.echo(', '.join(f"{count} {grain} rollup rows" for grain, count in written.items()) + ' rebuilt.')
+
+
+@energy_cli.command('set-emission-factor')
+@click.argument('category', type=click.Choice(ENERGY_CATEGORIES))
+@click.argument('kg_co2_per_kwh', type=float)
+@click.option('--valid-from', type=click.DateTime(formats=['%Y-%m-%d']), required=True,
+              help='First day the factor applies to.')
+@click.option('--source', default='', help='Where the factor comes from, e.g. the published dataset.')
+def set_emission_factor_command(category, kg_co2_per_kwh, valid_from, source):
+    """
+    Publishes a new CO₂ emission factor version for CATEGORY. Days before
+    --valid-from keep using the previous version.
+    """
+    set_emission_factor(category, kg_co2_per_kwh, valid_from.date(), source)
+    db.session.commit()
+    click.echo(f"{category}: {kg_co2_per_kwh} kg CO₂/kWh from {valid_from:%Y-%m-%d}.")
+
+
+@energy_cli.command('refresh-forecasts')
+@click.option('--history-weeks', type=int, default=None,
+              help='Hourly history to fit from (default: ENERGY_FORECAST_HISTORY_WEEKS).')
+def refresh_forecasts_command(history_weeks):
+    """
+    Folds the hours since the last refresh into the per-building forecast
+    models, as the hourly scheduled job does.
+    """
+    hours = refresh_forecasts(history_weeks or current_app.config['ENERGY_FORECAST_HISTORY_WEEKS'])
+    db.session.commit()
+    click.echo(f"{hours} hours folded into the forecast models.")
+
+
+@energy_cli.command('seed-readings')
+@click.option('--days', type=click.IntRange(min=1), default=7, show_default=True,
+              help='Days of history up to now to simulate.')
+@click.option('--scope', type=click.Choice(SEED_SCOPES), default='buildings', show_default=True,
+              help='Sensors to simulate: university buildings, accommodation flats or both.')
+@click.option('--seed', type=int, default=None, help='Random seed, for the same readings on every run.')
+def seed_readings_command(days, scope, seed):
+    """
+    Bulk-loads simulated 5-minute readings for load tests and demos, then
+    rebuilds the rollups for those days. Existing readings are kept.
+    """
+    with click.progressbar(length=days, label='Seeding days') as bar:
+        written = generate_sensor_data(days, scope, seed, progress=lambda rows: bar.update(1))
+    click.echo(f"{written} readings seeded.")
+
+
+@energy_cli.command('import-readings')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', type=click.IntRange(min=1), default=None,
+              help='Parser processes (default: one per CPU).')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=None,
+              help='Bytes per CSV chunk or rows per Parquet chunk.')
+def import_readings_command(path, workers, chunk_size):
+    """
+    Imports historical readings from a CSV or Parquet meter export at PATH, with
+    timestamp, building_id (or building name), category and value columns, then
+    rebuilds the rollups for the days it covered.
+    """
+    with click.progressbar(length=1, label='Importing readings',
+                           item_show_func=lambda p: p and f"{p.rows:,} rows, {p.rows_per_s:,.0f} rows/s") as bar:
+        def report(p):
+            bar.length = p.total
+            bar.update(p.done - bar.pos, p)
+        result = import_readings(path, workers, chunk_size, progress=report)
+    click.echo(f"{result.rows} readings imported, {result.rejected} rejected, {result.duplicates} already stored "
+               f"({result.rows_per_s:,.0f} rows/s).")
+
+
+# === `flask iot ...` Commands ===
+iot_cli = AppGroup('iot', help='IoT sensor pipeline commands.')
+
+
+@iot_cli.command('run')
+@click.option('--workers', type=click.IntRange(min=1), default=None,
+              help='Ingest processes (default: IOT_INGEST_WORKERS).')
+@click.option('--shard-by', type=click.Choice(SHARD_KEYS), default=None,
+              help='Split sensors across workers by publish zone or by building (default: IOT_INGEST_SHARD_BY).')
+@click.option('--simulate/--no-simulate', default=None,
+              help='Also publish simulated readings (default: IOT_SIMULATOR_ACTIVE).')
+def run_iot_command(workers, shard_by, simulate):
+    """
+    Runs the sensor ingest service: worker processes that each subscribe to their
+    shard of the MQTT topics and write its readings. Ctrl-C or SIGTERM stops it
+    after every worker has written the readings it still buffers.
+    """
+    config = current_app.config
+    if simulate is None:
+        simulate = str(config.get('IOT_SIMULATOR_ACTIVE', 'false')).lower() == 'true'
+    exit_codes = run_service(
+        current_app._get_current_object(),
+        workers or config['IOT_INGEST_WORKERS'],
+        shard_by or config['IOT_INGEST_SHARD_BY'],
+        simulate
+    )
+    if any(exit_codes):
+        raise click.ClickException(f"IoT service processes exited with codes {exit_codes}.")
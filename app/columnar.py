@@ -0,0 +1,58 @@
+import base64
+
+import numpy as np
+
+# === Columnar Trace Encoding ===
+# Opt-in compact form of the chart responses (see app/static/js/charts.js):
+#   x: {'start': epoch seconds, 'step': seconds}    evenly spaced timestamps
+#      {'start': epoch seconds, 'deltas': base64}   otherwise; little-endian int32 gaps in seconds
+#   y: base64 of little-endian float32 values, NaN where there is no data
+# Timestamps are naive UTC, like the database columns.
+COLUMNAR_MIMETYPE = 'application/vnd.greencampus.columnar+json'
+
+
+def encode_times(seconds):
+    """Encodes ascending epoch seconds as a start plus either a fixed step or int32 deltas."""
+    seconds = np.asarray(seconds, dtype=np.int64)
+    if len(seconds) == 0:
+        return {'start': 0, 'step': 0}
+
+    deltas = np.diff(seconds)
+    if len(deltas) == 0 or np.all(deltas == deltas[0]):
+        return {'start': int(seconds[0]), 'step': int(deltas[0]) if len(deltas) else 0}
+    if deltas.max() > np.iinfo(np.int32).max:
+        raise ValueError("Timestamp gaps over 68 years cannot be delta-encoded as int32")
+    return {'start': int(seconds[0]), 'deltas': _pack(deltas, '<i4')}
+
+
+def encode_values(values):
+    """Encodes values as base64 float32; None / NaN stay NaN."""
+    return _pack(np.asarray(values, dtype=np.float64), '<f4')
+
+
+def encode_trace(name, seconds, values, **style):
+    """Returns a columnar trace; `style` holds extra Plotly fields (default: a line chart)."""
+    return {
+        'name': name,
+        'type': style.pop('type', 'scatter'),
+        'mode': style.pop('mode', 'lines'),
+        'length': len(values),
+        'x': encode_times(seconds),
+        'y': encode_values(values),
+        **style
+    }
+
+
+def decode_trace(trace):
+    """Inverse of encode_trace, returning (epoch seconds, float32 values) arrays; used by tests and tooling."""
+    x = trace['x']
+    if 'deltas' in x:
+        deltas = np.frombuffer(base64.b64decode(x['deltas']), dtype='<i4')
+        seconds = x['start'] + np.concatenate(([0], np.cumsum(deltas, dtype=np.int64)))
+    else:
+        seconds = x['start'] + x['step'] * np.arange(trace['length'], dtype=np.int64)
+    return seconds, np.frombuffer(base64.b64decode(trace['y']), dtype='<f4')
+
+
+def _pack(array, dtype):
+    return base64.b64encode(array.astype(dtype).tobytes()).decode('ascii')
@@ -1,24 +1,38 @@
 import datetime
 import random
+from itertools import groupby
 from typing import List
 
+import numpy as np
+import sqlalchemy as sa
+from flask_migrate import upgrade
+
 from app import db, logger
-from app.iot_simulator import generate_reading
-from app.models import ActivityLog, User, Inventory, EnergyReading
-from app.utils import load_buildings_data
+from app.buildings import get_registry, sync_buildings
+from app.emissions import seed_emission_factors
+from app.ingest import bulk_insert_reading_grid
+from app.iot_simulator import generate_readings
+from app.models import ActivityLog, User, Inventory
+from app.partitions import create_partition, is_partitioned, list_partitions, month_start
+from app.rollups import rebuild_rollups
+
+# Sensors simulated by generate_sensor_data
+SEED_SCOPES = ('buildings', 'flats', 'both')
 
 
 # === Reset and Seed Database ===
-def reset_db():
+def reset_db(energy_days=7, energy_scope='buildings', seed=None):
     """
     Drop all tables and recreate them with mock data:
     - Verified demo users
     - Activity logs
     - Inventory items
-    - Energy readings
+    - Energy readings: `energy_days` of history for the sensors in `energy_scope`
+      (see generate_sensor_data), reproducible with `seed`
     """
-    db.drop_all()
-    db.create_all()
+    recreate_schema()
+    sync_buildings()  # Populate the buildings table from buildings_data.json
+    seed_emission_factors()  # create_all leaves emission_factors empty (migration 0007 seeds it)
 
     # Seed mock users
     users = [
@@ -39,8 +53,7 @@ def reset_db():
     logger.info("Mock user data generated successfully.")
 
     # Generate energy readings
-    generate_sensor_data()
-    db.session.commit()  # Commit users before adding dependent data
+    generate_sensor_data(energy_days, energy_scope, seed)
 
     # Generate inventory data
     create_mock_inventory_data()
@@ -57,6 +70,21 @@ def reset_db():
 
 # === Helper Functions ===
 
+def recreate_schema():
+    """
+    Drops every table and rebuilds the schema. On PostgreSQL the schema is built by
+    the migrations, so energy_readings comes back range-partitioned by month as in
+    production; other databases use create_all.
+    """
+    db.drop_all()
+    if db.engine.dialect.name != 'postgresql':
+        db.create_all()
+        return
+
+    db.session.execute(sa.text("DROP TABLE IF EXISTS alembic_version"))
+    db.session.commit()
+    upgrade()
+
 def generate_walking_data(date: datetime.date):
     """
     Generate mock walking data based on date (weekend vs weekday).
@@ -176,62 +204,77 @@ def create_mock_inventory_data():
     db.session.commit()
     logger.info("Mock inventory data generated successfully.")
 
-def generate_sensor_data():
+def generate_sensor_data(days=7, scope='buildings', seed=None, progress=None):
     """
-    Generate mock energy readings every 5 minutes for the past 7 days
-    for university buildings (and optionally accommodation flats).
+    Bulk-load mock energy readings every 5 minutes for the `days` up to now,
+    for university buildings, accommodation flats or both (`scope`, see
+    SEED_SCOPES), then rebuild the rollups for those days.
+
+    A day is generated at a time as arrays (one call per energy type) and
+    written with bulk_insert_reading_grid (a binary COPY on PostgreSQL), so
+    memory stays flat however long the range. On a partitioned table, months
+    without a partition are loaded into a new one before it is attached (see
+    app.partitions.create_partition) and committed per month; other days are
+    committed one at a time. `progress(rows)` is called after each day.
+    The COPY does not skip readings already stored, so the range must not
+    overlap earlier seeded readings at the same minutes (the unique reading key
+    would reject the day). Returns the number of readings written.
     """
-    university_buildings, accommodation_buildings = load_buildings_data()
+    if scope not in SEED_SCOPES:
+        raise ValueError(f"Unknown sensor scope: {scope!r} (expected one of {', '.join(SEED_SCOPES)})")
+    sensors = [
+        s for s in get_registry().sensors()
+        if scope == 'both' or s.is_accommodation == (scope == 'flats')
+    ]
+    building_ids = np.array([s.id for s in sensors])
 
     energy_types = ["electricity", "gas"]
-    start_time = datetime.datetime.now() - datetime.timedelta(days=7)
-    end_time = datetime.datetime.now()
     interval = datetime.timedelta(minutes=5)
-
-    current_time = start_time
-    batch = []
-
-    while current_time <= end_time:
-        # Readings for university buildings
-        for building in university_buildings:
-            for energy_type in energy_types:
-                reading = EnergyReading(
-                    timestamp=current_time,
-                    building=building.get("building"),
-                    building_code=building.get("building_code", ""),
-                    zone=building.get("zone", ""),
-                    value=generate_reading(energy_type),
-                    category=energy_type
-                )
-                batch.append(reading)
-
-        # Uncomment to simulate per-flat data for accommodations
-        # for building in accommodation_buildings:
-        #     total_flats = building.get("total_flats", 0)
-        #     for flat_number in range(1, total_flats + 1):
-        #         flat_building_name = f"{building['building']} Flat {flat_number}"
-        #         for energy_type in energy_types:
-        #             reading = EnergyReading(
-        #                 timestamp=current_time,
-        #                 building=flat_building_name,
-        #                 building_code=building.get("building_code", ""),
-        #                 zone=building.get("zone", ""),
-        #                 value=generate_reading(energy_type),
-        #                 category=energy_type
-        #             )
-        #             batch.append(reading)
-
-        current_time += interval
-
-        # Commit in batches to improve performance
-        if len(batch) >= 1000:
-            db.session.add_all(batch)
+    day = datetime.timedelta(days=1)
+    end_time = datetime.datetime.now().replace(second=0, microsecond=0)
+    start_time = end_time - days * day
+
+    # (month, timestamps, last chunk of its day): days are cut where a month starts
+    chunks = []
+    for first in (start_time + d * day for d in range(days)):
+        timestamps = [first + step * interval for step in range(day // interval)]
+        months = [month_start(moment) for moment in timestamps]
+        cut = months.index(months[-1])
+        if cut:
+            chunks.append((months[0], timestamps[:cut], False))
+        chunks.append((months[-1], timestamps[cut:], True))
+
+    rng = np.random.default_rng(seed)
+    written = day_rows = 0
+
+    def write(timestamps, day_ends, table=None):
+        nonlocal written, day_rows
+        rows = sum(
+            bulk_insert_reading_grid(timestamps, building_ids, energy_type,
+                                     generate_readings(energy_type, timestamps, len(sensors), rng), table=table)
+            for energy_type in energy_types
+        )
+        written += rows
+        day_rows += rows
+        if day_ends:
+            if progress:
+                progress(day_rows)
+            day_rows = 0
+
+    connection = db.session.connection()
+    existing = list_partitions(connection) if is_partitioned(connection) else None
+    for month, group in groupby(chunks, key=lambda chunk: chunk[0]):
+        group = [chunk[1:] for chunk in group]
+        if existing is not None and month not in existing:
+            create_partition(db.session.connection(), month,
+                             load=lambda table: [write(*chunk, table=table) for chunk in group])
+            db.session.commit()
+            continue
+        for chunk in group:
+            write(*chunk)
             db.session.commit()
-            batch.clear()
-
-    # Final commit for remaining data
-    if batch:
-        db.session.add_all(batch)
-        db.session.commit()
 
-    logger.info("Mock energy readings generated successfully.")
+    rebuild_rollups(start_time, end_time)  # Seeded readings bypass the ingest writer that maintains the rollups
+    db.session.commit()
+    logger.info(f"Mock energy readings generated successfully ({written} readings for {len(sensors)} sensors).")
+    return written
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1)
+
+
+# === Largest-Triangle-Three-Buckets ===
+def lttb(x, y, threshold):
+    """
+    Returns the indices of `threshold` points of the series (x, y) chosen by
+    Largest-Triangle-Three-Buckets downsampling, which keeps the visual shape
+    (peaks and troughs) of a line chart far better than every-nth sampling.
+
+    `x` must be numeric and ascending. The first and last points are always kept;
+    the rest are split into threshold - 2 buckets, and each bucket contributes the
+    point forming the largest triangle with the previously selected point and the
+    mean of the next bucket. Bucket means and triangle areas are computed with
+    NumPy; only the walk over buckets, where each pick depends on the last, is a
+    Python loop. Series already within `threshold` are returned whole.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket i covers [edges[i], edges[i + 1]) of the interior points 1 .. n - 2
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.intp) + 1
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+
+    # The third triangle vertex: the next bucket's mean, or the last point for the final bucket
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        areas = np.abs(
+            (x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+# === Helper: Downsample a Timestamped Series ===
+def downsample_series(timestamps, values, threshold):
+    """
+    Applies LTTB to parallel sequences of naive UTC datetimes and values; returns
+    (epoch seconds, values) NumPy arrays of the kept points.
+
+    Only the kept points are turned into chart labels or encoded afterwards, so
+    the cost of building the payload is bounded by `threshold` rather than by
+    the length of the range.
+    """
+    seconds = epoch_seconds(timestamps)
+    values = np.asarray(values, dtype=np.float64)
+
+    keep = lttb(seconds, values, threshold)
+    return seconds[keep].astype(np.int64), values[keep]
+
+
+def epoch_seconds(timestamps):
+    """
+    Converts naive UTC datetimes to float64 seconds since the epoch; far cheaper
+    than NumPy's own datetime64 conversion of datetime objects.
+    """
+    return np.fromiter(((timestamp - EPOCH).total_seconds() for timestamp in timestamps),
+                       dtype=np.float64, count=len(timestamps))
+
+
+def format_timestamps(seconds):
+    """Formats epoch seconds as 'YYYY-MM-DD HH:MM:SS' chart labels."""
+    times = np.asarray(seconds, dtype=np.int64).astype('datetime64[s]')
+    return np.char.replace(np.datetime_as_string(times, unit='s'), 'T', ' ').tolist()
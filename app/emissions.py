@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+from itertools import groupby
+from operator import itemgetter
+
+import numpy as np
+import sqlalchemy as sa
+
+from app import logger
+from app.extensions import db
+from app.models import ENERGY_CATEGORY_CODES, Building, EmissionFactor, EnergyRollupDaily
+from app.rollups import advance_watermark
+
+# === Default Factors ===
+# First factor version for a fresh database (also seeded by migration 0007);
+# later versions are added with `flask energy set-emission-factor`.
+DEFAULT_EMISSION_FACTORS = {
+    'electricity': 0.233,  # kg CO₂ per kWh
+    'gas': 0.184,
+}
+DEFAULT_VALID_FROM = date(1970, 1, 1)
+
+
+def seed_emission_factors(session=None):
+    """
+    Inserts the default factors when the emission_factors table is empty, e.g.
+    after create_all. Returns the number of factors inserted.
+    """
+    session = session or db.session
+    if session.scalar(sa.select(sa.func.count()).select_from(EmissionFactor)):
+        return 0
+
+    session.add_all([
+        EmissionFactor(category=category, valid_from=DEFAULT_VALID_FROM, kg_co2_per_kwh=factor, source='default')
+        for category, factor in DEFAULT_EMISSION_FACTORS.items()
+    ])
+    session.commit()
+    logger.info(f"Seeded {len(DEFAULT_EMISSION_FACTORS)} default emission factors.")
+    return len(DEFAULT_EMISSION_FACTORS)
+
+
+def set_emission_factor(category, kg_co2_per_kwh, valid_from, source='', session=None):
+    """
+    Publishes a factor version for `category` from `valid_from` on, replacing a
+    version with the same start date, and advances the ingest watermark so
+    cached CO₂ charts are recomputed. Committing is left to the caller.
+    """
+    session = session or db.session
+    factor = session.scalar(sa.select(EmissionFactor).where(
+        EmissionFactor.category == category, EmissionFactor.valid_from == valid_from
+    ))
+    if factor is None:
+        factor = EmissionFactor(category=category, valid_from=valid_from)
+        session.add(factor)
+    factor.kg_co2_per_kwh = kg_co2_per_kwh
+    factor.source = source
+    advance_watermark(session=session)
+    return factor
+
+
+# === Factor Lookup in SQL ===
+def factor_for(category, day):
+    """
+    Correlated subquery for the factor in force for `category` on `day`:
+    the version with the latest valid_from on or before that day.
+    """
+    return (
+        sa.select(EmissionFactor.kg_co2_per_kwh)
+        .where(EmissionFactor.category == category, EmissionFactor.valid_from <= day)
+        .order_by(EmissionFactor.valid_from.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def factor_table(days):
+    """
+    Returns the factor in force per category code and day as a (categories,
+    len(days)) array, NaN before a category's first version. For callers that
+    multiply usage they already read, rather than joining factors in SQL.
+    """
+    rows = db.session.execute(
+        sa.select(EmissionFactor.category, EmissionFactor.valid_from, EmissionFactor.kg_co2_per_kwh)
+        .order_by(EmissionFactor.category, EmissionFactor.valid_from)
+    ).all()
+
+    table = np.full((len(ENERGY_CATEGORY_CODES), len(days)), np.nan)
+    for category, versions in groupby(rows, key=itemgetter(0)):
+        _, valid_from, factors = zip(*versions)
+        version = np.searchsorted(np.array(valid_from, dtype='datetime64[D]'), days, side='right') - 1
+        table[ENERGY_CATEGORY_CODES[category]] = np.where(version >= 0, np.array(factors)[version], np.nan)
+    return table
+
+
+# === Daily Emissions ===
+def daily_emissions(buildings, energy_types, start, stop):
+    """
+    Returns (days, {building: kg CO₂ per day}) for the UTC days overlapping the
+    half-open [start, stop) range.
+
+    One grouped query over the daily rollups multiplies each day's usage by the
+    factor in force that day and sums the energy types per building and day.
+    The series are NumPy arrays aligned with the datetime64[D] `days` array;
+    days without readings are NaN. Categories with no factor version yet
+    contribute nothing.
+    """
+    first = start.date()
+    last = (stop - timedelta(microseconds=1)).date()
+    days = np.arange(np.datetime64(first), np.datetime64(last) + 1, dtype='datetime64[D]')
+    series = {building: np.full(len(days), np.nan) for building in buildings}
+    if not buildings or not energy_types or not len(days):
+        return days, series
+
+    daily = EnergyRollupDaily
+    rows = db.session.execute(
+        sa.select(Building.name, daily.bucket, sa.func.sum(daily.total * factor_for(daily.category, daily.bucket)))
+        .join(Building, Building.id == daily.building_id)
+        .where(
+            Building.name.in_(buildings),
+            daily.category.in_(energy_types),
+            daily.bucket >= first,
+            daily.bucket < stop
+        )
+        .group_by(Building.name, daily.bucket)
+    )
+
+    for building, bucket, kg in rows:
+        if kg is not None:
+            series[building][(bucket.date() - first).days] = kg
+    return days, series
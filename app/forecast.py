@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import sqlalchemy as sa
+
+from app.anomalies import HOURS_PER_WEEK, hour_of_week
+from app.buildings import get_registry
+from app.downsampling import EPOCH
+from app.extensions import db
+from app.models import ENERGY_CATEGORIES, ENERGY_CATEGORY_CODES, EnergyForecastModel, EnergyRollupHourly
+
+# === Smoothing Parameters ===
+PROFILE_ALPHA = 0.3     # Weight of the newest week in each hour-of-week slot of the profile
+LEVEL_BETA = 0.5        # Weight of the newest hour in the deviation level
+LEVEL_DAMPING = 0.85    # Share of the deviation level carried into each following hour
+FORECAST_HOURS = 24
+BAND_WIDTH = 2.0        # Standard deviations either side of the forecast
+
+HOUR = timedelta(hours=1)
+WEEK = timedelta(weeks=1)
+
+
+# === Fitted Models for All Buildings ===
+class ForecastModels:
+    """
+    Seasonal exponential smoothing models for every (building, category), held
+    as NumPy arrays indexed by registry id so a refit is vectorised across all
+    buildings at once:
+
+    - profile / variance: exponentially weighted mean and variance of the hourly
+      mean reading per hour-of-week slot, i.e. the expected-load baseline.
+    - level: exponentially smoothed deviation of recent hours from the profile,
+      damped towards zero over the forecast horizon.
+
+    `fitted_until` is the first hour not folded in yet, shared by all models.
+    """
+    def __init__(self, buildings, fitted_until=None):
+        shape = (buildings, len(ENERGY_CATEGORIES), HOURS_PER_WEEK)
+        self.profile = np.zeros(shape)
+        self.variance = np.zeros(shape)
+        self.observations = np.zeros(shape)
+        self.level = np.zeros(shape[:2])
+        self.fitted_until = fitted_until
+
+    @classmethod
+    def load(cls, buildings, session=None):
+        """Reads the stored models; buildings without one start empty."""
+        rows = (session or db.session).scalars(sa.select(EnergyForecastModel)).all()
+        models = cls(buildings, min((row.fitted_until for row in rows), default=None))
+        for row in rows:
+            if row.building_id < buildings:
+                code = ENERGY_CATEGORY_CODES[row.category]
+                state = _unpack_state(row.state)
+                models.profile[row.building_id, code] = state[0]
+                models.variance[row.building_id, code] = state[1]
+                models.observations[row.building_id, code] = state[2]
+                models.level[row.building_id, code] = row.level
+        return models
+
+    def save(self, session=None):
+        """
+        Replaces the stored models with every (building, category) that has seen
+        data. Returns the number of rows written; committing is left to the caller.
+        """
+        connection = (session or db.session).connection()
+        table = EnergyForecastModel.__table__
+        building_ids, codes = np.nonzero(self.observations.sum(axis=2))
+        rows = [
+            {
+                'building_id': int(building_id),
+                'category': ENERGY_CATEGORIES[code],
+                'fitted_until': self.fitted_until,
+                'level': float(self.level[building_id, code]),
+                'state': _pack_state(self.profile[building_id, code], self.variance[building_id, code],
+                                     self.observations[building_id, code]),
+            }
+            for building_id, code in zip(building_ids, codes)
+        ]
+        connection.execute(sa.delete(table))
+        if rows:
+            connection.execute(sa.insert(table), rows)
+        return len(rows)
+
+    def fold(self, start, hourly):
+        """
+        Folds hourly mean readings into the models. `hourly` has shape
+        (buildings, categories, hours) starting at `start`, NaN where a building
+        has no reading that hour. Loops over hours only; each step updates every
+        building and category together.
+        """
+        first_slot = hour_of_week([(start - EPOCH).total_seconds()])[0]
+        for hour in range(hourly.shape[2]):
+            slot = (first_slot + hour) % HOURS_PER_WEEK
+            values = hourly[:, :, hour]
+            seen = ~np.isnan(values)
+            if not seen.any():
+                continue
+
+            profile = self.profile[:, :, slot]
+            variance = self.variance[:, :, slot]
+            observations = self.observations[:, :, slot]
+            fresh = seen & (observations == 0)
+            learned = seen & ~fresh
+
+            error = values[learned] - profile[learned]
+            self.level[learned] = LEVEL_BETA * error + (1 - LEVEL_BETA) * self.level[learned]
+            variance[learned] = (1 - PROFILE_ALPHA) * (variance[learned] + PROFILE_ALPHA * error ** 2)
+            profile[learned] += PROFILE_ALPHA * error
+            profile[fresh] = values[fresh]
+            observations[seen] += 1
+
+        self.fitted_until = start + hourly.shape[2] * HOUR
+
+
+def _pack_state(profile, variance, observations):
+    return np.stack([profile, variance, observations]).astype('<f4').tobytes()
+
+
+def _unpack_state(state):
+    return np.frombuffer(state, dtype='<f4').reshape(3, HOURS_PER_WEEK).astype(np.float64)
+
+
+# === Incremental Refresh (Scheduled Job) ===
+def refresh_forecasts(history_weeks=8, now=None, session=None):
+    """
+    Folds the complete hours of hourly rollups since the last refresh into the
+    stored models of every registered building and flat, at most `history_weeks`
+    back. A week is read and folded at a time, so memory stays bounded on the
+    first fit. Returns the number of hours folded; committing is left to the caller.
+    """
+    session = session or db.session
+    buildings = len(get_registry().sensors_by_id())
+    end = (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+    models = ForecastModels.load(buildings, session)
+    start = max(models.fitted_until or end - history_weeks * WEEK, end - history_weeks * WEEK)
+    if start >= end:
+        return 0
+
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + WEEK, end)
+        models.fold(chunk_start, _hourly_matrix(buildings, chunk_start, chunk_end, session))
+        chunk_start = chunk_end
+    models.save(session)
+    return int((end - start) / HOUR)
+
+
+def _hourly_matrix(buildings, start, end, session):
+    """Reads the hourly rollups in [start, end) into a (buildings, categories, hours) array of hourly means."""
+    hours = int((end - start) / HOUR)
+    matrix = np.full((buildings, len(ENERGY_CATEGORIES), hours), np.nan)
+    rows = session.connection().execute(
+        sa.select(EnergyRollupHourly.building_id, sa.type_coerce(EnergyRollupHourly.category, sa.SmallInteger),
+                  EnergyRollupHourly.bucket, EnergyRollupHourly.total / EnergyRollupHourly.count)
+        .where(EnergyRollupHourly.bucket >= start, EnergyRollupHourly.bucket < end,
+               EnergyRollupHourly.building_id < buildings)
+    ).all()
+    if rows:
+        building_ids, codes, buckets, means = zip(*rows)
+        offsets = np.fromiter(((bucket - start) // HOUR for bucket in buckets), dtype=np.intp, count=len(rows))
+        matrix[np.array(building_ids), np.array(codes), offsets] = means
+    return matrix
+
+
+# === Forecast Lookup (Request Path) ===
+def building_forecast(building_id, now=None, hours=FORECAST_HOURS):
+    """
+    Returns (first hour, {category: {'baseline', 'forecast', 'lower', 'upper'}})
+    for the `hours` hours from the current one, each a NumPy array. Reads the
+    building's stored models only; nothing is refitted. Categories without a
+    model are left out, and hours of the week with no history yet are NaN.
+    """
+    start = (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+    rows = db.session.scalars(
+        sa.select(EnergyForecastModel).where(EnergyForecastModel.building_id == building_id)
+    ).all()
+
+    forecasts = {}
+    for row in rows:
+        profile, variance, observations = _unpack_state(row.state)
+        slots = hour_of_week((start - EPOCH).total_seconds() + 3600 * np.arange(hours))
+        steps = (start - row.fitted_until) / HOUR + 1 + np.arange(hours)
+        baseline = np.where(observations[slots] > 0, profile[slots], np.nan)  # NaN for hours never seen
+        forecast = baseline + row.level * LEVEL_DAMPING ** np.maximum(steps, 1)
+        spread = BAND_WIDTH * np.sqrt(variance[slots])
+        forecasts[row.category] = {
+            'baseline': baseline,
+            'forecast': forecast,
+            'lower': np.maximum(forecast - spread, 0),
+            'upper': forecast + spread,
+        }
+    return start, forecasts
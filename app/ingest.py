@@ -0,0 +1,504 @@
+import io
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app import logger
+from app.anomalies import insert_alerts
+from app.extensions import db
+from app.models import ENERGY_CATEGORY_CODES, EnergyReading
+from app.rollups import revise_rollups, update_rollups
+
+# === Bulk Row Layout ===
+# Decoded sensor readings travel through the ingest pipeline as plain tuples
+# in this column order instead of as EnergyReading ORM objects. `building_id`
+# is the BuildingRegistry id and `category` the name ('electricity' / 'gas').
+READING_COLUMNS = ('timestamp', 'building_id', 'category', 'value')
+
+# Natural key of a reading: one value per sensor, category and interval
+# (unique index ix_energy_readings_building_category_timestamp, migration 0012).
+READING_KEY = ('building_id', 'category', 'timestamp')
+ON_CONFLICT_ACTIONS = ('ignore', 'update')  # Keep the stored value, or take the redelivered one
+
+
+# === Bulk Insert Entry Point ===
+def bulk_insert_readings(rows, session=None):
+    """
+    Writes reading tuples (see READING_COLUMNS) in as few round trips as possible.
+
+    - PostgreSQL: streams the rows through `COPY ... FROM STDIN`.
+    - Other databases: executes one cached `INSERT` with many parameter sets.
+
+    The rows join the session's current transaction; committing is left to the caller.
+
+    Returns:
+        Number of rows written.
+    """
+    if not rows:
+        return 0
+
+    session = session or db.session
+    connection = session.connection()
+
+    if connection.dialect.name == 'postgresql':
+        _copy_readings(connection, rows)
+    else:
+        _insert_readings(connection, rows)
+
+    return len(rows)
+
+
+# === PostgreSQL: COPY FROM STDIN ===
+def _copy_readings(connection, rows, table=None):
+    """
+    Serialises rows to COPY text format and streams them over the session's own
+    DBAPI connection, so the COPY shares the surrounding transaction.
+    Category names are written as their smallint storage codes. `table`
+    redirects the COPY, e.g. to the upsert staging table.
+    """
+    buffer = io.StringIO()
+    for timestamp, building_id, category, value in rows:
+        buffer.write(
+            f"{_copy_field(timestamp)}\t{building_id}\t{ENERGY_CATEGORY_CODES[category]}\t{_copy_field(value)}\n"
+        )
+    buffer.seek(0)
+
+    table = table or EnergyReading.__table__.name
+    columns = ', '.join(READING_COLUMNS)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+
+def _copy_field(value):
+    """
+    Formats a single value for COPY text format (tab-delimited, backslash-escaped).
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, float):
+        return repr(value)
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+# === Other Databases: Multi-row INSERT ... VALUES ===
+def _insert_readings(connection, rows):
+    """
+    Inserts rows through a single cached INSERT statement executed with many
+    parameter sets; SQLAlchemy batches these into multi-row VALUES clauses
+    ("insertmanyvalues") or the driver's executemany, whichever the dialect supports.
+    """
+    table = EnergyReading.__table__
+    connection.execute(
+        sa.insert(table),
+        [dict(zip(READING_COLUMNS, row)) for row in rows]
+    )
+
+
+# === Idempotent Upsert on the Natural Key ===
+UpsertResult = namedtuple('UpsertResult', 'inserted updated replaced duplicates')
+
+# Per-connection PostgreSQL temp table the upsert COPYs into; emptied at every commit
+_STAGING_TABLE = 'energy_readings_staging'
+_STAGING = sa.table(
+    _STAGING_TABLE,
+    sa.column('timestamp', sa.DateTime), sa.column('building_id', sa.SmallInteger),
+    sa.column('category', sa.SmallInteger), sa.column('value', sa.REAL),
+)
+
+
+def upsert_readings(rows, on_conflict='ignore', session=None):
+    """
+    Writes reading tuples (see READING_COLUMNS) so that each (building, category,
+    timestamp) is stored once, however often it is delivered.
+
+    - 'ignore': readings whose key is already stored are dropped (MQTT
+      redelivery, simulator restarts, replayed imports).
+    - 'update': a stored reading takes the new value when it differs.
+
+    Within the batch the first (ignore) or last (update) reading of a key wins.
+    On PostgreSQL the rows are COPYed into a temp staging table and moved with
+    one INSERT ... SELECT ... ON CONFLICT; other databases look the batch's keys
+    up first.
+
+    Joins the session's current transaction; committing is left to the caller.
+    Returns an UpsertResult: the inserted and updated reading tuples, the stored
+    readings the updates replaced (in the same order, for
+    app.rollups.revise_rollups), and the number of readings dropped as
+    duplicates or unchanged.
+    """
+    if on_conflict not in ON_CONFLICT_ACTIONS:
+        raise ValueError(f"Unknown conflict action: {on_conflict!r} (expected one of {', '.join(ON_CONFLICT_ACTIONS)})")
+    if not rows:
+        return UpsertResult([], [], [], 0)
+
+    latest = {}
+    for row in rows:
+        key = (row[1], row[2], row[0])
+        if on_conflict == 'update' or key not in latest:
+            latest[key] = row
+    unique = list(latest.values())
+
+    connection = (session or db.session).connection()
+    if connection.dialect.name == 'postgresql':
+        inserted, updated, replaced = _upsert_staged(connection, unique, on_conflict)
+    else:
+        inserted, updated, replaced = _upsert_checked(connection, latest, on_conflict)
+    return UpsertResult(inserted, updated, replaced, len(rows) - len(inserted) - len(updated))
+
+
+def _upsert_staged(connection, rows, on_conflict):
+    """
+    PostgreSQL: COPY into the staging table, then one statement that snapshots
+    the stored readings for the staged keys and runs the INSERT ... ON CONFLICT.
+    Every part of a statement sees the same snapshot, so a returned row with a
+    stored value was updated and one without was inserted; xmax cannot tell
+    them apart, as partitioned tables do not expose system columns.
+    """
+    connection.execute(sa.text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {_STAGING_TABLE} "
+        f"(timestamp timestamp, building_id smallint, category smallint, value real) ON COMMIT DELETE ROWS"
+    ))
+    _copy_readings(connection, rows, table=_STAGING_TABLE)
+
+    table = EnergyReading.__table__
+    stored = (
+        sa.select(*(table.c[c] for c in READING_KEY), table.c.value)
+        .join_from(table, _STAGING, sa.and_(*(table.c[c] == _STAGING.c[c] for c in READING_KEY)))
+        .cte('stored')
+    )
+    insert = postgresql.insert(table).from_select(
+        READING_COLUMNS, sa.select(*(_STAGING.c[c] for c in READING_COLUMNS))
+    )
+    if on_conflict == 'ignore':
+        insert = insert.on_conflict_do_nothing(index_elements=READING_KEY)
+    else:
+        insert = insert.on_conflict_do_update(
+            index_elements=READING_KEY,
+            set_={'value': insert.excluded.value},
+            where=table.c.value.is_distinct_from(insert.excluded.value)
+        )
+    upserted = insert.returning(*(table.c[c] for c in READING_COLUMNS)).cte('upserted')
+    returned = connection.execute(
+        sa.select(*(upserted.c[c] for c in READING_COLUMNS), stored.c.value.label('stored_value'))
+        .outerjoin(stored, sa.and_(*(upserted.c[c] == stored.c[c] for c in READING_KEY)))
+    ).all()
+    connection.execute(sa.text(f"TRUNCATE {_STAGING_TABLE}"))  # Another upsert may follow in this transaction
+
+    inserted, updated, replaced = [], [], []
+    for *row, stored_value in returned:
+        if stored_value is None:
+            inserted.append(tuple(row))
+        else:
+            updated.append(tuple(row))
+            replaced.append((*row[:3], stored_value))
+    return inserted, updated, replaced
+
+
+def _upsert_checked(connection, latest, on_conflict):
+    """Other databases: fetch the stored readings for the batch's keys, then insert or update the rest."""
+    table = EnergyReading.__table__
+    timestamps = [key[2] for key in latest]
+    stored = {
+        (building_id, category, timestamp): (reading_id, value)
+        for reading_id, building_id, category, timestamp, value in connection.execute(
+            sa.select(table.c.id, *(table.c[c] for c in READING_KEY), table.c.value).where(
+                table.c.timestamp.between(min(timestamps), max(timestamps)),
+                table.c.building_id.in_({key[0] for key in latest})
+            )
+        )
+    }
+
+    inserted = [row for key, row in latest.items() if key not in stored]
+    updated = [row for key, row in latest.items()
+               if on_conflict == 'update' and key in stored and stored[key][1] != row[3]]
+    if inserted:
+        _insert_readings(connection, inserted)
+    if updated:
+        connection.execute(
+            sa.update(table).where(table.c.id == sa.bindparam('reading_id')).values(value=sa.bindparam('new_value')),
+            [{'reading_id': stored[(row[1], row[2], row[0])][0], 'new_value': row[3]} for row in updated]
+        )
+    replaced = [(*row[:3], stored[(row[1], row[2], row[0])][1]) for row in updated]
+    return inserted, updated, replaced
+
+
+# === Bulk Insert of Generated Reading Grids ===
+# PostgreSQL binary COPY: a fixed header, then per row a field count and each
+# field as <int32 length><big-endian value>; timestamps are microseconds since 2000-01-01.
+_COPY_BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + (0).to_bytes(4, 'big') + (0).to_bytes(4, 'big')
+_COPY_BINARY_TRAILER = (-1).to_bytes(2, 'big', signed=True)
+_COPY_BINARY_ROW = np.dtype([
+    ('fields', '>i2'),
+    ('timestamp_length', '>i4'), ('timestamp', '>i8'),
+    ('building_id_length', '>i4'), ('building_id', '>i2'),
+    ('category_length', '>i4'), ('category', '>i2'),
+    ('value_length', '>i4'), ('value', '>f4'),
+])
+_PG_EPOCH_US = np.datetime64('2000-01-01T00:00:00', 'us').astype(np.int64)
+
+
+def bulk_insert_reading_grid(timestamps, building_ids, category, values, session=None, table=None):
+    """
+    Writes one category's readings for every pair of `timestamps` (naive UTC
+    datetimes) and `building_ids`, with `values` shaped (timestamps, buildings);
+    for seeding and load tests that generate readings as arrays, not tuples.
+
+    - PostgreSQL: one binary COPY whose rows are laid out by NumPy, with no
+      per-row Python work. `table` redirects it to a partition being loaded
+      before it is attached (see app.partitions.create_partition).
+    - Other databases: expands the grid into tuples for bulk_insert_readings.
+
+    Joins the session's current transaction; committing is left to the caller.
+    Returns the number of rows written.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    session = session or db.session
+    connection = session.connection()
+    if connection.dialect.name != 'postgresql':
+        ids = np.asarray(building_ids).tolist()  # Plain ints; SQLite stores NumPy integers as blobs
+        return bulk_insert_readings([
+            (timestamp, building_id, category, value)
+            for timestamp, row in zip(timestamps, values.tolist()) for building_id, value in zip(ids, row)
+        ], session)
+
+    sensors = len(building_ids)
+    rows = np.empty(values.size, dtype=_COPY_BINARY_ROW)
+    rows['fields'] = len(READING_COLUMNS)
+    rows['timestamp_length'], rows['building_id_length'], rows['category_length'], rows['value_length'] = 8, 2, 2, 4
+    rows['timestamp'] = np.repeat(np.asarray(timestamps, dtype='datetime64[us]').astype(np.int64) - _PG_EPOCH_US,
+                                  sensors)
+    rows['building_id'] = np.tile(np.asarray(building_ids), len(timestamps))
+    rows['category'] = ENERGY_CATEGORY_CODES[category]
+    rows['value'] = values.ravel()
+
+    buffer = io.BytesIO(_COPY_BINARY_HEADER + rows.tobytes() + _COPY_BINARY_TRAILER)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table or EnergyReading.__table__.name} ({', '.join(READING_COLUMNS)}) FROM STDIN WITH (FORMAT binary)",
+            buffer
+        )
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+# === Background Writer with Bounded Queue ===
+class IngestWriter:
+    """
+    Owns the ingest buffer and the only thread that writes sensor readings.
+
+    Producers (e.g. the MQTT network thread) call `submit()`; a dedicated writer
+    thread drains the bounded queue and flushes a batch when either
+    `batch_size` rows are waiting or the oldest waiting row is `max_latency`
+    seconds old, whichever comes first.
+
+    When the database falls behind the queue fills up and `submit()` blocks,
+    pushing the backpressure onto the producer instead of growing memory.
+
+    An optional `detector` (app.anomalies.AnomalyDetector) scores each batch on
+    the writer thread; its alerts are committed together with the readings.
+
+    Batches are written with upsert_readings, so redelivered readings are dropped
+    (`on_conflict='ignore'`) or overwrite the stored value ('update') and are
+    counted in the `rows_duplicate` / `rows_updated` metrics.
+    """
+
+    _FLUSH = object()  # Sentinel: write whatever is buffered now
+    _STOP = object()   # Sentinel: drain, write and exit
+
+    def __init__(self, app, batch_size=200, max_latency=5.0, max_queue=10000, timing_window=500, detector=None,
+                 on_conflict='ignore'):
+        if on_conflict not in ON_CONFLICT_ACTIONS:
+            raise ValueError(f"Unknown conflict action: {on_conflict!r}")
+        self.app = app
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.detector = detector
+        self.on_conflict = on_conflict
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.rows_written = 0
+        self.rows_updated = 0
+        self.rows_duplicate = 0
+        self.rows_failed = 0
+        self.batches_written = 0
+        self.backpressure_waits = 0
+        self.alerts_raised = 0
+        self.flush_timings = deque(maxlen=timing_window)  # Seconds per flush, most recent last
+
+    # --- Lifecycle ---
+    def start(self):
+        """Starts the writer thread and returns the writer for chaining."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='ingest-writer', daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, timeout=None):
+        """Writes everything still queued and stops the writer thread."""
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    # --- Producer API ---
+    def submit(self, row, timeout=None):
+        """
+        Queues one reading tuple. Blocks while the queue is full (backpressure);
+        raises queue.Full if `timeout` elapses first.
+        """
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.backpressure_waits += 1
+            self._queue.put(row, timeout=timeout)
+
+    def submit_many(self, rows, timeout=None):
+        """Queues several reading tuples, e.g. one decoded batched message."""
+        for row in rows:
+            self.submit(row, timeout=timeout)
+
+    def flush(self, timeout=None):
+        """
+        Asks the writer thread to write its partial batch and waits until it has.
+        Returns False if the writer did not finish within `timeout`.
+        """
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((self._FLUSH, done))
+        return done.wait(timeout)
+
+    # --- Metrics ---
+    @property
+    def queue_depth(self):
+        """Number of items waiting to be written."""
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        Returns a snapshot of queue depth, throughput counters and flush timings (ms).
+        """
+        with self._lock:
+            recent = list(self.flush_timings)
+            snapshot = {
+                'queue_depth': self.queue_depth,
+                'queue_capacity': self._queue.maxsize,
+                'rows_written': self.rows_written,
+                'rows_updated': self.rows_updated,
+                'rows_duplicate': self.rows_duplicate,
+                'rows_failed': self.rows_failed,
+                'batches_written': self.batches_written,
+                'backpressure_waits': self.backpressure_waits,
+                'alerts_raised': self.alerts_raised,
+            }
+
+        if recent:
+            timings = sorted(recent)
+            snapshot.update({
+                'flush_ms_last': round(recent[-1] * 1000, 2),
+                'flush_ms_mean': round(sum(timings) / len(timings) * 1000, 2),
+                'flush_ms_p95': round(timings[int(0.95 * (len(timings) - 1))] * 1000, 2),
+                'flush_ms_max': round(timings[-1] * 1000, 2),
+            })
+        return snapshot
+
+    # --- Writer Thread ---
+    def _run(self):
+        """
+        Collects rows until the batch is full or its deadline passes, then writes it.
+        """
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None  # Latency deadline reached
+
+            if item is self._STOP:
+                self._write(batch)
+                return
+
+            if isinstance(item, tuple) and item and item[0] is self._FLUSH:
+                self._write(batch)
+                batch, deadline = [], None
+                item[1].set()
+                continue
+
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.max_latency
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch, deadline = [], None
+
+    def _write(self, batch):
+        """
+        Upserts one batch, folds the new readings into the hourly/daily rollups,
+        applies updated ones with revise_rollups, writes any anomaly alerts and
+        commits them together, recording how long it took. The detector learns the
+        new readings only once they are committed. A failed batch is rolled back
+        and logged; the writer keeps running.
+        """
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        with self.app.app_context():
+            try:
+                result = upsert_readings(batch, self.on_conflict)
+                alerts, learned = self.detector.score(result.inserted) if self.detector is not None else ([], None)
+                update_rollups(result.inserted)
+                revise_rollups(result.replaced, result.updated)
+                insert_alerts(alerts)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                with self._lock:
+                    self.rows_failed += len(batch)
+                logger.error(f"Failed to write {len(batch)} readings: {e}")
+                return
+            finally:
+                db.session.remove()
+
+        if learned is not None:
+            self.detector.apply(learned)
+
+        elapsed = time.perf_counter() - started
+        written = len(result.inserted) + len(result.updated)
+        with self._lock:
+            self.rows_written += written
+            self.rows_updated += len(result.updated)
+            self.rows_duplicate += result.duplicates
+            self.batches_written += 1
+            self.alerts_raised += len(alerts)
+            self.flush_timings.append(elapsed)
+        logger.debug(f"Committed {written} readings ({result.duplicates} duplicates dropped) in "
+                     f"{elapsed * 1000:.1f} ms (queue depth {self.queue_depth}).")
@@ -0,0 +1,155 @@
+import multiprocessing
+import signal
+from collections import namedtuple
+
+import numpy as np
+
+from app import logger
+from app.buildings import adopt_building_ids, get_registry, sync_buildings
+from app.iot_simulator import (PUBLISH_INTERVAL, TOPIC_ELECTRICITY, TOPIC_GAS, batch_topic, connect_mqtt,
+                               publish_sensor_data, start_ingest)
+
+# === Sharding ===
+# 'zone': whole publish groups (campus zones, accommodation buildings) per worker,
+# so each worker subscribes only to its groups' batch topics.
+# 'building': buildings and flats spread evenly by id; every worker receives
+# every batch and keeps its own readings.
+SHARD_KEYS = ('zone', 'building')
+
+# One worker's share: the building ids it ingests and the topics it subscribes to
+Shard = namedtuple('Shard', 'building_ids topics')
+
+SHUTDOWN_TIMEOUT = 30  # Seconds a process gets to drain its buffered readings before it is terminated
+
+
+def plan_shards(sensors, workers, shard_by='zone'):
+    """
+    Splits registry sensors into `workers` disjoint shards. Every worker runs this
+    on the same registry, so they agree on the split without coordinating.
+
+    Zone shards hand out publish groups largest first, each to the worker with
+    the fewest sensors so far. JSON readings share two topics whatever the
+    shard, so every worker subscribes to those and drops other buildings' readings.
+    """
+    if shard_by not in SHARD_KEYS:
+        raise ValueError(f"Unknown shard key: {shard_by!r} (expected one of {', '.join(SHARD_KEYS)})")
+
+    if shard_by == 'building':
+        return [
+            Shard({sensor.id for sensor in sensors if sensor.id % workers == worker},
+                  (TOPIC_ELECTRICITY, TOPIC_GAS, batch_topic('+', '+')))
+            for worker in range(workers)
+        ]
+
+    groups = {}
+    for sensor in sensors:
+        groups.setdefault(sensor.group, []).append(sensor.id)
+
+    ids = [set() for _ in range(workers)]
+    topics = [[TOPIC_ELECTRICITY, TOPIC_GAS] for _ in range(workers)]
+    for group, group_ids in sorted(groups.items(), key=lambda item: (-len(item[1]), item[0])):
+        worker = min(range(workers), key=lambda index: (len(ids[index]), index))
+        ids[worker].update(group_ids)
+        topics[worker].append(batch_topic('+', group))
+    return [Shard(worker_ids, tuple(worker_topics)) for worker_ids, worker_topics in zip(ids, topics)]
+
+
+# === Worker Processes ===
+def _create_worker_app(config):
+    """Builds the app inside a child process, without the web process's scheduler."""
+    from app import create_app
+    return create_app(test_config={**config, 'SCHEDULER_ENABLED': 'false', 'SCHEDULER_TEST_NOW': 'false'})
+
+
+def run_ingest_worker(index, workers, shard_by, config, stop):
+    """
+    Ingests one shard from the MQTT broker until `stop` is set, then disconnects
+    and writes everything its IngestWriter still holds before exiting.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C reaches the whole process group; the parent sets `stop`
+    app = _create_worker_app(config)
+    with app.app_context():
+        adopt_building_ids()  # run_service registered the buildings before starting the workers
+        shard = plan_shards(get_registry().sensors(), workers, shard_by)[index]
+
+    client = connect_mqtt()
+    writer = start_ingest(app, client, topics=shard.topics, shard=shard.building_ids)
+    logger.info(f"Ingest worker {index} started for {len(shard.building_ids)} sensors.")
+
+    stop.wait()
+    client.disconnect()
+    client.loop_stop()
+    writer.close()
+    logger.info(f"Ingest worker {index} stopped: {writer.stats()}")
+
+
+def run_simulator(config, stop):
+    """Publishes simulated readings to the MQTT broker every PUBLISH_INTERVAL seconds until `stop` is set."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    app = _create_worker_app(config)
+    with app.app_context():
+        adopt_building_ids()  # Publish with the same ids the workers ingest with
+
+    client = connect_mqtt()
+    client.loop_start()
+    rng = np.random.default_rng(app.config.get('IOT_SIMULATOR_SEED'))
+    while not stop.is_set():
+        publish_sensor_data(client, mode=app.config.get('IOT_PAYLOAD_MODE', 'batch'), seed=rng)
+        stop.wait(PUBLISH_INTERVAL)
+    client.disconnect()
+    client.loop_stop()
+
+
+# === Supervisor ===
+def run_service(app, workers, shard_by='zone', simulate=False, shutdown_timeout=SHUTDOWN_TIMEOUT):
+    """
+    Runs `workers` ingest processes (plus a simulator process when `simulate`)
+    until SIGINT / SIGTERM or until one of them dies, then stops them all.
+
+    The buildings table is synced with the registry first, so every process
+    reads the same ids. Processes are spawned rather than forked, so none
+    inherits the parent's database connections. Each one builds its own app from `app`'s database,
+    IoT and energy settings, and only connects to the MQTT broker; the
+    in-process transport cannot cross processes.
+    Returns the processes' exit codes.
+    """
+    with app.app_context():
+        sync_buildings()  # Once, here: workers only read the ids, rather than race to insert the same buildings
+
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+    config = {key: value for key, value in app.config.items() if key.startswith(('SQLALCHEMY_', 'IOT_', 'ENERGY_'))}
+
+    processes = [
+        context.Process(target=run_ingest_worker, args=(index, workers, shard_by, config, stop),
+                        name=f'ingest-worker-{index}')
+        for index in range(workers)
+    ]
+    if simulate:
+        processes.append(context.Process(target=run_simulator, args=(config, stop), name='iot-simulator'))
+
+    handlers = {sig: signal.signal(sig, lambda signum, frame: stop.set()) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        for process in processes:
+            process.start()
+        logger.info(f"IoT service started: {workers} ingest workers sharded by {shard_by}"
+                    + (", with the simulator." if simulate else "."))
+
+        while not stop.wait(1):
+            exited = [process for process in processes if not process.is_alive()]
+            if exited:
+                logger.error(f"{exited[0].name} exited with code {exited[0].exitcode}; stopping the IoT service.")
+                break
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(shutdown_timeout)
+            if process.is_alive():
+                logger.warning(f"{process.name} did not drain within {shutdown_timeout}s; terminating it.")
+                process.terminate()
+                process.join()
+        for sig, handler in handlers.items():
+            signal.signal(sig, handler)
+
+    logger.info("IoT service stopped.")
+    return [process.exitcode for process in processes]
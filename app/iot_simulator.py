@@ -1,96 +1,148 @@
 import json
-import os
-import random
-import time
 from datetime import datetime, timezone
 
+import numpy as np
 import paho.mqtt.client as mqtt
 
 from app import logger
-from app.extensions import db
-from app.models import EnergyReading
+from app.anomalies import AnomalyDetector
+from app.buildings import get_registry
+from app.ingest import IngestWriter
+from app.sensor_payload import decode_batch, encode_batch
+from app.transport import TRANSPORTS, InProcessTransport
 
 # === MQTT CONFIGURATION ===
 BROKER = 'localhost'                    # MQTT broker address
 PORT = 1883                             # Default MQTT port
 TOPIC_ELECTRICITY = 'uob/electricity'  # Topic for electricity readings
 TOPIC_GAS = 'uob/gas'                  # Topic for gas readings
+TOPIC_BATCH = 'uob/batch'              # Prefix for batched readings: uob/batch/<category>/<group>
 PUBLISH_INTERVAL = 300                 # Publish every 5 minutes
 BATCH_SIZE = 200                       # Commit readings to DB in batches of 200
-
-# Temporary storage for sensor readings before batch commit
-readings_to_add = []
-
-# Path to current directory
-basedir = os.path.abspath(os.path.dirname(__file__))
+SENSOR_TOPICS = (TOPIC_ELECTRICITY, TOPIC_GAS, f"{TOPIC_BATCH}/#")  # Everything the ingest side subscribes to
 
 
 # === MQTT CONNECTION FUNCTION ===
-def connect_mqtt():
-    """Connects to the MQTT broker and returns the client object."""
-    client = mqtt.Client()
+def connect_mqtt(transport='mqtt'):
+    """
+    Connects to the MQTT broker and returns the client object. With
+    transport='inprocess' the client is an app.transport.InProcessTransport,
+    which needs no broker.
+    """
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown IoT transport: {transport!r} (expected one of {', '.join(TRANSPORTS)})")
+    client = InProcessTransport() if transport == 'inprocess' else mqtt.Client()
     client.connect(BROKER, PORT)
     return client
 
 
 # === SENSOR DATA SIMULATION ===
-def generate_reading(sensor_type):
+# Per energy type: reading range in office hours, range at other times, and the weekend scale
+READING_PROFILES = {
+    'electricity': ((300, 600), (50, 200), 0.6),
+    'gas': ((20, 50), (5, 20), 0.5),
+}
+OFFICE_HOURS = (8, 18)  # Local hours [start, end)
+
+
+def generate_readings(sensor_type, timestamps, sensor_count, seed=None):
     """
-    Simulate realistic energy readings for electricity or gas
-    depending on time of day and weekday/weekend.
+    Simulate realistic energy readings for `sensor_count` sensors at every
+    local time in `timestamps` (datetimes or datetime64) in one call.
+
+    Returns a (len(timestamps), sensor_count) array rounded to 2 decimals. Each
+    row uses the office-hours or off-hours range for its own time of day and is
+    scaled down at weekends. `seed` makes the readings reproducible: an int, or
+    a NumPy Generator to carry on from across calls.
     """
-    now = datetime.now()
-    hour = now.hour
-    weekday = now.weekday()
+    rng = np.random.default_rng(seed)
+    times = np.asarray(timestamps, dtype='datetime64[m]')
+    days = times.astype('datetime64[D]')
+    hours = (times - days).astype('timedelta64[h]').astype(np.int64)
+    weekend = (days.astype(np.int64) + 3) % 7 >= 5  # Day 0 (1970-01-01) was a Thursday
+
+    office_range, other_range, weekend_scale = READING_PROFILES[sensor_type]
+    office = (hours >= OFFICE_HOURS[0]) & (hours < OFFICE_HOURS[1])
+    low = np.where(office, office_range[0], other_range[0])
+    high = np.where(office, office_range[1], other_range[1])
+
+    values = rng.uniform(low[:, None], high[:, None], size=(len(times), sensor_count))
+    values *= np.where(weekend, weekend_scale, 1.0)[:, None]
+    return values.round(2)
 
-    if sensor_type == 'electricity':
-        base = random.uniform(300, 600) if 8 <= hour < 18 else random.uniform(50, 200)
-        if weekday >= 5:  # Weekend
-            base *= 0.6
-    elif sensor_type == 'gas':
-        base = random.uniform(20, 50) if 8 <= hour < 18 else random.uniform(5, 20)
-        if weekday >= 5:
-            base *= 0.5
 
-    return round(base, 2)
+def generate_reading(sensor_type, seed=None):
+    """Simulate one reading at the current time, for the per-sensor JSON messages."""
+    return float(generate_readings(sensor_type, [datetime.now()], 1, seed)[0, 0])
 
 
 # === PUBLISH SENSOR DATA TO MQTT TOPICS ===
-def publish_sensor_data(client):
-    """
-    Loads buildings data and publishes simulated sensor readings
-    for both university and accommodation buildings.
-    """
-    file_path = os.path.join(basedir, 'static', 'buildings_data.json')
-    try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-            university_buildings = data.get('university_buildings', [])
-            accommodation_buildings = data.get('accommodation_buildings', [])
-    except FileNotFoundError:
-        logger.error(f"File not found: {file_path}")
-        university_buildings = []
-        accommodation_buildings = []
+def publish_sensor_data(client, mode='batch', seed=None):
+    """
+    Publishes simulated sensor readings for both university and accommodation buildings.
+
+    Modes:
+    - 'batch': one compact binary message per publish group and energy type (default).
+    - 'json': one JSON message per building or flat and energy type (fallback).
+
+    `seed` (an int or NumPy Generator) makes the published values reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    if mode == 'batch':
+        publish_batches(client, rng)
+        return
+
+    registry = get_registry()
+    university_buildings = registry.university_buildings
+    accommodation_buildings = registry.accommodation_buildings
 
     # Publish data for university buildings
     for building in university_buildings:
-        publish_data(client, building, 'electricity', None)
-        publish_data(client, building, 'gas', None)
+        publish_data(client, building, 'electricity', None, rng)
+        publish_data(client, building, 'gas', None, rng)
 
     # Publish data for each flat in accommodation buildings
     for building in accommodation_buildings:
         total_flats = building.get('total_flats', 0)
         for flat_number in range(1, total_flats + 1):
             flat_building_name = f"{building['building']} Flat {flat_number}"
-            publish_data(client, building, 'electricity', flat_building_name)
-            publish_data(client, building, 'gas', flat_building_name)
+            publish_data(client, building, 'electricity', flat_building_name, rng)
+            publish_data(client, building, 'gas', flat_building_name, rng)
+
+
+# === PUBLISH ONE BATCHED MESSAGE PER GROUP AND ENERGY TYPE ===
+def publish_batches(client, seed=None):
+    """
+    Publish every sensor's reading grouped by zone / accommodation building.
+    Each energy type's readings for all sensors are generated in one call.
+    """
+    timestamp = datetime.now(timezone.utc)
+    sensors = get_registry().sensors()
+    groups = {}
+    for index, sensor in enumerate(sensors):
+        groups.setdefault(sensor.group, []).append(index)
+
+    rng = np.random.default_rng(seed)
+    sensor_ids = np.array([sensor.id for sensor in sensors])
+    for sensor_type in ('electricity', 'gas'):
+        values = generate_readings(sensor_type, [datetime.now()], len(sensors), rng)[0]
+        for group, indexes in groups.items():
+            payload = encode_batch(sensor_type, timestamp, sensor_ids[indexes].tolist(), values[indexes].tolist())
+            client.publish(batch_topic(sensor_type, group), payload)
+
+    logger.info(f"Published batched data for {len(sensors)} sensors in {len(groups)} groups.")
+
+
+def batch_topic(sensor_type, group):
+    """Builds the MQTT topic for a group's batch, e.g. uob/batch/electricity/red."""
+    return f"{TOPIC_BATCH}/{sensor_type}/{group.lower().replace(' ', '-')}"
 
 
 # === BUILD AND PUBLISH A SINGLE MESSAGE ===
-def publish_data(client, building, sensor_type, flat_number):
+def publish_data(client, building, sensor_type, flat_number, seed=None):
     """Publish a single sensor reading for a building or flat."""
     timestamp = datetime.now(timezone.utc).isoformat()
-    value = generate_reading(sensor_type)
+    value = generate_reading(sensor_type, seed)
 
     if building.get('is_accommodation'):
         zone = ''
@@ -119,78 +171,101 @@ def create_payload(building, building_name, value, timestamp, zone=""):
 
 
 # === MQTT CALLBACK: ON CONNECT ===
-def on_connect(client, userdata, flags, rc):
-    """Called when client connects to the broker."""
+def on_connect(client, userdata, flags, rc, topics=SENSOR_TOPICS):
+    """Called when client connects to the broker. Subscribes to `topics` (default: every sensor topic)."""
     logger.info(f"Connected to MQTT broker with result code {rc}")
-    client.subscribe(TOPIC_ELECTRICITY)
-    client.subscribe(TOPIC_GAS)
+    for topic in topics:
+        client.subscribe(topic)
 
 
 # === MQTT CALLBACK: ON MESSAGE RECEIVED ===
-def on_message(client, userdata, msg, app):
+def on_message(client, userdata, msg, writer, shard=None):
     """
-    Called when a message is received. Parses and stores it in DB batch.
+    Called when a message is received. Parses it and hands it to the ingest writer,
+    which batches and commits readings on its own thread. With `shard` (a set of
+    building ids, see app.ingest_service) readings for other buildings are skipped.
     """
-    payload = json.loads(msg.payload)
-    timestamp = payload['timestamp']
-    building = payload['building']
-    building_code = payload['building_code']
-    zone = payload['zone']
-    value = payload['value']
-    category = 'electricity' if msg.topic == TOPIC_ELECTRICITY else 'gas'
-
-    reading = EnergyReading(
-        timestamp=datetime.fromisoformat(timestamp.replace("Z", "+00:00")),
-        building=building,
-        building_code=building_code,
-        zone=zone,
-        value=value,
-        category=category
-    )
-
-    # Add to batch
-    readings_to_add.append(reading)
+    if msg.topic.startswith(TOPIC_BATCH):
+        rows = decode_batch_message(msg)
+        if shard is not None:
+            rows = [row for row in rows if row[1] in shard]
+        writer.submit_many(rows)
+    else:
+        reading = decode_message(msg)
+        if reading is not None and (shard is None or reading[1] in shard):
+            writer.submit(reading)
 
-    # Commit if batch limit reached
-    if len(readings_to_add) >= BATCH_SIZE:
-        with app.app_context():
-            db.session.add_all(readings_to_add)
-            db.session.commit()
-            logger.debug(f"Committed {BATCH_SIZE} readings to the database.")
-            readings_to_add.clear()
 
+# === DECODE A SINGLE JSON MESSAGE INTO A READING TUPLE ===
+def decode_message(msg):
+    """
+    Converts a JSON sensor message into a plain reading tuple.
+    Timestamps are normalised to naive UTC to match the DateTime column, and the
+    building name is resolved to its registry id. Unknown buildings are dropped.
+    """
+    payload = json.loads(msg.payload)
+    building_id = get_registry().id_for(payload['building'])
+    if building_id is None:
+        logger.warning(f"Dropping reading for unknown building: {payload['building']}")
+        return None
+
+    timestamp = datetime.fromisoformat(payload['timestamp'].replace("Z", "+00:00"))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    category = 'electricity' if msg.topic == TOPIC_ELECTRICITY else 'gas'
 
-# === FINAL COMMIT FOR LEFTOVER READINGS ===
-def commit_remaining_readings(app):
-    """Commit any remaining readings in the batch list."""
-    with app.app_context():
-        if readings_to_add:
-            db.session.add_all(readings_to_add)
-            db.session.commit()
-            logger.debug(f"Committed remaining {len(readings_to_add)} readings to the database.")
-            readings_to_add.clear()
+    return timestamp, building_id, category, float(payload['value'])
 
 
-# === BACKGROUND THREAD TO RUN SIMULATION ===
-def simulator_thread(app):
+# === DECODE A BATCHED BINARY MESSAGE INTO READING TUPLES ===
+def decode_batch_message(msg):
+    """
+    Converts a batched binary message into reading tuples in one call.
+    Sensor ids are registry ids, so they are stored as building ids directly.
+    Values are rounded back to the 2 decimal places they were published with.
+    """
+    category, timestamp, sensor_ids, values = decode_batch(msg.payload)
+    sensors = get_registry().sensors_by_id()
+    known = len(sensors)
+
+    rows = [
+        (timestamp, sensor_id, category, round(value, 2))
+        for sensor_id, value in zip(sensor_ids, values)
+        if sensor_id < known and sensors[sensor_id] is not None
+    ]
+    if len(rows) < len(sensor_ids):
+        logger.warning(f"Dropped {len(sensor_ids) - len(rows)} readings with unknown sensor ids from {msg.topic}.")
+    return rows
+
+
+# === WIRE A CLIENT TO THE INGEST WRITER ===
+def start_ingest(app, client, batch_size=BATCH_SIZE, timing_window=500, topics=SENSOR_TOPICS, shard=None):
     """
-    Launches MQTT client in a background thread:
-    - Listens to messages
-    - Publishes simulated data at intervals
+    Subscribes `client` (paho or in-process) to `topics` and starts its network
+    loop, handing every message to on_message and a new IngestWriter; `shard`
+    limits ingest to a set of building ids (see app.ingest_service). Registry ids
+    must already match the buildings table (app.buildings.sync_buildings).
+    Returns the started writer; close it after stopping the client's loop.
     """
-    logger.info("Background thread started.")
-    client = connect_mqtt()
+    # Dedicated writer thread batching readings into the database and scoring them for anomalies
+    writer = IngestWriter(
+        app,
+        batch_size=batch_size,
+        max_latency=app.config.get('IOT_INGEST_MAX_LATENCY', 5.0),
+        max_queue=app.config.get('IOT_INGEST_QUEUE_SIZE', 10000),
+        timing_window=timing_window,
+        on_conflict=app.config.get('IOT_INGEST_ON_CONFLICT', 'ignore'),
+        detector=AnomalyDetector(
+            threshold=app.config.get('ENERGY_ANOMALY_THRESHOLD', 4.0),
+            min_samples=app.config.get('ENERGY_ANOMALY_MIN_SAMPLES', 12)
+        )
+    ).start()
 
     # Set MQTT event handlers
-    client.on_connect = on_connect
-    client.on_message = lambda c, u, m: on_message(c, u, m, app)  # Capture Flask app context
+    client.on_connect = lambda c, u, flags, rc: on_connect(c, u, flags, rc, topics)
+    client.on_message = lambda c, u, m: on_message(c, u, m, writer, shard)  # Capture the ingest writer
 
     # Start MQTT loop (non-blocking)
     client.loop_start()
+    return writer
 
-    # Repeatedly publish data and commit remaining readings
-    while True:
-        publish_sensor_data(client)
-        logger.info(f"Waiting {PUBLISH_INTERVAL} seconds for next publish...")
-        time.sleep(PUBLISH_INTERVAL)
-        commit_remaining_readings(app)
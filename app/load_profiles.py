@@ -0,0 +1,149 @@
+import math
+from datetime import timedelta
+
+import numpy as np
+import sqlalchemy as sa
+
+from app.extensions import db
+from app.models import (ENERGY_CATEGORIES, ENERGY_CATEGORY_CODES, EnergyLoadHistogram, EnergyRollupDaily,
+                        EnergyRollupHourly)
+
+# === Load Histogram Sketch ===
+# Readings are counted per day in logarithmic bins: bin k holds values in
+# (GAMMA^(k-1), GAMMA^k], so every bin's representative value is within
+# RELATIVE_ACCURACY of the readings it holds, whatever the building's scale.
+# Days merge by adding counts per bin. Readings of zero or less share ZERO_BIN.
+RELATIVE_ACCURACY = 0.05
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+ZERO_BIN = -32768
+MAX_BIN = 32767
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def sketch_bins(values):
+    """Returns the histogram bin of each reading value, as an int64 array."""
+    values = np.asarray(values, dtype=np.float64)
+    bins = np.full(len(values), ZERO_BIN, dtype=np.int64)
+    positive = values > 0
+    bins[positive] = np.clip(np.ceil(np.log(values[positive]) / LOG_GAMMA), ZERO_BIN + 1, MAX_BIN)
+    return bins
+
+
+def sketch_bin_expression(value):
+    """SQL equivalent of sketch_bins for a reading value column; needs ln() and ceil(), e.g. PostgreSQL."""
+    log_bin = sa.func.ceil(sa.func.ln(sa.cast(value, sa.Float)) / LOG_GAMMA)
+    return sa.case(
+        (value > 0, sa.cast(sa.func.least(sa.func.greatest(log_bin, ZERO_BIN + 1), MAX_BIN), sa.SmallInteger)),
+        else_=sa.cast(ZERO_BIN, sa.SmallInteger)
+    )
+
+
+def bin_values(bins):
+    """Returns the representative reading value of each bin: 0 for ZERO_BIN, else the bin's relative midpoint."""
+    bins = np.asarray(bins, dtype=np.int64)
+    return np.where(bins == ZERO_BIN, 0.0, 2 * GAMMA ** bins.astype(np.float64) / (GAMMA + 1))
+
+
+# === Peak Demand, Load Factor and Load Duration (Request Path) ===
+def load_profile(building_id, categories, start, stop):
+    """
+    Returns {category: metrics} for a building over the whole UTC days from
+    `start` until `stop`, for categories with readings:
+
+    - readings / average: reading count and mean 5-minute demand.
+    - peak: the highest single reading and the hour it fell in.
+    - load_factor: average / peak (None when the peak is not positive).
+    - percentiles: {p50, p90, p95, p99} reading values from the sketch.
+    - load_duration: (percent of time, demand) NumPy arrays, demand falling:
+      the share of readings at or above each demand level.
+
+    Peak and average come from the daily and hourly rollups, the rest from
+    the load histograms, so the cost depends on the number of days, not readings.
+    """
+    first_day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    codes = [ENERGY_CATEGORY_CODES[category] for category in categories]
+    connection = db.session.connection()
+
+    days = connection.execute(
+        sa.select(sa.type_coerce(EnergyRollupDaily.category, sa.SmallInteger), EnergyRollupDaily.bucket,
+                  EnergyRollupDaily.total, EnergyRollupDaily.count, EnergyRollupDaily.min_value,
+                  EnergyRollupDaily.max_value)
+        .where(EnergyRollupDaily.building_id == building_id, EnergyRollupDaily.category.in_(categories),
+               EnergyRollupDaily.bucket >= first_day, EnergyRollupDaily.bucket < stop)
+    ).all()
+
+    profiles = {}
+    for code in codes:
+        rows = [row for row in days if row[0] == code]
+        if not rows:
+            continue
+        _, buckets, totals, counts, minimums, maximums = zip(*rows)
+        peak_day = buckets[int(np.argmax(maximums))]
+        readings = int(sum(counts))
+        average = math.fsum(totals) / readings
+        peak = float(max(maximums))
+        profiles[code] = {
+            'readings': readings,
+            'average': average,
+            'peak': {'value': peak, 'day': peak_day},
+            'load_factor': average / peak if peak > 0 else None,
+            'range': (float(min(minimums)), peak),
+        }
+
+    if profiles:
+        _add_peak_hours(connection, building_id, profiles)
+        _add_distributions(connection, building_id, profiles, first_day, stop)
+    return {ENERGY_CATEGORIES[code]: profile for code, profile in sorted(profiles.items())}
+
+
+def _add_peak_hours(connection, building_id, profiles):
+    """Narrows each category's peak from its day to the hour, reading only the hourly rollups of that day."""
+    hourly = EnergyRollupHourly
+    peak_days = sa.or_(*(
+        sa.and_(hourly.category == ENERGY_CATEGORIES[code], hourly.bucket >= profile['peak']['day'],
+                hourly.bucket < profile['peak']['day'] + timedelta(days=1))
+        for code, profile in profiles.items()
+    ))
+    hours = connection.execute(
+        sa.select(sa.type_coerce(hourly.category, sa.SmallInteger), hourly.bucket, hourly.max_value)
+        .where(hourly.building_id == building_id, peak_days)
+    ).all()
+    for code, profile in profiles.items():
+        peak = profile['peak']
+        hour = max((row for row in hours if row[0] == code), key=lambda row: row[2], default=None)
+        peak['hour'] = hour[1] if hour is not None else peak['day']
+        del peak['day']
+
+
+def _add_distributions(connection, building_id, profiles, start, stop):
+    """Merges the days' load histograms into each category's percentiles and load-duration curve."""
+    histograms = EnergyLoadHistogram
+    rows = connection.execute(
+        sa.select(sa.type_coerce(histograms.category, sa.SmallInteger), histograms.bin, sa.func.sum(histograms.count))
+        .where(histograms.building_id == building_id,
+               histograms.category.in_([ENERGY_CATEGORIES[code] for code in profiles]),
+               histograms.bucket >= start, histograms.bucket < stop)
+        .group_by(histograms.category, histograms.bin)
+    ).all()
+
+    for code, profile in profiles.items():
+        lowest, peak = profile.pop('range')
+        category_rows = sorted(row[1:] for row in rows if row[0] == code)
+        if not category_rows:
+            profile['percentiles'] = {f'p{p}': None for p in PERCENTILES}
+            profile['load_duration'] = (np.empty(0), np.empty(0))
+            continue
+
+        bins, counts = (np.array(column) for column in zip(*category_rows))
+        # Bin representatives may overshoot the exact extremes the rollups keep by up to the sketch accuracy
+        demand = np.clip(bin_values(bins), lowest, peak)
+        cumulative = np.cumsum(counts)
+        ranks = np.array(PERCENTILES) / 100 * (cumulative[-1] - 1)
+        profile['percentiles'] = {
+            f'p{p}': float(demand[index])
+            for p, index in zip(PERCENTILES, np.searchsorted(cumulative, ranks, side='right'))
+        }
+        at_or_above = cumulative[-1] - np.concatenate(([0], cumulative[:-1]))
+        profile['load_duration'] = (100 * at_or_above[::-1] / cumulative[-1], demand[::-1])
@@ -57,28 +57,251 @@ def load_user(id):
     return db.session.get(User, int(id))
 
 
+# === Energy Categories ===
+# Stored as a smallint code; application code keeps using the category names.
+ENERGY_CATEGORIES = ('electricity', 'gas')
+ENERGY_CATEGORY_CODES = {name: code for code, name in enumerate(ENERGY_CATEGORIES)}
+
+
+class EnergyCategory(sa.types.TypeDecorator):
+    """
+    Maps 'electricity' / 'gas' to a 2-byte smallint column and back.
+    """
+    impl = sa.SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else ENERGY_CATEGORY_CODES[value]
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else ENERGY_CATEGORIES[value]
+
+
+# 8-byte reading ids on PostgreSQL; SQLite only autoincrements a plain INTEGER primary key
+BigIntId = sa.BigInteger().with_variant(sa.Integer(), 'sqlite')
+
+
+# === Building Model ===
+class Building(db.Model):
+    """
+    Dimension table for metered university buildings and accommodation flats.
+    Ids match the interned ids of the BuildingRegistry (see app.buildings.sync_buildings).
+    """
+    __tablename__ = 'buildings'
+
+    id: so.Mapped[int] = so.mapped_column(sa.SmallInteger, primary_key=True, autoincrement=False)
+    name: so.Mapped[str] = so.mapped_column(sa.String(100), unique=True)
+    code: so.Mapped[str] = so.mapped_column(sa.String(10), default="")
+    zone: so.Mapped[str] = so.mapped_column(sa.String(50), default="")
+    parent: so.Mapped[Optional[str]] = so.mapped_column(sa.String(100), nullable=True)  # Hall a flat belongs to
+    is_accommodation: so.Mapped[bool] = so.mapped_column(sa.Boolean, default=False)
+
+    def __repr__(self):
+        return f'Building(id={self.id}, name={self.name}, code={self.code}, zone={self.zone})'
+
+
 # === Energy Reading Model ===
 class EnergyReading(db.Model):
     """
     Stores energy sensor readings (electricity/gas) with timestamps.
+    Columns are ordered widest first so PostgreSQL packs each row without alignment padding.
+
+    Indexes:
+    - (building_id, category, timestamp): unique, the natural key of a reading
+      (one value per sensor, category and interval; see app.ingest.upsert_readings),
+      and serves the per-building chart filters.
+    - BRIN on timestamp (PostgreSQL only): tiny index for time-range scans over
+      append-only data, where physical order follows time.
+
+    On PostgreSQL the table is range-partitioned by month on timestamp (migration
+    0004, maintained by app/partitions.py), with primary key (id, timestamp) as
+    partitioning requires. ids still come from one sequence, so the mapper keeps
+    identifying rows by id alone.
     """
     __tablename__ = 'energy_readings'
+    __table_args__ = (
+        sa.Index('ix_energy_readings_building_category_timestamp', 'building_id', 'category', 'timestamp',
+                 unique=True),
+        sa.Index('ix_energy_readings_timestamp_brin', 'timestamp', postgresql_using='brin').ddl_if(dialect='postgresql'),
+    )
 
-    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    id: so.Mapped[int] = so.mapped_column(BigIntId, primary_key=True)
     timestamp: so.Mapped[datetime] = so.mapped_column(sa.DateTime)
-    building: so.Mapped[str] = so.mapped_column(sa.String(100))
-    building_code: so.Mapped[str] = so.mapped_column(sa.String(10))
-    zone: so.Mapped[str] = so.mapped_column(sa.String(50))
-    value: so.Mapped[float] = so.mapped_column(sa.Float)
-    category: so.Mapped[str] = so.mapped_column(sa.String(50))  # e.g., "electricity" or "gas"
+    value: so.Mapped[float] = so.mapped_column(sa.REAL)
+    building_id: so.Mapped[int] = so.mapped_column(sa.SmallInteger, ForeignKey("buildings.id"))
+    category: so.Mapped[str] = so.mapped_column(EnergyCategory)  # "electricity" or "gas"
+
+    building: so.Mapped["Building"] = relationship()
+
+    def __repr__(self):
+        return (
+            f'EnergyReading(id={self.id}, timestamp={self.timestamp}, building_id={self.building_id}, '
+            f'value={self.value}, category={self.category})'
+        )
+
+
+# === Energy Rollup Models ===
+class EnergyRollupMixin:
+    """
+    Readings pre-aggregated per building, category and time bucket.
+    Updated by the ingest writer in the same transaction as the readings
+    (see app.rollups) and rebuilt with `flask energy rebuild-rollups`.
+    """
+    building_id: so.Mapped[int] = so.mapped_column(
+        sa.SmallInteger, ForeignKey("buildings.id"), primary_key=True, autoincrement=False
+    )
+    category: so.Mapped[str] = so.mapped_column(EnergyCategory, primary_key=True)
+    bucket: so.Mapped[datetime] = so.mapped_column(sa.DateTime, primary_key=True)  # Start of the hour / UTC day
+    total: so.Mapped[float] = so.mapped_column(sa.Float)
+    count: so.Mapped[int] = so.mapped_column(sa.Integer)
+    min_value: so.Mapped[float] = so.mapped_column(sa.REAL)
+    max_value: so.Mapped[float] = so.mapped_column(sa.REAL)
+
+    def __repr__(self):
+        return (
+            f'{type(self).__name__}(building_id={self.building_id}, category={self.category}, '
+            f'bucket={self.bucket}, total={self.total}, count={self.count})'
+        )
+
+
+class EnergyRollupHourly(EnergyRollupMixin, db.Model):
+    __tablename__ = 'energy_rollups_hourly'
+
+
+class EnergyRollupDaily(EnergyRollupMixin, db.Model):
+    __tablename__ = 'energy_rollups_daily'
+
+
+# === Energy Load Histogram Model ===
+class EnergyLoadHistogram(db.Model):
+    """
+    Per building, category and UTC day, how many readings fell into each
+    logarithmic value bin (see app.load_profiles). A sketch of the day's
+    reading distribution, merged across days for load-duration curves and
+    percentiles. Maintained alongside the rollups (see app.rollups).
+    """
+    __tablename__ = 'energy_load_histograms'
+
+    building_id: so.Mapped[int] = so.mapped_column(
+        sa.SmallInteger, ForeignKey("buildings.id"), primary_key=True, autoincrement=False
+    )
+    category: so.Mapped[str] = so.mapped_column(EnergyCategory, primary_key=True)
+    bucket: so.Mapped[datetime] = so.mapped_column(sa.DateTime, primary_key=True)  # Start of the UTC day
+    bin: so.Mapped[int] = so.mapped_column(sa.SmallInteger, primary_key=True, autoincrement=False)
+    count: so.Mapped[int] = so.mapped_column(sa.Integer)
+
+    def __repr__(self):
+        return (f'EnergyLoadHistogram(building_id={self.building_id}, category={self.category}, '
+                f'bucket={self.bucket}, bin={self.bin}, count={self.count})')
+
+
+# === Energy Zone Totals Model ===
+class EnergyZoneTotal(db.Model):
+    """
+    All-time usage per campus zone and category, read by the dashboard landing page.
+    Incremented by the ingest writer together with the rollups and periodically
+    reconciled from the daily rollups (see app.rollups). Only university
+    buildings (those with a building code) are counted.
+    """
+    __tablename__ = 'energy_zone_totals'
+
+    zone: so.Mapped[str] = so.mapped_column(sa.String(50), primary_key=True)
+    category: so.Mapped[str] = so.mapped_column(EnergyCategory, primary_key=True)
+    total: so.Mapped[float] = so.mapped_column(sa.Float)
+    count: so.Mapped[int] = so.mapped_column(sa.BigInteger)
+
+    def __repr__(self):
+        return f'EnergyZoneTotal(zone={self.zone}, category={self.category}, total={self.total}, count={self.count})'
+
+
+# === Energy Alert Model ===
+class EnergyAlert(db.Model):
+    """
+    A reading the online anomaly detector flagged as far outside its sensor's
+    usual range for that hour of the week (see app.anomalies). Written by the
+    ingest writer in the same transaction as the readings.
+    """
+    __tablename__ = 'energy_alerts'
+
+    id: so.Mapped[int] = so.mapped_column(BigIntId, primary_key=True)
+    timestamp: so.Mapped[datetime] = so.mapped_column(sa.DateTime, index=True)
+    building_id: so.Mapped[int] = so.mapped_column(sa.SmallInteger, ForeignKey("buildings.id"), index=True)
+    category: so.Mapped[str] = so.mapped_column(EnergyCategory)
+    value: so.Mapped[float] = so.mapped_column(sa.REAL)
+    expected: so.Mapped[float] = so.mapped_column(sa.Float)  # Mean reading for the hour of the week
+    z_score: so.Mapped[float] = so.mapped_column(sa.Float)   # Deviations from the mean
+
+    building: so.Mapped["Building"] = relationship()
 
     def __repr__(self):
         return (
-            f'EnergyReading(id={self.id}, timestamp={self.timestamp}, building={self.building}, '
-            f'building_code={self.building_code}, zone={self.zone}, value={self.value}, category={self.category})'
+            f'EnergyAlert(timestamp={self.timestamp}, building_id={self.building_id}, category={self.category}, '
+            f'value={self.value}, expected={self.expected}, z_score={self.z_score})'
         )
 
 
+# === Energy Forecast Model ===
+class EnergyForecastModel(db.Model):
+    """
+    Fitted hour-of-week load profile per building and category, read by the
+    forecast endpoint and refitted incrementally by a scheduled job (see app.forecast).
+    """
+    __tablename__ = 'energy_forecast_models'
+
+    building_id: so.Mapped[int] = so.mapped_column(
+        sa.SmallInteger, ForeignKey("buildings.id"), primary_key=True, autoincrement=False
+    )
+    category: so.Mapped[str] = so.mapped_column(EnergyCategory, primary_key=True)
+    fitted_until: so.Mapped[datetime] = so.mapped_column(sa.DateTime)  # First hour not folded in yet
+    level: so.Mapped[float] = so.mapped_column(sa.Float)  # Smoothed deviation of recent hours from the profile
+    state: so.Mapped[bytes] = so.mapped_column(sa.LargeBinary)  # float32 profile, variance, observations x 168
+
+    def __repr__(self):
+        return (f'EnergyForecastModel(building_id={self.building_id}, category={self.category}, '
+                f'fitted_until={self.fitted_until})')
+
+
+# === Ingest Watermark Model ===
+class IngestWatermark(db.Model):
+    """
+    One row per ingested table: the latest reading timestamp committed and a
+    version bumped by every change to the energy data or anything derived from
+    it. Cached analytics responses are keyed on the version (see app.cache).
+    """
+    __tablename__ = 'ingest_watermarks'
+
+    name: so.Mapped[str] = so.mapped_column(sa.String(50), primary_key=True)
+    latest_timestamp: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime, nullable=True)
+    version: so.Mapped[int] = so.mapped_column(sa.BigInteger)
+
+    def __repr__(self):
+        return f'IngestWatermark(name={self.name}, latest_timestamp={self.latest_timestamp}, version={self.version})'
+
+
+# === Emission Factor Model ===
+class EmissionFactor(db.Model):
+    """
+    Versioned CO₂ emission factors per energy category. A version applies from
+    `valid_from` until the category's next version, so publishing a new factor
+    leaves past emissions computed with the factor in force at the time
+    (see app.emissions).
+    """
+    __tablename__ = 'emission_factors'
+    __table_args__ = (
+        sa.UniqueConstraint('category', 'valid_from', name='uq_emission_factors_category_valid_from'),
+    )
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    category: so.Mapped[str] = so.mapped_column(EnergyCategory)
+    valid_from: so.Mapped[date] = so.mapped_column(sa.Date)
+    kg_co2_per_kwh: so.Mapped[float] = so.mapped_column(sa.Float)
+    source: so.Mapped[str] = so.mapped_column(sa.String(255), default="")
+
+    def __repr__(self):
+        return (f'EmissionFactor(category={self.category}, valid_from={self.valid_from}, '
+                f'kg_co2_per_kwh={self.kg_co2_per_kwh})')
+
+
 # === Inventory Model ===
 class Inventory(db.Model):
     """
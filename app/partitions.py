@@ -0,0 +1,172 @@
+import re
+from datetime import date, datetime
+
+import sqlalchemy as sa
+
+from app import logger
+from app.extensions import db
+
+# === Partition Layout ===
+# On PostgreSQL energy_readings is range-partitioned by month on `timestamp`
+# (see migration 0004). Each month lives in energy_readings_yYYYYmMM; rows
+# outside every monthly range (e.g. late backfills) land in the default partition.
+PARENT_TABLE = 'energy_readings'
+DEFAULT_PARTITION = 'energy_readings_default'
+PARTITION_PATTERN = re.compile(r'^energy_readings_y(\d{4})m(\d{2})$')
+
+# Partition DDL queues for strong locks; a DDL statement stuck behind a long reader would
+# block every insert queued behind it, so give up quickly and retry on the next run.
+LOCK_TIMEOUT = '5s'
+
+
+def month_start(day):
+    """Returns the first day of the month containing `day` (a date or datetime)."""
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    """Shifts a first-of-month date by `count` months (negative to go back)."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"energy_readings_y{month.year:04d}m{month.month:02d}"
+
+
+# === Catalogue Queries ===
+def is_partitioned(connection):
+    """True when energy_readings is a partitioned table (PostgreSQL only)."""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.scalar(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:parent))"
+    ), {'parent': PARENT_TABLE})
+
+
+def list_partitions(connection):
+    """Returns {first day of month: partition name} for the attached monthly partitions."""
+    names = connection.scalars(sa.text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:parent)
+    """), {'parent': PARENT_TABLE})
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+# === Partition DDL ===
+def create_partition(connection, month, load=None):
+    """
+    Creates the partition for `month`.
+
+    The new table is filled before it is attached when rows for that month were
+    written to the default partition before it existed (PostgreSQL refuses a
+    plain CREATE ... PARTITION OF while the default holds matching rows), and
+    when `load(table name)` is given to bulk-load the month: rows written to a
+    standalone table skip per-row index maintenance, and ATTACH then builds
+    each index once. A CHECK constraint matching the bounds lets ATTACH skip
+    its validation scan.
+    """
+    name = partition_name(month)
+    params = {'start': month, 'stop': add_months(month, 1)}
+    bounds = f"FROM ('{params['start']}') TO ('{params['stop']}')"
+
+    stray = False
+    has_default = connection.scalar(sa.text("SELECT to_regclass(:name) IS NOT NULL"), {'name': DEFAULT_PARTITION})
+    if has_default:
+        # Blocks inserts routed to the default until the new partition is attached
+        connection.execute(sa.text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+        stray = connection.scalar(sa.text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :stop)"
+        ), params)
+
+    if not stray and load is None:
+        connection.execute(sa.text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} FOR VALUES {bounds}"))
+        logger.info(f"Created partition {name}.")
+        return
+
+    connection.execute(sa.text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+    if stray:
+        connection.execute(sa.text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :stop RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), params)
+    if load is not None:
+        load(name)
+
+    connection.execute(sa.text(
+        f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds "
+        f"CHECK (timestamp IS NOT NULL AND timestamp >= '{params['start']}' AND timestamp < '{params['stop']}')"
+    ))
+    connection.execute(sa.text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    connection.execute(sa.text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+    logger.info(f"Created partition {name}" + (f" with rows moved from {DEFAULT_PARTITION}." if stray else " and loaded it."))
+
+
+def expire_partition(connection, name, action):
+    """Detaches (keeping the table for archiving) or drops an expired partition."""
+    if action == 'drop':
+        connection.execute(sa.text(f"DROP TABLE {name}"))
+    else:
+        connection.execute(sa.text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    logger.info(f"{'Dropped' if action == 'drop' else 'Detached'} expired partition {name}.")
+
+
+# === Scheduled Maintenance ===
+def manage_partitions(months_ahead=3, retention_months=None, action='detach', today=None):
+    """
+    Creates partitions from the current month through `months_ahead` months ahead
+    and expires partitions that ended more than `retention_months` months ago
+    (no expiry when `retention_months` is falsy).
+
+    Returns {'created': [names], 'expired': [names]}. Does nothing unless
+    energy_readings is partitioned, e.g. on SQLite.
+    """
+    if action not in ('detach', 'drop'):
+        raise ValueError(f"Unknown partition retention action: {action!r}")
+
+    summary = {'created': [], 'expired': []}
+    current = month_start(today or datetime.utcnow())
+
+    with db.engine.begin() as connection:
+        if not is_partitioned(connection):
+            logger.debug("energy_readings is not partitioned; skipping partition maintenance.")
+            return summary
+        existing = list_partitions(connection)
+
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing and _run_ddl(create_partition, month):
+            summary['created'].append(partition_name(month))
+
+    if retention_months:
+        cutoff = add_months(current, -retention_months)
+        for month, name in sorted(existing.items()):
+            if add_months(month, 1) <= cutoff and _run_ddl(expire_partition, name, action):
+                summary['expired'].append(name)
+
+    return summary
+
+
+def _run_ddl(step, *args):
+    """
+    Runs one partition change in its own transaction, so a failure leaves the other
+    months in place. Returns False (after logging) if it could not get its locks.
+    """
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(sa.text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+            step(connection, *args)
+        return True
+    except sa.exc.OperationalError as e:
+        logger.warning(f"Partition maintenance {step.__name__} for {args[0]} failed, retrying next run: {e}")
+        return False
@@ -0,0 +1,441 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+import sqlalchemy as sa
+from psycopg2.extras import execute_values
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.buildings import get_registry
+from app.downsampling import EPOCH, epoch_seconds
+from app.extensions import db
+from app.load_profiles import sketch_bin_expression, sketch_bins
+from app.models import (ENERGY_CATEGORIES, ENERGY_CATEGORY_CODES, Building, EnergyLoadHistogram, EnergyReading,
+                        EnergyRollupDaily, EnergyRollupHourly, EnergyZoneTotal, IngestWatermark)
+
+# === Rollup Grains ===
+# `truncate` buckets a Python datetime and `width` is a bucket's length; `pg_unit` /
+# `sqlite_format` bucket in SQL.
+# SQLite stores DateTime as text, so the format must match SQLAlchemy's own
+# 'YYYY-MM-DD HH:MM:SS.ffffff' rendering for bucket keys to compare equal.
+RollupGrain = namedtuple('RollupGrain', 'name model truncate width pg_unit sqlite_format')
+
+GRAINS = (
+    RollupGrain('hourly', EnergyRollupHourly, lambda ts: ts.replace(minute=0, second=0, microsecond=0),
+                timedelta(hours=1), 'hour', '%Y-%m-%d %H:00:00.000000'),
+    RollupGrain('daily', EnergyRollupDaily, lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0),
+                timedelta(days=1), 'day', '%Y-%m-%d 00:00:00.000000'),
+)
+
+KEY_COLUMNS = ('building_id', 'category', 'bucket')
+
+# How each value column merges into an existing row on conflict
+ROLLUP_MERGE = {'total': 'add', 'count': 'add', 'min_value': 'min', 'max_value': 'max'}
+ZONE_KEY_COLUMNS = ('zone', 'category')
+ZONE_MERGE = {'total': 'add', 'count': 'add'}
+HISTOGRAM_KEY_COLUMNS = ('building_id', 'category', 'bucket', 'bin')
+HISTOGRAM_MERGE = {'count': 'add'}
+
+# Readings streamed per round trip while rebuilding the load histograms
+REBUILD_FETCH_BATCH = 50_000
+
+
+# === Incremental Update (Ingest Path) ===
+def update_rollups(rows, session=None):
+    """
+    Folds reading tuples (see app.ingest.READING_COLUMNS) into the hourly and
+    daily rollups, the daily load histograms and the zone totals, and advances
+    the ingest watermark.
+
+    The batch is first aggregated in Python, so each derived row is touched once
+    per batch, then upserted with INSERT ... ON CONFLICT DO UPDATE. Runs in the
+    session's current transaction, alongside the readings it summarises;
+    committing is left to the caller.
+    """
+    if not rows:
+        return
+
+    session = session or db.session
+    connection = session.connection()
+    for grain in GRAINS:
+        _upsert(connection, grain.model.__table__, KEY_COLUMNS, ROLLUP_MERGE, aggregate(rows, grain.truncate))
+    _upsert(connection, EnergyLoadHistogram.__table__, HISTOGRAM_KEY_COLUMNS, HISTOGRAM_MERGE,
+            aggregate_histograms(rows))
+    _upsert(connection, EnergyZoneTotal.__table__, ZONE_KEY_COLUMNS, ZONE_MERGE, aggregate_zones(rows))
+    advance_watermark(max(timestamp for timestamp, _, _, _ in rows), session)
+
+
+def revise_rollups(replaced, updated, session=None):
+    """
+    Applies corrected readings to the derived tables: `updated` are the new
+    reading tuples and `replaced` the stored ones they overwrote, in the same
+    order (see app.ingest.upsert_readings).
+
+    Only the corrected (building, category, bucket) rollup rows are touched:
+    they are re-read from energy_readings, as a correction can raise a minimum
+    or lower a maximum that no delta could restore. Histogram counts move from
+    the old value's bin to the new one and the zone totals take the difference.
+    Advances the ingest watermark; committing is left to the caller.
+    """
+    if not updated:
+        return
+
+    session = session or db.session
+    connection = session.connection()
+    for grain in GRAINS:
+        _refresh_buckets(connection, grain, {(row[1], row[2], grain.truncate(row[0])) for row in updated})
+    _upsert(connection, EnergyLoadHistogram.__table__, HISTOGRAM_KEY_COLUMNS, HISTOGRAM_MERGE,
+            _difference(aggregate_histograms(updated), aggregate_histograms(replaced)))
+    _upsert(connection, EnergyZoneTotal.__table__, ZONE_KEY_COLUMNS, ZONE_MERGE,
+            _difference(aggregate_zones(updated), aggregate_zones(replaced), counts=False))
+
+    table = EnergyLoadHistogram.__table__
+    days = [row[0].replace(hour=0, minute=0, second=0, microsecond=0) for row in replaced]
+    connection.execute(sa.delete(table).where(table.c.count <= 0, table.c.bucket.between(min(days), max(days))))
+    advance_watermark(max(timestamp for timestamp, _, _, _ in updated), session)
+
+
+def _refresh_buckets(connection, grain, keys):
+    """Re-reads total, count, min and max of the given (building_id, category, bucket) rollup rows."""
+    table = grain.model.__table__
+    value = EnergyReading.value
+    in_bucket = sa.and_(
+        EnergyReading.building_id == table.c.building_id,
+        EnergyReading.category == table.c.category,
+        EnergyReading.timestamp >= sa.bindparam('start', type_=sa.DateTime),
+        EnergyReading.timestamp < sa.bindparam('stop', type_=sa.DateTime),
+    )
+    connection.execute(
+        sa.update(table)
+        .where(table.c.building_id == sa.bindparam('key_building_id'),
+               table.c.category == sa.bindparam('key_category'),
+               table.c.bucket == sa.bindparam('start'))
+        .values({
+            column: sa.select(function).where(in_bucket).scalar_subquery()
+            for column, function in (('total', sa.func.sum(sa.cast(value, sa.Float))), ('count', sa.func.count()),
+                                     ('min_value', sa.func.min(value)), ('max_value', sa.func.max(value)))
+        }),
+        [{'key_building_id': building_id, 'key_category': category, 'start': bucket, 'stop': bucket + grain.width}
+         for building_id, category, bucket in sorted(keys)]
+    )
+
+
+def _difference(new, old, counts=True):
+    """
+    Subtracts aggregated {key: [values]} rows; with counts=False the last value
+    (a count) is left unchanged, as when readings change value but not number.
+    """
+    merged = {key: list(values) for key, values in new.items()}
+    for key, values in old.items():
+        current = merged.setdefault(key, [0] * len(values))
+        for index, value in enumerate(values):
+            current[index] -= value
+    if not counts:
+        for values in merged.values():
+            values[-1] = 0
+    return merged
+
+
+def aggregate(rows, truncate):
+    """
+    Returns {(building_id, category, bucket): [total, count, min, max]} for reading tuples.
+    """
+    buckets = {}
+    for timestamp, building_id, category, value in rows:
+        key = (building_id, category, truncate(timestamp))
+        current = buckets.get(key)
+        if current is None:
+            buckets[key] = [value, 1, value, value]
+        else:
+            current[0] += value
+            current[1] += 1
+            current[2] = min(current[2], value)
+            current[3] = max(current[3], value)
+    return buckets
+
+
+def aggregate_histograms(rows):
+    """
+    Returns {(building_id, category, day, bin): [count]} for reading tuples, with
+    bins from app.load_profiles.sketch_bins.
+    """
+    bins = sketch_bins([value for _, _, _, value in rows])
+    counts = {}
+    for (timestamp, building_id, category, _), value_bin in zip(rows, bins.tolist()):
+        key = (building_id, category, timestamp.replace(hour=0, minute=0, second=0, microsecond=0), value_bin)
+        current = counts.get(key)
+        if current is None:
+            counts[key] = [1]
+        else:
+            current[0] += 1
+    return counts
+
+
+def aggregate_zones(rows, registry=None):
+    """
+    Returns {(zone, category): [total, count]} for reading tuples of university buildings
+    (those with a building code). Zones come from the BuildingRegistry; accommodation
+    flats and unknown ids are skipped.
+    """
+    registry = registry or get_registry()
+    totals = {}
+    for _, building_id, category, value in rows:
+        building = registry.get(building_id)
+        if building is None or not building.code:
+            continue
+        current = totals.setdefault((building.zone, category), [0.0, 0])
+        current[0] += value
+        current[1] += 1
+    return totals
+
+
+def _upsert(connection, table, keys, merge, aggregated):
+    """
+    Merges aggregated {key tuple: value list} rows into `table`, creating missing rows.
+    Keys are written in sorted order so concurrent writers lock rows consistently.
+    """
+    if not aggregated:
+        return
+
+    rows = sorted(aggregated.items())
+    if connection.dialect.name == 'postgresql':
+        _upsert_values(connection, table, keys, merge, rows)
+    elif connection.dialect.name == 'sqlite':
+        _upsert_many(connection, table, keys, merge, rows)
+    else:
+        raise NotImplementedError(
+            f"Energy rollups need INSERT ... ON CONFLICT (no support for {connection.dialect.name})"
+        )
+
+
+# --- PostgreSQL: one multi-row INSERT ... ON CONFLICT via execute_values ---
+_PG_MERGE = {
+    'add': '{table}.{column} + EXCLUDED.{column}',
+    'min': 'LEAST({table}.{column}, EXCLUDED.{column})',
+    'max': 'GREATEST({table}.{column}, EXCLUDED.{column})',
+}
+
+
+def _upsert_values(connection, table, keys, merge, rows):
+    """
+    Sends the whole batch as a single statement over the session's DBAPI connection,
+    like the COPY path in app.ingest; skipping SQLAlchemy's per-row bind processing
+    makes this about twice as fast as an executemany of the Core upsert.
+    """
+    name = table.name
+    assignments = ', '.join(
+        f"{column} = {_PG_MERGE[how].format(table=name, column=column)}" for column, how in merge.items()
+    )
+    sql = (
+        f"INSERT INTO {name} ({', '.join(keys + tuple(merge))}) VALUES %s "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {assignments}"
+    )
+    category = keys.index('category')
+    values = [
+        (*key[:category], ENERGY_CATEGORY_CODES[key[category]], *key[category + 1:], *aggregate_values)
+        for key, aggregate_values in rows
+    ]
+    cursor = connection.connection.cursor()
+    try:
+        execute_values(cursor, sql, values, page_size=len(values))
+    finally:
+        cursor.close()
+
+
+# --- SQLite: executemany of the Core upsert ---
+def _upsert_many(connection, table, keys, merge, rows):
+    insert = sqlite.insert(table)
+    merged = {
+        'add': lambda column: table.c[column] + insert.excluded[column],
+        'min': lambda column: sa.func.min(table.c[column], insert.excluded[column]),
+        'max': lambda column: sa.func.max(table.c[column], insert.excluded[column]),
+    }
+    statement = insert.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: merged[how](column) for column, how in merge.items()}
+    )
+    connection.execute(statement, [
+        dict(zip(keys + tuple(merge), (*key, *aggregate_values)))
+        for key, aggregate_values in rows
+    ])
+
+
+# === Full Rebuild (Backfills) ===
+def rebuild_rollups(start=None, end=None, session=None):
+    """
+    Recomputes the rollups and load histograms from energy_readings for whole
+    UTC days from `start` up to and including `end` (dates or datetimes;
+    open-ended when None), then re-derives the zone totals from the daily rollups.
+
+    Existing rollup rows in the range are replaced. Returns {name: rows written}.
+    Committing is left to the caller.
+    """
+    session = session or db.session
+    connection = session.connection()
+    start = _day(start) if start else None
+    stop = _day(end) + timedelta(days=1) if end else None
+
+    ts = EnergyReading.timestamp
+    written = {}
+    for grain in GRAINS:
+        table = grain.model.__table__
+
+        delete = sa.delete(table)
+        if start:
+            delete = delete.where(table.c.bucket >= start)
+        if stop:
+            delete = delete.where(table.c.bucket < stop)
+        connection.execute(delete)
+
+        bucket = _bucket_expression(connection.dialect.name, grain, ts)
+        select = sa.select(
+            EnergyReading.building_id, EnergyReading.category, bucket,
+            sa.func.sum(sa.cast(EnergyReading.value, sa.Float)), sa.func.count(), sa.func.min(EnergyReading.value),
+            sa.func.max(EnergyReading.value)
+        ).group_by(EnergyReading.building_id, EnergyReading.category, bucket)
+        if start:
+            select = select.where(ts >= start)
+        if stop:
+            select = select.where(ts < stop)
+
+        result = connection.execute(sa.insert(table).from_select(
+            [*KEY_COLUMNS, 'total', 'count', 'min_value', 'max_value'], select
+        ))
+        written[grain.name] = result.rowcount
+
+    written['histogram'] = rebuild_histograms(connection, start, stop)
+    written['zones'] = reconcile_zone_totals(session)
+    advance_watermark(session=session)
+    return written
+
+
+def rebuild_histograms(connection, start, stop):
+    """
+    Replaces the load histogram rows in [start, stop) (open-ended when None).
+
+    On PostgreSQL the readings are binned and counted server-side in one
+    INSERT ... SELECT, like the rollups. Other databases stream the readings
+    through sketch_bins in NumPy instead, as SQLite may be built without ln().
+    Returns the number of histogram rows written.
+    """
+    table = EnergyLoadHistogram.__table__
+    ts = EnergyReading.timestamp
+    delete = sa.delete(table)
+    in_range = []
+    if start:
+        delete = delete.where(table.c.bucket >= start)
+        in_range.append(ts >= start)
+    if stop:
+        delete = delete.where(table.c.bucket < stop)
+        in_range.append(ts < stop)
+    connection.execute(delete)
+
+    if connection.dialect.name == 'postgresql':
+        day = sa.func.date_trunc('day', ts)
+        value_bin = sketch_bin_expression(EnergyReading.value)
+        select = (
+            sa.select(EnergyReading.building_id, EnergyReading.category, day, value_bin, sa.func.count())
+            .where(*in_range)
+            .group_by(EnergyReading.building_id, EnergyReading.category, day, value_bin)
+        )
+        return connection.execute(sa.insert(table).from_select([*HISTOGRAM_KEY_COLUMNS, 'count'], select)).rowcount
+
+    select = sa.select(
+        EnergyReading.building_id, sa.type_coerce(EnergyReading.category, sa.SmallInteger), ts, EnergyReading.value
+    ).where(*in_range)
+    written = set()
+    result = connection.execute(select.execution_options(yield_per=REBUILD_FETCH_BATCH))
+    for partition in result.partitions():
+        building_ids, codes, timestamps, values = zip(*partition)
+        days = epoch_seconds(timestamps).astype(np.int64) // 86400
+        keys, counts = np.unique(
+            np.column_stack([building_ids, codes, days, sketch_bins(values)]), axis=0, return_counts=True
+        )
+        aggregated = {
+            (building_id, ENERGY_CATEGORIES[code], EPOCH + timedelta(days=day), value_bin): [count]
+            for (building_id, code, day, value_bin), count in zip(keys.tolist(), counts.tolist())
+        }
+        _upsert(connection, table, HISTOGRAM_KEY_COLUMNS, HISTOGRAM_MERGE, aggregated)
+        written.update(aggregated)
+    return len(written)
+
+
+def _bucket_expression(dialect, grain, column):
+    if dialect == 'postgresql':
+        return sa.func.date_trunc(grain.pg_unit, column)
+    return sa.func.strftime(grain.sqlite_format, column)
+
+
+def _day(moment):
+    return datetime(moment.year, moment.month, moment.day)
+
+
+# === Zone Total Reconciliation ===
+def reconcile_zone_totals(session=None):
+    """
+    Replaces the running zone totals with sums over the daily rollups, undoing any
+    drift (e.g. readings deleted or buildings moved between zones).
+
+    A concurrent ingest batch either committed before the re-sum (and is counted
+    in it) or blocks on the replaced rows and adds its delta afterwards.
+    Returns the number of zone rows written; committing is left to the caller.
+    """
+    session = session or db.session
+    connection = session.connection()
+    table = EnergyZoneTotal.__table__
+    daily = EnergyRollupDaily.__table__
+
+    connection.execute(sa.delete(table))
+    select = (
+        sa.select(Building.zone, daily.c.category, sa.func.sum(daily.c.total), sa.func.sum(daily.c.count))
+        .join(Building, Building.id == daily.c.building_id)
+        .where(Building.code != '')
+        .group_by(Building.zone, daily.c.category)
+    )
+    result = connection.execute(sa.insert(table).from_select([*ZONE_KEY_COLUMNS, 'total', 'count'], select))
+    return result.rowcount
+
+
+# === Ingest Watermark ===
+WATERMARK = 'energy_readings'
+
+
+def advance_watermark(latest=None, session=None):
+    """
+    Bumps the energy watermark version and raises its latest reading timestamp to
+    `latest` (when given). Cached analytics responses are keyed on the version,
+    so anything that changes what the charts return must call this.
+
+    Runs in the session's current transaction; concurrent writers queue on the
+    single row until they commit. Committing is left to the caller.
+    """
+    connection = (session or db.session).connection()
+    table = IngestWatermark.__table__
+    if connection.dialect.name == 'postgresql':
+        insert, greatest = postgresql.insert(table), sa.func.greatest
+    elif connection.dialect.name == 'sqlite':
+        insert, greatest = sqlite.insert(table), sa.func.max
+    else:
+        raise NotImplementedError(
+            f"The ingest watermark needs INSERT ... ON CONFLICT (no support for {connection.dialect.name})"
+        )
+
+    excluded = insert.excluded
+    connection.execute(insert.values(name=WATERMARK, latest_timestamp=latest, version=1).on_conflict_do_update(
+        index_elements=['name'],
+        set_={
+            # SQLite's max() is NULL if either side is; coalesce so a missing timestamp keeps the other
+            'latest_timestamp': greatest(sa.func.coalesce(table.c.latest_timestamp, excluded.latest_timestamp),
+                                         sa.func.coalesce(excluded.latest_timestamp, table.c.latest_timestamp)),
+            'version': table.c.version + 1,
+        }
+    ))
+
+
+def read_watermark(session=None):
+    """Returns (version, latest reading timestamp); (0, None) before anything was ingested."""
+    session = session or db.session
+    row = session.execute(
+        sa.select(IngestWatermark.version, IngestWatermark.latest_timestamp).where(IngestWatermark.name == WATERMARK)
+    ).first()
+    return tuple(row) if row else (0, None)
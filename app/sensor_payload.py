@@ -0,0 +1,59 @@
+import struct
+from datetime import datetime, timezone
+
+from app.models import ENERGY_CATEGORIES, ENERGY_CATEGORY_CODES
+
+# === Batched Sensor Payload Format ===
+# One MQTT message carries every reading of one category for a group of sensors
+# (a campus zone or an accommodation building) taken at the same instant:
+#
+#   header  <B version> <B category> <I unix seconds> <H count>     (8 bytes)
+#   body    <H sensor id> * count, then <f value> * count           (6 bytes per sensor)
+#
+# All fields are little-endian. Sensor ids are the interned ids of the shared
+# BuildingRegistry, so building names and codes never travel on the wire, and
+# categories use the smallint codes they are stored with (app.models.ENERGY_CATEGORY_CODES).
+PAYLOAD_VERSION = 1
+
+_HEADER = struct.Struct('<BBIH')
+
+
+# === Encode ===
+def encode_batch(category, timestamp, sensor_ids, values):
+    """
+    Packs one category's readings for a group of sensors into a compact binary payload.
+
+    Arguments:
+    - category: 'electricity' or 'gas'.
+    - timestamp: Aware or naive-UTC datetime shared by all readings.
+    - sensor_ids: Sequence of sensor ids (0-65535).
+    - values: Sequence of readings, same length as sensor_ids (stored as float32).
+    """
+    count = len(sensor_ids)
+    if count != len(values):
+        raise ValueError("sensor_ids and values must have the same length")
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+
+    header = _HEADER.pack(PAYLOAD_VERSION, ENERGY_CATEGORY_CODES[category], int(timestamp.timestamp()), count)
+    return header + struct.pack(f'<{count}H{count}f', *sensor_ids, *values)
+
+
+# === Decode ===
+def decode_batch(payload):
+    """
+    Unpacks a payload produced by encode_batch in a single pass.
+
+    Returns:
+        (category, timestamp as naive UTC datetime, sensor_ids tuple, values tuple)
+    """
+    version, category_code, epoch, count = _HEADER.unpack_from(payload)
+    if version != PAYLOAD_VERSION:
+        raise ValueError(f"Unsupported sensor payload version: {version}")
+    if category_code >= len(ENERGY_CATEGORIES):
+        raise ValueError(f"Unknown energy category code: {category_code}")
+
+    fields = struct.unpack_from(f'<{count}H{count}f', payload, _HEADER.size)
+    timestamp = datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None)
+    return ENERGY_CATEGORIES[category_code], timestamp, fields[:count], fields[count:]
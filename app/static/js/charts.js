@@ -1,57 +1,140 @@
+// Compact chart responses (see app/columnar.py): base64 little-endian typed arrays
+const COLUMNAR_MIMETYPE = 'application/vnd.greencampus.columnar+json';
+
+function decodeBase64(encoded, ArrayType) {
+    const bytes = Uint8Array.from(atob(encoded), c => c.charCodeAt(0));
+    return new ArrayType(bytes.buffer);  // Typed arrays use platform byte order, little-endian in practice
+}
+
+function decodeColumnarTrace(trace) {
+    // x becomes epoch milliseconds, which Plotly date axes read as UTC, like the naive UTC labels
+    const x = new Float64Array(trace.length);
+    if (trace.x.deltas !== undefined) {
+        const deltas = decodeBase64(trace.x.deltas, Int32Array);
+        let seconds = trace.x.start;
+        for (let i = 0; i < trace.length; i++) {
+            if (i > 0) seconds += deltas[i - 1];
+            x[i] = seconds * 1000;
+        }
+    } else {
+        for (let i = 0; i < trace.length; i++) {
+            x[i] = (trace.x.start + i * trace.x.step) * 1000;
+        }
+    }
+    return { ...trace, x: x, y: decodeBase64(trace.y, Float32Array) };  // NaN values are drawn as gaps
+}
+
+// Last decoded response per request, revalidated with its ETag (the server answers 304 until new readings arrive)
+const responseCache = new Map();
+
+function decodeTraces(traces, encoding) {
+    return encoding === 'columnar' ? traces.map(decodeColumnarTrace) : traces;
+}
+
+function fetchDecoded(url, requestData, decode) {
+    const body = JSON.stringify(requestData);
+    const cacheKey = url + body;
+    const cached = responseCache.get(cacheKey);
+    const headers = { 'Content-Type': 'application/json', 'Accept': COLUMNAR_MIMETYPE };
+    if (cached) {
+        headers['If-None-Match'] = cached.etag;
+    }
+
+    return fetch(url, { method: 'POST', headers, body })
+    .then(res => {
+        if (res.status === 304 && cached) {
+            return cached.result;
+        }
+        return res.json()
+        .then(decode)
+        .then(result => {
+            const etag = res.headers.get('ETag');
+            if (etag) {
+                responseCache.set(cacheKey, { etag, result });
+            }
+            return result;
+        });
+    });
+}
+
+function fetchTraces(url, requestData) {
+    return fetchDecoded(url, requestData, data => decodeTraces(data.traces, data.encoding));
+}
+
+// Several charts from one request; the server reads rows shared by the charts once
+function fetchCharts(charts) {
+    return fetchDecoded('/get_dashboard_data', { charts: charts }, data => Object.fromEntries(
+        Object.entries(data.charts).map(([id, chart]) => [id, decodeTraces(chart.traces, data.encoding)])
+    ));
+}
+
 function getRequestData() {
     return {
         buildings: Array.from(document.getElementById('building-select').selectedOptions).map(opt => opt.value),
         energy_type: document.getElementById('energy-type').value,
         time_range: document.getElementById('time-range').value,
         start_date: document.getElementById('start-date').value,
-        end_date: document.getElementById('end-date').value
+        end_date: document.getElementById('end-date').value,
+        // One point per horizontal pixel is all the chart can show; the server caps it
+        max_points: document.getElementById('energyChartDiv').clientWidth || undefined
     };
 }
 
+function drawEnergyChart(traces) {
+    Plotly.newPlot('energyChartDiv', traces, { title: 'Energy Usage', xaxis: { type: 'date' } });
+}
+
+function drawCo2Chart(traces) {
+    Plotly.newPlot('co2ChartDiv', traces, { title: 'Kg CO₂ per kWh Emissions', xaxis: { type: 'date' } });
+}
+
 function updateEnergyChart() {
-    fetch('/get_energy_data', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(getRequestData())
-    })
-    .then(res => res.json())
-    .then(energyData => {
-        Plotly.newPlot('energyChartDiv', energyData.traces, { title: 'Energy Usage' });
-    })
+    fetchTraces('/get_energy_data', getRequestData())
+    .then(drawEnergyChart)
     .catch(error => {
         console.error('Error fetching energy data:', error);
     });
 }
 
-const updateCo2Chart = () => {
+function getCo2RequestData() {
     const selectedBuildings = Array.from(document.getElementById('building-select-co2').selectedOptions).map(opt => opt.value);
     const selectedEnergyType = document.getElementById('co2-emission').value;
     const selectedTimeRange = document.getElementById('time-range-co2').value;
     const startDate = document.getElementById('start-date-co2').value;
     const endDate = document.getElementById('end-date-co2').value;
 
-    const requestData = {
+    return {
         buildings: selectedBuildings,
         energy_type: selectedEnergyType,
         time_range: selectedTimeRange,
         start_date: startDate,
         end_date: endDate
     };
+}
 
-    fetch('/get_co2_energy_data', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(requestData)
-    })
-    .then(res => res.json())
-    .then(data => {
-        Plotly.newPlot('co2ChartDiv', data.traces, { title: 'Kg CO₂ per kWh Emissions' });
-    })
+const updateCo2Chart = () => {
+    fetchTraces('/get_co2_energy_data', getCo2RequestData())
+    .then(drawCo2Chart)
     .catch(error => {
         console.error('Error fetching data:', error);
     });
 };
 
+// Both charts in one request, e.g. on page load
+function updateAllCharts() {
+    fetchCharts([
+        { id: 'energy', kind: 'usage', ...getRequestData() },
+        { id: 'co2', kind: 'emissions', ...getCo2RequestData() }
+    ])
+    .then(charts => {
+        drawEnergyChart(charts.energy);
+        drawCo2Chart(charts.co2);
+    })
+    .catch(error => {
+        console.error('Error fetching dashboard data:', error);
+    });
+}
+
 // Attach event listener to the filter controls
 document.getElementById('building-select-co2').addEventListener('change', updateCo2Chart);
 document.getElementById('co2-emission').addEventListener('change', updateCo2Chart);
@@ -63,12 +146,8 @@ document.getElementById('end-date-co2').addEventListener('change', updateCo2Char
 // Initial load
 document.addEventListener('DOMContentLoaded', function () {
     document.getElementById('building-select').options[0].selected = true;
-    updateEnergyChart();
-});
-
-document.addEventListener('DOMContentLoaded', function () {
     document.getElementById('building-select-co2').options[0].selected = true;
-    updateCo2Chart();
+    updateAllCharts();
 });
 
 document.getElementById('building-select').addEventListener('change', () => {
@@ -6,7 +6,10 @@ from flask_mail import Message
 from sqlalchemy import select
 
 from app.extensions import db
+from app.forecast import refresh_forecasts
 from app.models import User
+from app.partitions import manage_partitions
+from app.rollups import advance_watermark, reconcile_zone_totals
 from app.utils import send_email
 from app.views.food_expiry import get_updated_daily_discounts
 
@@ -54,6 +57,55 @@ def scheduled_send_discount_email():
             logging.error("SMTP error occurred: %s", str(e))
 
 
+# === Scheduled Task: Maintain energy_readings Partitions ===
+
+def scheduled_manage_partitions(app):
+    """
+    Runs as a scheduled job.
+    Creates upcoming monthly energy_readings partitions and expires old ones
+    according to the ENERGY_PARTITION_* / ENERGY_RETENTION_* settings.
+    """
+    with app.app_context():
+        summary = manage_partitions(
+            months_ahead=app.config['ENERGY_PARTITION_MONTHS_AHEAD'],
+            retention_months=app.config['ENERGY_RETENTION_MONTHS'],
+            action=app.config['ENERGY_RETENTION_ACTION'],
+        )
+        if summary['created'] or summary['expired']:
+            logging.info(f"Partition maintenance: created {summary['created']}, expired {summary['expired']}.")
+
+
+# === Scheduled Task: Reconcile Energy Zone Totals ===
+
+def scheduled_reconcile_zone_totals(app):
+    """
+    Runs as a scheduled job.
+    Re-derives the dashboard's running zone totals from the daily rollups,
+    correcting any drift from the incremental updates made during ingest.
+    Advances the ingest watermark in the same commit, so cached dashboard
+    responses and their ETags pick up the new totals.
+    """
+    with app.app_context():
+        zones = reconcile_zone_totals()
+        advance_watermark()
+        db.session.commit()
+        logging.info(f"Reconciled energy zone totals ({zones} rows).")
+
+
+# === Scheduled Task: Refresh Building Load Forecasts ===
+
+def scheduled_refresh_forecasts(app):
+    """
+    Runs as a scheduled job.
+    Folds the hours completed since the last run into the stored per-building
+    forecast models, so the forecast endpoint never refits.
+    """
+    with app.app_context():
+        hours = refresh_forecasts(history_weeks=app.config['ENERGY_FORECAST_HISTORY_WEEKS'])
+        db.session.commit()
+        logging.info(f"Refreshed energy forecasts ({hours} hours folded in).")
+
+
 # === Helper: Get All User Emails ===
 
 def _get_recipient_emails():
@@ -0,0 +1,136 @@
+import queue
+import threading
+from collections import namedtuple
+
+from app import logger
+
+# === Transports Behind connect_mqtt ===
+# 'mqtt' talks to a real broker (see docker/docker-compose.yaml); 'inprocess'
+# delivers messages through a queue inside the process, for tests and benchmarks.
+TRANSPORTS = ('mqtt', 'inprocess')
+
+# Same attributes the pipeline reads from paho's MQTTMessage
+InProcessMessage = namedtuple('InProcessMessage', 'topic payload')
+
+
+# === MQTT Topic Filters ===
+def topic_matches(topic_filter, topic):
+    """
+    Returns True if `topic` matches an MQTT subscription filter, where '+'
+    matches one level and a trailing '#' matches any number of levels.
+    """
+    filter_levels = topic_filter.split('/')
+    topic_levels = topic.split('/')
+    for index, level in enumerate(filter_levels):
+        if level == '#':
+            return True
+        if index >= len(topic_levels) or (level != '+' and level != topic_levels[index]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+# === In-Process Broker and Client ===
+class InProcessTransport:
+    """
+    A broker and its only client in one object, with the part of the
+    paho.mqtt.client.Client API the IoT pipeline uses: connect, subscribe,
+    publish, loop_start / loop_stop and the on_connect / on_message callbacks.
+
+    Published messages whose topic matches a subscription are queued and handed
+    to `on_message` on the transport's own network thread, as paho does, so the
+    ingest writer sees the same threading as with a real broker. `on_connect`
+    runs inside loop_start, so its subscriptions are in place before anything
+    is published. With `max_queue` set, publish blocks while the queue is full.
+    """
+
+    _STOP = object()  # Sentinel: stop the network thread
+
+    def __init__(self, max_queue=0):
+        self.on_connect = None
+        self.on_message = None
+        self.userdata = None
+        self._subscriptions = []
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.messages_published = 0
+        self.messages_delivered = 0
+        self.messages_dropped = 0  # Published to a topic nobody subscribed to
+
+    # --- Client API ---
+    def connect(self, host=None, port=None, keepalive=60):
+        """Nothing to connect to; accepted so the transport can stand in for paho's client."""
+        return 0
+
+    def subscribe(self, topic, qos=0):
+        with self._lock:
+            if topic not in self._subscriptions:
+                self._subscriptions.append(topic)
+        return 0, None
+
+    def unsubscribe(self, topic):
+        with self._lock:
+            if topic in self._subscriptions:
+                self._subscriptions.remove(topic)
+        return 0, None
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        """Queues a message for delivery; str payloads are UTF-8 encoded like paho's."""
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        with self._lock:
+            self.messages_published += 1
+            subscribed = any(topic_matches(topic_filter, topic) for topic_filter in self._subscriptions)
+            if not subscribed:
+                self.messages_dropped += 1
+        if subscribed:
+            self._queue.put(InProcessMessage(topic, payload or b''))
+
+    # --- Lifecycle ---
+    def loop_start(self):
+        """Runs on_connect, then starts the thread that delivers queued messages."""
+        if self._thread is not None:
+            return
+        if self.on_connect is not None:
+            self.on_connect(self, self.userdata, {}, 0)
+        self._thread = threading.Thread(target=self._run, name='inprocess-transport', daemon=True)
+        self._thread.start()
+
+    def loop_stop(self):
+        """Delivers every message already queued, then stops the network thread."""
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+
+    def disconnect(self):
+        self.loop_stop()
+        return 0
+
+    def wait_until_delivered(self, timeout=None):
+        """
+        Blocks until every message published so far has gone through on_message.
+        Returns False if `timeout` elapses first.
+        """
+        done = threading.Event()
+        threading.Thread(target=lambda: (self._queue.join(), done.set()), daemon=True).start()
+        return done.wait(timeout)
+
+    # --- Network Thread ---
+    def _run(self):
+        while True:
+            msg = self._queue.get()
+            try:
+                if msg is self._STOP:
+                    return
+                if self.on_message is not None:
+                    self.on_message(self, self.userdata, msg)
+                with self._lock:
+                    self.messages_delivered += 1
+            except Exception as e:
+                # paho also logs and carries on when a callback raises
+                logger.error(f"Failed to handle message on {msg.topic}: {e}")
+            finally:
+                self._queue.task_done()
@@ -1,17 +1,9 @@
-import json
-import os
 from datetime import datetime, timedelta
 from random import uniform
 
 from flask import current_app
 from flask_mail import Message, Mail
 
-from app import logger
-
-# === Base Path Setup ===
-# Used to construct paths for accessing static files
-basedir = os.path.abspath(os.path.dirname(__file__))
-
 
 # === Generic Email Sender Utility ===
 
@@ -58,32 +50,6 @@ def send_email(
     mail.send(msg)
 
 
-# === Load Building Metadata for Sensors & Analytics ===
-
-def load_buildings_data():
-    """
-    Loads building metadata from a JSON file (typically used for:
-    - Sensor simulation
-    - Energy analytics visualizations
-
-    Returns:
-        Two lists: university_buildings, accommodation_buildings
-    """
-    file_path = os.path.join(basedir, 'static', 'buildings_data.json')
-
-    try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-            university_buildings = data.get('university_buildings', [])
-            accommodation_buildings = data.get('accommodation_buildings', [])
-    except FileNotFoundError:
-        logger.error(f"File not found: {file_path}")
-        university_buildings = []
-        accommodation_buildings = []
-
-    return university_buildings, accommodation_buildings
-
-
 # === Discount Engine for Expiring Products ===
 
 def discount_applicator(product_instance):
@@ -1,23 +1,43 @@
 from datetime import datetime, timedelta
+from itertools import chain, groupby
+from operator import itemgetter
 
-from flask import Blueprint, request, render_template, jsonify
-from sqlalchemy import func
+import numpy as np
+import sqlalchemy as sa
+from flask import Blueprint, Response, current_app, request, render_template, jsonify, stream_with_context
 
 from app import db
-from app.models import EnergyReading
+from app.anomalies import recent_alerts
+from app.buildings import get_registry
+from app.cache import cached_response, cached_value
+from app.chart_scans import CHART_KINDS, ChartSpec, chart_series
+from app.columnar import COLUMNAR_MIMETYPE, encode_trace
+from app.downsampling import EPOCH, downsample_series, format_timestamps
+from app.emissions import daily_emissions
+from app.forecast import FORECAST_HOURS, building_forecast
+from app.load_profiles import load_profile
+from app.models import (ENERGY_CATEGORIES, ENERGY_CATEGORY_CODES, Building, EnergyReading, EnergyRollupHourly,
+                        EnergyZoneTotal)
 
 # === Blueprint Setup ===
 energy_bp = Blueprint('energy_dash', __name__)
 
+# Rows fetched per round trip when streaming trace readings
+TRACE_FETCH_BATCH = 10_000
+
+# Most alerts returned by one /energy_alerts request
+MAX_ALERTS = 1000
+
 
 # === Route: Energy Analytics Dashboard (GET) ===
 @energy_bp.route('/energy_analytics', methods=['GET'])
 def energy_dashboard():
     """
     Renders the energy dashboard with electricity and gas usage aggregated by zone.
+    The zone totals are cached until the next ingest batch (see app.cache).
     """
     buildings = get_building_names()
-    electricity_usage, gas_usage = get_energy_usage_by_zone()
+    electricity_usage, gas_usage = cached_value('zone_totals', get_energy_usage_by_zone)
 
     total_usage_by_zones = {
         'electricity_usage': {
@@ -41,16 +61,55 @@ def energy_dashboard():
 def get_line_chart_view():
     """
     Returns energy usage time-series traces for selected buildings and date range.
+
+    `time_range` ('daily', 'weekly', 'monthly') selects a window ending now;
+    'custom' uses start_date / end_date. Each trace is downsampled to at most
+    `max_points` points (capped at ENERGY_TRACE_MAX_POINTS).
+
+    Clients can opt in to the compact columnar encoding (app.columnar) with
+    `Accept: application/vnd.greencampus.columnar+json` or `"encoding": "columnar"`.
+    With `"stream": true` the body is written trace by trace as rows are read
+    (traces then follow database order rather than request order), so worker
+    memory stays flat however many traces are requested.
+
+    Other responses are cached per normalised request until the next ingest
+    batch and carry an ETag for If-None-Match revalidation (see app.cache).
     """
     data = request.get_json()
     buildings = data.get('buildings', [])
     energy_type = data.get('energy_type', 'both')
-    time_range = data.get('time_range', 'daily')  # Not currently used
+    time_range = data.get('time_range', 'custom')
     start_date = data.get('start_date')
     end_date = data.get('end_date')
+    max_points = _max_points(data.get('max_points'))
+    try:
+        start, stop = resolve_time_range(time_range, start_date, end_date)
+    except ValueError:
+        return jsonify({'error': DATE_RANGE_ERROR}), 400
+
+    if data.get('stream'):
+        columnar = _wants_columnar(data)
+        encode = encode_trace if columnar else _json_trace
+        traces = (
+            encode(_trace_name(building, etype), seconds, values)
+            for building, etype, seconds, values in iter_trace_series(
+                buildings, energy_type, start_date, end_date, time_range, max_points)
+        )
+        return _streamed_response(traces, columnar)
 
-    traces = get_traces(buildings, energy_type, start_date, end_date)
-    return jsonify({'traces': traces})
+    columnar = _wants_columnar(data)
+    params = {'buildings': buildings, 'energy_type': energy_type, 'start': start, 'stop': stop,
+              'max_points': max_points, 'columnar': columnar}
+
+    def build():
+        if columnar:
+            series = get_trace_series(buildings, energy_type, start_date, end_date, time_range, max_points)
+            return _columnar_response([encode_trace(name, seconds, values) for name, seconds, values in series])
+        traces = get_traces(buildings, energy_type, start_date, end_date, time_range=time_range,
+                            max_points=max_points)
+        return jsonify({'traces': traces})
+
+    return cached_response('energy', params, build)
 
 
 # === Route: Fetch Line Chart Data for CO2 Emissions (POST) ===
@@ -58,123 +117,435 @@ def get_line_chart_view():
 def get_emissions_line_chart_view():
     """
     Returns CO₂ emission traces derived from energy usage data.
+
+    Emissions come from app.emissions: one grouped query over the daily rollups
+    using the versioned factors in emission_factors. Every trace shares the same
+    daily x-axis; days without readings are null, which Plotly draws as gaps.
+    `time_range` selects the days like /get_energy_data, and the endpoint supports
+    the same opt-in columnar encoding and caching.
     """
     data = request.get_json()
     buildings = data.get('buildings', [])
     energy_type = data.get('energy_type', 'both')
-    time_range = data.get('time_range', 'monthly')  # Not used
+    time_range = data.get('time_range', 'custom')
     start_date = data.get('start_date')
     end_date = data.get('end_date')
 
-    CO2_FACTORS = {
-        'electricity': 0.233,  # kg CO₂ per kWh
-        'gas': 0.184
+    energy_types = _energy_types(energy_type)
+    try:
+        start, stop = resolve_time_range(time_range, start_date, end_date)
+    except ValueError:
+        return jsonify({'error': DATE_RANGE_ERROR}), 400
+    columnar = _wants_columnar(data)
+    params = {'buildings': buildings, 'energy_types': energy_types, 'start': start, 'stop': stop,
+              'columnar': columnar}
+
+    def build():
+        days, series = daily_emissions(buildings, energy_types, start, stop)
+        traces = _emission_traces(buildings, days, series, columnar)
+        return _columnar_response(traces) if columnar else jsonify({'traces': traces})
+
+    return cached_response('co2', params, build)
+
+
+# === Route: Several Dashboard Charts in One Request (POST) ===
+@energy_bp.route('/get_dashboard_data', methods=['POST'])
+def get_dashboard_data():
+    """
+    Returns several charts in one response, keyed by each spec's `id`:
+    {"charts": {id: {"traces": [...]}}}.
+
+    `charts` is a list of specs shaped like the /get_energy_data body
+    (`"kind": "usage"`) or the /get_co2_energy_data body (`"kind": "emissions"`).
+    Charts over overlapping ranges are planned onto shared scans (see
+    app.chart_scans), so usage and emissions for the same buildings and dates
+    come from a single grouped pass. Supports the columnar encoding and caching
+    of the single-chart endpoints.
+    """
+    data = request.get_json()
+    try:
+        charts = [_chart_spec(index, spec) for index, spec in enumerate(data.get('charts', []))]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    columnar = _wants_columnar(data)
+
+    def build():
+        series = chart_series(charts, current_app.config['ENERGY_RAW_TRACE_MAX_DAYS'])
+        payload = {chart.id: {'traces': _chart_traces(chart, series[chart.id], columnar)} for chart in charts}
+        if columnar:
+            response = jsonify({'encoding': 'columnar', 'charts': payload})
+            response.mimetype = COLUMNAR_MIMETYPE
+            return response
+        return jsonify({'charts': payload})
+
+    return cached_response('dashboard', {'charts': [chart._asdict() for chart in charts], 'columnar': columnar},
+                           build)
+
+
+def _chart_spec(index, spec):
+    """Normalises one requested chart into a ChartSpec, resolving its date range like the single-chart endpoints."""
+    kind = spec.get('kind')
+    if kind not in CHART_KINDS:
+        raise ValueError(f"Chart {index}: 'kind' must be one of {', '.join(CHART_KINDS)}")
+
+    energy_type = spec.get('energy_type', 'both')
+    start, stop = resolve_time_range(spec.get('time_range', 'custom'), spec.get('start_date'), spec.get('end_date'))
+    max_points = _max_points(spec.get('max_points')) if kind == 'usage' else None
+    return ChartSpec(str(spec.get('id', index)), kind, list(spec.get('buildings', [])), _energy_types(energy_type),
+                     start, stop, max_points)
+
+
+def _chart_traces(chart, series, columnar):
+    """Encodes a chart's series as the matching single-chart endpoint would."""
+    if chart.kind == 'usage':
+        encode = encode_trace if columnar else _json_trace
+        return [encode(_trace_name(building, etype), seconds, values) for building, etype, seconds, values in series]
+
+    return _emission_traces(chart.buildings, *series, columnar)
+
+
+def _emission_traces(buildings, days, series, columnar):
+    """Daily CO₂ traces per building; NaN days become JSON nulls, which Plotly draws as gaps."""
+    if columnar:
+        seconds = days.astype('datetime64[s]').astype(np.int64)
+        return [encode_trace(f"{building} - Total CO₂ Emissions", seconds, series[building]) for building in buildings]
+
+    x_vals = np.datetime_as_string(days).tolist()
+    return [
+        _plotly_trace(f"{building} - Total CO₂ Emissions", x_vals,
+                      np.where(np.isnan(series[building]), None, series[building]).tolist())
+        for building in buildings
+    ]
+
+
+# === Route: List Anomaly Alerts (GET) ===
+@energy_bp.route('/energy_alerts', methods=['GET'])
+def get_energy_alerts():
+    """
+    Returns the newest readings flagged by the ingest anomaly detector (app.anomalies).
+
+    Query parameters: `building` (name), `since` ('YYYY-MM-DD') and `limit`
+    (default 100, at most MAX_ALERTS).
+    """
+    registry = get_registry()
+    building_id = None
+    if request.args.get('building'):
+        building_id = registry.id_for(request.args['building'])
+        if building_id is None:
+            return jsonify({'error': f"Unknown building: {request.args['building']}"}), 404
+
+    since = request.args.get('since')
+    try:
+        since = datetime.strptime(since, '%Y-%m-%d') if since else None
+    except ValueError:
+        return jsonify({'error': "'since' must be a YYYY-MM-DD date"}), 400
+    limit = max(1, min(request.args.get('limit', 100, type=int), MAX_ALERTS))
+
+    alerts = [
+        {
+            'timestamp': alert.timestamp.isoformat(sep=' '),
+            'building': alert.building.name,  # Stored row: the building may since have left buildings_data.json
+            'category': alert.category,
+            'value': alert.value,
+            'expected': round(alert.expected, 2),
+            'z_score': round(alert.z_score, 2),
+        }
+        for alert in recent_alerts(limit, building_id, since)
+    ]
+    return jsonify({'alerts': alerts})
+
+
+# === Route: Building Baseline and Forecast (GET) ===
+@energy_bp.route('/energy_forecast', methods=['GET'])
+def get_energy_forecast():
+    """
+    Returns the expected-load baseline and the next-24-hour forecast (with a
+    ±2σ band) for a building, per energy type, hourly from the current hour.
+
+    Reads the models fitted by the hourly refresh job (app.forecast); hours
+    the model has no history for are null.
+    """
+    name = request.args.get('building', '')
+    building_id = get_registry().id_for(name)
+    if building_id is None:
+        return jsonify({'error': f"Unknown building: {name}"}), 404
+
+    start, forecasts = building_forecast(building_id)
+    seconds = int((start - EPOCH).total_seconds()) + 3600 * np.arange(FORECAST_HOURS)
+    return jsonify({
+        'building': name,
+        'hours': format_timestamps(seconds),
+        'forecasts': {
+            category: {key: np.where(np.isnan(series), None, np.round(series, 2)).tolist()
+                       for key, series in series_by_key.items()}
+            for category, series_by_key in forecasts.items()
+        }
+    })
+
+
+# === Route: Peak Demand, Load Factor and Load Duration (GET) ===
+@energy_bp.route('/energy_load_profile', methods=['GET'])
+def get_energy_load_profile():
+    """
+    Returns a building's peak 5-minute demand (and the hour it occurred), load
+    factor, demand percentiles and load-duration curve per energy type.
+
+    Query parameters: `building` (name), `energy_type` and `start_date` /
+    `end_date` ('YYYY-MM-DD', default the last 30 days). Computed from the
+    daily rollups and load histograms (app.load_profiles), never from raw
+    readings, and cached until the next ingest batch.
+    """
+    name = request.args.get('building', '')
+    building_id = get_registry().id_for(name)
+    if building_id is None:
+        return jsonify({'error': f"Unknown building: {name}"}), 404
+    try:
+        start, stop = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+    except ValueError:
+        return jsonify({'error': DATE_RANGE_ERROR}), 400
+    energy_types = _energy_types(request.args.get('energy_type', 'both'))
+
+    def build():
+        profiles = load_profile(building_id, energy_types, start, stop)
+        return jsonify({
+            'building': name,
+            'profiles': {category: _load_profile_json(profile) for category, profile in profiles.items()}
+        })
+
+    return cached_response('load_profile', {'building': name, 'energy_types': energy_types,
+                                            'start': start, 'stop': stop}, build)
+
+
+def _load_profile_json(profile):
+    percent_of_time, demand = profile['load_duration']
+    return {
+        'readings': profile['readings'],
+        'average': round(profile['average'], 2),
+        'peak': {'value': round(profile['peak']['value'], 2), 'hour': profile['peak']['hour'].isoformat(sep=' ')},
+        'load_factor': None if profile['load_factor'] is None else round(profile['load_factor'], 3),
+        'percentiles': {key: None if value is None else round(value, 2)
+                        for key, value in profile['percentiles'].items()},
+        'load_duration': {'percent_of_time': np.round(percent_of_time, 2).tolist(),
+                          'demand': np.round(demand, 2).tolist()},
     }
 
-    traces = []
 
-    # Parse date range
+# === Helper: Columnar Responses ===
+def _wants_columnar(data):
+    """True when the client asked for the columnar encoding via the request body or Accept header."""
+    if data.get('encoding') == 'columnar':
+        return True
+    return request.accept_mimetypes.best_match(['application/json', COLUMNAR_MIMETYPE]) == COLUMNAR_MIMETYPE
+
+
+def _columnar_response(traces):
+    response = jsonify({'encoding': 'columnar', 'traces': traces})
+    response.mimetype = COLUMNAR_MIMETYPE
+    response.vary.add('Accept')
+    return response
+
+
+# === Helper: Streamed Responses ===
+def _streamed_response(traces, columnar):
+    """
+    Writes {"traces": [...]} (plus the columnar marker) one trace at a time.
+    `traces` must be a lazy iterable: it is consumed while the response is sent,
+    inside the request context kept alive by stream_with_context.
+    """
+    def generate():
+        yield '{"encoding": "columnar", "traces": [' if columnar else '{"traces": ['
+        for index, trace in enumerate(traces):
+            yield (',' if index else '') + current_app.json.dumps(trace, separators=(',', ':'))
+        yield ']}'
+
+    response = Response(stream_with_context(generate()),
+                        mimetype=COLUMNAR_MIMETYPE if columnar else 'application/json')
+    response.vary.add('Accept')
+    return response
+
+
+# === Helper: Expand a Requested Energy Type ===
+def _energy_types(energy_type):
+    """Returns the categories for 'both' or a single type, ignoring unknown types."""
+    energy_types = ['electricity', 'gas'] if energy_type == 'both' else [energy_type]
+    return [etype for etype in energy_types if etype in ENERGY_CATEGORY_CODES]
+
+
+# === Helper: Parse a Requested Date Range ===
+DATE_RANGE_ERROR = "'start_date' and 'end_date' must be YYYY-MM-DD dates"  # 400 body when parse_date_range fails
+
+
+def parse_date_range(start_date, end_date):
+    """
+    Turns 'YYYY-MM-DD' start/end dates into a half-open [start, stop) datetime range
+    that includes the whole end day; defaults to the 30 days up to the current
+    minute (truncated so repeated requests share a cache key).
+
+    Filters compare the raw timestamp column against these constants, so on
+    PostgreSQL the planner prunes every monthly partition outside the range.
+    """
     if start_date and end_date:
-        start_date = datetime.strptime(start_date, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date, '%Y-%m-%d')
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        stop = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
     else:
-        end_date = datetime.today()
-        start_date = end_date - timedelta(days=30)
-
-    # Loop through buildings and fetch daily total emissions
-    for building in buildings:
-        emissions_by_time = {}
-        energy_types = ['electricity', 'gas'] if energy_type == 'both' else [energy_type]
-
-        for etype in energy_types:
-            readings = db.session.query(
-                func.date(EnergyReading.timestamp).label('date'),
-                func.sum(EnergyReading.value).label('value')
-            ).filter(
-                EnergyReading.building == building,
-                EnergyReading.category == etype,
-                EnergyReading.timestamp >= start_date,
-                EnergyReading.timestamp <= end_date
-            ).group_by(
-                func.date(EnergyReading.timestamp)
-            ).order_by(
-                func.date(EnergyReading.timestamp)
-            ).all()
-
-            for date, total_value in readings:
-                date_str = date.strftime('%Y-%m-%d')
-                emissions = total_value * CO2_FACTORS.get(etype, 0)
-                emissions_by_time[date_str] = emissions_by_time.get(date_str, 0) + emissions
-
-        traces.append({
-            'x': list(emissions_by_time.keys()),
-            'y': list(emissions_by_time.values()),
-            'type': 'scatter',
-            'mode': 'lines',
-            'name': f"{building} - Total CO₂ Emissions"
-        })
+        stop = _this_minute()
+        start = stop - timedelta(days=30)
+    return start, stop
+
+
+# === Helper: Resolve a Named Time Range ===
+TIME_RANGE_DAYS = {'daily': 1, 'weekly': 7, 'monthly': 30}
+
+
+def resolve_time_range(time_range, start_date, end_date):
+    """
+    Returns the [start, stop) range for a dashboard time range: the last day, week
+    or month up to the current minute for the named ranges, otherwise the custom
+    start/end dates.
+    """
+    if time_range in TIME_RANGE_DAYS:
+        stop = _this_minute()
+        return stop - timedelta(days=TIME_RANGE_DAYS[time_range]), stop
+    return parse_date_range(start_date, end_date)
+
+
+def _this_minute():
+    return datetime.today().replace(second=0, microsecond=0)
+
 
-    return jsonify({'traces': traces})
+# === Helper: Clamp the Requested Points per Trace ===
+def _max_points(requested):
+    """
+    Returns the requested points per trace within [3, ENERGY_TRACE_MAX_POINTS],
+    falling back to the maximum when absent or not a number.
+    """
+    limit = current_app.config['ENERGY_TRACE_MAX_POINTS']
+    try:
+        return max(3, min(int(requested), limit))
+    except (TypeError, ValueError):
+        return limit
 
 
 # === Helper: Get Time-Series Energy Traces ===
-def get_traces(buildings, energy_type, start_date, end_date):
+def get_traces(buildings, energy_type, start_date, end_date, time_range=None, max_points=None):
     """
-    Returns line chart data for energy usage per building.
+    Returns line chart data for energy usage per building, as Plotly traces with
+    'YYYY-MM-DD HH:MM:SS' x labels (see get_trace_series).
     """
-    if start_date and end_date:
-        start_date = datetime.strptime(start_date, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date, '%Y-%m-%d')
-    else:
-        end_date = datetime.today()
-        start_date = end_date - timedelta(days=30)
-
-    traces = []
-
-    for building in buildings:
-        energy_types = ['electricity', 'gas'] if energy_type == 'both' else [energy_type]
-
-        for etype in energy_types:
-            readings = (
-                db.session.query(EnergyReading)
-                .filter(
-                    EnergyReading.building == building,
-                    EnergyReading.category == etype,
-                    EnergyReading.timestamp >= start_date,
-                    EnergyReading.timestamp <= end_date
-                )
-                .order_by(EnergyReading.timestamp)
-                .all()
-            )
-
-            if readings:
-                x_vals = [r.timestamp.strftime('%Y-%m-%d %H:%M:%S') for r in readings]
-                y_vals = [r.value for r in readings]
-
-                traces.append({
-                    'x': x_vals,
-                    'y': y_vals,
-                    'type': 'scatter',
-                    'mode': 'lines',
-                    'name': f"{building} - {etype.capitalize()}"
-                })
-
-    return traces
+    return [
+        _json_trace(name, seconds, values)
+        for name, seconds, values in get_trace_series(buildings, energy_type, start_date, end_date,
+                                                      time_range, max_points)
+    ]
+
+
+def get_trace_series(buildings, energy_type, start_date, end_date, time_range=None, max_points=None):
+    """
+    Returns [(trace name, epoch seconds, values)] energy usage series per building
+    and type, in request order, with NumPy arrays for the points (see iter_trace_series).
+    """
+    series = {
+        (building, etype): (seconds, values)
+        for building, etype, seconds, values in iter_trace_series(buildings, energy_type, start_date, end_date,
+                                                                  time_range, max_points)
+    }
+    return [
+        (_trace_name(building, etype), *series[building, etype])
+        for building in buildings for etype in _energy_types(energy_type) if (building, etype) in series
+    ]
+
+
+def iter_trace_series(buildings, energy_type, start_date, end_date, time_range=None, max_points=None):
+    """
+    Yields (building, category, epoch seconds, values) per trace as soon as its
+    rows have been read, in database order (building id, then category), so
+    only one trace is held in memory at a time.
+
+    Ranges longer than ENERGY_RAW_TRACE_MAX_DAYS are drawn from the hourly rollups
+    (mean reading per hour, so the y-axis matches the raw readings) instead of
+    every raw 5-minute reading. Series longer than `max_points` (default
+    ENERGY_TRACE_MAX_POINTS) are reduced with LTTB downsampling, which keeps peaks
+    and troughs, so the payload and chart stay bounded for any range.
+    """
+    start, stop = resolve_time_range(time_range, start_date, end_date)
+    max_points = max_points or current_app.config['ENERGY_TRACE_MAX_POINTS']
+    hourly = stop - start > timedelta(days=current_app.config['ENERGY_RAW_TRACE_MAX_DAYS'])
+    energy_types = _energy_types(energy_type)
+    if not buildings or not energy_types:
+        return
+
+    # Core execution skips ORM row processing; yield_per streams through a server-side cursor on PostgreSQL
+    query = _hourly_series if hourly else _raw_series
+    result = db.session.connection().execute(
+        query(buildings, energy_types, start, stop).execution_options(yield_per=TRACE_FETCH_BATCH)
+    )
+    rows = chain.from_iterable(result.partitions())
+
+    # Rows arrive grouped by (building, category code), so each trace is split off in one pass
+    for (building, code), group in groupby(rows, key=itemgetter(0, 1)):
+        _, _, timestamps, values = zip(*group)
+        yield building, ENERGY_CATEGORIES[code], *downsample_series(timestamps, values, max_points)
+
+
+def _trace_name(building, etype):
+    return f"{building} - {etype.capitalize()}"
+
+
+def _plotly_trace(name, x_vals, y_vals):
+    return {'x': x_vals, 'y': y_vals, 'type': 'scatter', 'mode': 'lines', 'name': name}
+
+
+def _json_trace(name, seconds, values):
+    return _plotly_trace(name, format_timestamps(seconds), values.tolist())
+
+
+def _raw_series(buildings, energy_types, start, stop):
+    """
+    Selects (building, category code, timestamp, value) raw readings for all
+    requested traces, ordered like the (building_id, category, timestamp) index.
+    Category codes are left undecoded so rows skip per-value type processing.
+    """
+    return (
+        sa.select(Building.name, sa.type_coerce(EnergyReading.category, sa.SmallInteger),
+                  EnergyReading.timestamp, EnergyReading.value)
+        .join(Building, Building.id == EnergyReading.building_id)
+        .where(
+            Building.name.in_(buildings),
+            EnergyReading.category.in_(energy_types),
+            EnergyReading.timestamp >= start,
+            EnergyReading.timestamp < stop
+        )
+        .order_by(EnergyReading.building_id, EnergyReading.category, EnergyReading.timestamp)
+    )
+
+
+def _hourly_series(buildings, energy_types, start, stop):
+    """
+    Selects (building, category code, hour, mean reading) rows from the hourly rollups for all requested traces.
+    """
+    return (
+        sa.select(Building.name, sa.type_coerce(EnergyRollupHourly.category, sa.SmallInteger),
+                  EnergyRollupHourly.bucket, EnergyRollupHourly.total / EnergyRollupHourly.count)
+        .join(Building, Building.id == EnergyRollupHourly.building_id)
+        .where(
+            Building.name.in_(buildings),
+            EnergyRollupHourly.category.in_(energy_types),
+            EnergyRollupHourly.bucket >= start.replace(minute=0, second=0, microsecond=0),
+            EnergyRollupHourly.bucket < stop
+        )
+        .order_by(EnergyRollupHourly.building_id, EnergyRollupHourly.category, EnergyRollupHourly.bucket)
+    )
 
 
 # === Helper: Get Aggregated Energy Usage by Zone ===
 def get_energy_usage_by_zone():
     """
-    Returns total electricity and gas usage grouped by zone.
+    Returns total electricity and gas usage grouped by zone, read from the
+    running totals in energy_zone_totals rather than summed over every reading.
     """
     results = (
-        db.session.query(
-            EnergyReading.zone,
-            EnergyReading.category,
-            func.sum(EnergyReading.value).label('total_usage')
-        )
-        .filter(EnergyReading.building_code != "")
-        .group_by(EnergyReading.zone, EnergyReading.category)
+        db.session.query(EnergyZoneTotal.zone, EnergyZoneTotal.category, EnergyZoneTotal.total)
+        .order_by(EnergyZoneTotal.zone)
         .all()
     )
 
@@ -194,10 +565,7 @@ def get_energy_usage_by_zone():
 # === Helper: Get Unique Building Names (non-empty codes only) ===
 def get_building_names():
     """
-    Returns a list of distinct building names from the EnergyReading table.
+    Returns the university building names (those with a building code) from the
+    shared BuildingRegistry, avoiding a SELECT DISTINCT over all readings.
     """
-    buildings = db.session.query(EnergyReading.building)\
-        .filter(EnergyReading.building_code != "")\
-        .distinct().all()
-
-    return [building[0] for building in buildings if building[0]]
+    return get_registry().building_names()
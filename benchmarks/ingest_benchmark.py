@@ -0,0 +1,114 @@
+"""
+Ingest benchmark: compares the per-object ORM write path with the bulk writer
+and with the deduplicating upsert the ingest writer uses.
+
+Usage:
+    python -m benchmarks.ingest_benchmark --rows 20000 --batch-size 200
+    python -m benchmarks.ingest_benchmark --database-uri postgresql://user:pw@localhost/db
+
+Rows are written for registered buildings at timestamps in the year 2000 and
+deleted after each run, so the benchmark can be pointed at a development database.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.buildings import get_registry, sync_buildings
+from app.ingest import bulk_insert_readings, upsert_readings
+from app.models import EnergyReading
+
+BENCHMARK_START = datetime(2000, 1, 1)
+BENCHMARK_END = datetime(2001, 1, 1)
+
+
+# === Synthetic Reading Tuples ===
+def make_rows(count):
+    """
+    Builds `count` reading tuples spread over 5-minute intervals for every registered sensor.
+    """
+    building_ids = [sensor.id for sensor in get_registry().sensors()]
+    per_tick = 2 * len(building_ids)
+    return [
+        (
+            BENCHMARK_START + timedelta(minutes=5 * (i // per_tick)),
+            building_ids[(i // 2) % len(building_ids)],
+            'electricity' if i % 2 else 'gas',
+            round(random.uniform(50, 600), 2)
+        )
+        for i in range(count)
+    ]
+
+
+# === Write Paths Under Test ===
+def orm_path(rows):
+    """Previous behaviour: one EnergyReading object per row, committed with add_all."""
+    db.session.add_all([
+        EnergyReading(timestamp=ts, building_id=building_id, category=category, value=value)
+        for ts, building_id, category, value in rows
+    ])
+    db.session.commit()
+
+
+def bulk_path(rows):
+    """Bulk writer: COPY on PostgreSQL, multi-row INSERT elsewhere."""
+    bulk_insert_readings(rows)
+    db.session.commit()
+
+
+def upsert_path(rows):
+    """Ingest writer: bulk upsert that drops readings already stored (staged COPY + ON CONFLICT on PostgreSQL)."""
+    upsert_readings(rows, 'ignore')
+    db.session.commit()
+
+
+def run(write_batch, rows, batch_size):
+    """
+    Feeds rows to `write_batch` in ingest-sized batches and returns rows per second.
+    """
+    started = time.perf_counter()
+    for start in range(0, len(rows), batch_size):
+        write_batch(rows[start:start + batch_size])
+    elapsed = time.perf_counter() - started
+    return len(rows) / elapsed if elapsed else float('inf')
+
+
+def cleanup():
+    """Removes every row written by the benchmark."""
+    db.session.query(EnergyReading).filter(
+        EnergyReading.timestamp >= BENCHMARK_START,
+        EnergyReading.timestamp < BENCHMARK_END
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000, help='Total rows written per path')
+    parser.add_argument('--batch-size', type=int, default=200, help='Rows per commit (matches BATCH_SIZE)')
+    parser.add_argument('--database-uri', default='sqlite:///:memory:', help='SQLAlchemy database URI')
+    args = parser.parse_args()
+
+    app = create_app(test_config={'SQLALCHEMY_DATABASE_URI': args.database_uri})
+
+    with app.app_context():
+        db.create_all()
+        sync_buildings()
+        rows = make_rows(args.rows)
+        results = {}
+        for name, path in (('orm add_all', orm_path), ('bulk writer', bulk_path), ('bulk upsert', upsert_path)):
+            results[name] = run(path, rows, args.batch_size)
+            cleanup()
+        dialect = db.engine.dialect.name
+
+    print(f"Database: {dialect}")
+    print(f"Rows: {args.rows}, batch size: {args.batch_size}")
+    for name, rate in results.items():
+        print(f"  {name:<12} {rate:>12,.0f} rows/s")
+    print(f"  speed-up     {results['bulk writer'] / results['orm add_all']:>12.1f}x")
+    print(f"  upsert cost  {results['bulk writer'] / results['bulk upsert']:>12.2f}x of the plain bulk writer's time")
+
+
+if __name__ == '__main__':
+    main()
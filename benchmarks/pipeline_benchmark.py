@@ -0,0 +1,169 @@
+"""
+Pipeline benchmark: replays simulated sensors through the real ingest path.
+
+Messages go over the in-process transport into iot_simulator.on_message and the
+IngestWriter (decoding, bulk insert, rollups, anomaly scoring, commit), so no
+MQTT broker is needed.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark --sensors 500 --cycles 200
+    python -m benchmarks.pipeline_benchmark --mode json --rate 2 --batch-size 500
+    python -m benchmarks.pipeline_benchmark --database-uri postgresql://user:pw@localhost/db
+
+Each publish cycle sends one reading per sensor and energy type, stamped 5
+minutes after the previous cycle; --rate caps the cycles published per second
+(0 publishes as fast as possible). Reports messages per second through
+on_message, commit latency percentiles and database rows per second.
+
+Readings are written at timestamps in the year 2000 and deleted afterwards (the
+rollups for that year are rebuilt empty), so the benchmark can be pointed at a
+development database.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app import create_app, db
+from app.buildings import get_registry, sync_buildings
+from app.iot_simulator import TOPIC_ELECTRICITY, TOPIC_GAS, batch_topic, generate_readings, start_ingest
+from app.models import EnergyAlert, EnergyReading
+from app.rollups import rebuild_rollups
+from app.sensor_payload import encode_batch
+from app.transport import InProcessTransport
+
+BENCHMARK_START = datetime(2000, 1, 1)
+BENCHMARK_END = datetime(2001, 1, 1)
+CYCLE = timedelta(minutes=5)
+ENERGY_TYPES = ('electricity', 'gas')
+
+
+# === Replayed Messages ===
+def make_messages(sensors, cycles, mode, seed=None):
+    """
+    Builds every (topic, payload) the sensors publish in `cycles` publish
+    cycles, one list per cycle, so message building is not timed.
+    """
+    timestamps = [BENCHMARK_START + cycle * CYCLE for cycle in range(cycles)]
+    rng = np.random.default_rng(seed)
+    values = {energy_type: generate_readings(energy_type, timestamps, len(sensors), rng).tolist()
+              for energy_type in ENERGY_TYPES}
+
+    groups = {}
+    for index, sensor in enumerate(sensors):
+        groups.setdefault(sensor.group, []).append(index)
+
+    messages = []
+    for cycle, timestamp in enumerate(timestamps):
+        batch = []
+        for energy_type in ENERGY_TYPES:
+            readings = values[energy_type][cycle]
+            if mode == 'batch':
+                for group, indexes in groups.items():
+                    batch.append((batch_topic(energy_type, group), encode_batch(
+                        energy_type, timestamp, [sensors[i].id for i in indexes], [readings[i] for i in indexes]
+                    )))
+                continue
+            topic = TOPIC_ELECTRICITY if energy_type == 'electricity' else TOPIC_GAS
+            for sensor, value in zip(sensors, readings):
+                batch.append((topic, json.dumps({
+                    'timestamp': timestamp.isoformat() + '+00:00',
+                    'building': sensor.name,
+                    'building_code': sensor.code,
+                    'zone': sensor.zone,
+                    'value': value,
+                })))
+        messages.append(batch)
+    return messages
+
+
+# === Replay ===
+def replay(app, messages, rate, batch_size):
+    """
+    Publishes the cycles through an in-process transport wired to a fresh
+    IngestWriter and waits until everything is committed. Returns the results.
+    """
+    client = InProcessTransport()
+    writer = start_ingest(app, client, batch_size=batch_size, timing_window=None)  # Keep every commit's timing
+
+    started = time.perf_counter()
+    for index, cycle in enumerate(messages):
+        for topic, payload in cycle:
+            client.publish(topic, payload)
+        if rate:
+            time.sleep(max(0.0, started + (index + 1) / rate - time.perf_counter()))
+    client.wait_until_delivered()
+    delivered = time.perf_counter() - started
+    client.loop_stop()
+    writer.close()
+    committed = time.perf_counter() - started
+
+    stats = writer.stats()
+    timings = np.array(writer.flush_timings) * 1000
+    return {
+        'messages': client.messages_delivered,
+        'messages_per_s': client.messages_delivered / delivered if delivered else float('inf'),
+        'rows': stats['rows_written'],
+        'rows_failed': stats['rows_failed'],
+        'rows_duplicate': stats['rows_duplicate'],
+        'rows_per_s': stats['rows_written'] / committed if committed else float('inf'),
+        'batches': stats['batches_written'],
+        'backpressure_waits': stats['backpressure_waits'],
+        'commit_ms': dict(zip(('p50', 'p95', 'p99', 'max'), np.percentile(timings, [50, 95, 99, 100])))
+        if len(timings) else {},
+    }
+
+
+def cleanup():
+    """Removes every reading and alert written by the benchmark and empties its rollups."""
+    for model in (EnergyReading, EnergyAlert):
+        db.session.query(model).filter(
+            model.timestamp >= BENCHMARK_START,
+            model.timestamp < BENCHMARK_END
+        ).delete(synchronize_session=False)
+    rebuild_rollups(BENCHMARK_START, BENCHMARK_END - timedelta(days=1))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sensors', type=int, default=0, help='Registered sensors to replay (0: all of them)')
+    parser.add_argument('--cycles', type=int, default=100, help='Publish cycles (5 simulated minutes each)')
+    parser.add_argument('--rate', type=float, default=0, help='Publish cycles per second (0: unthrottled)')
+    parser.add_argument('--mode', choices=('batch', 'json'), default='batch', help='Payload format')
+    parser.add_argument('--batch-size', type=int, default=200, help='Rows per commit (matches BATCH_SIZE)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for the replayed readings')
+    parser.add_argument('--database-uri', default='sqlite:///:memory:', help='SQLAlchemy database URI')
+    args = parser.parse_args()
+
+    app = create_app(test_config={'SQLALCHEMY_DATABASE_URI': args.database_uri})
+
+    with app.app_context():
+        db.create_all()
+        sync_buildings()
+        sensors = get_registry().sensors()
+        if args.sensors > len(sensors):
+            parser.error(f"--sensors: only {len(sensors)} sensors are registered")
+        sensors = sensors[:args.sensors or len(sensors)]
+        messages = make_messages(sensors, args.cycles, args.mode, args.seed)
+        dialect = db.engine.dialect.name
+
+    results = replay(app, messages, args.rate, args.batch_size)
+    with app.app_context():
+        cleanup()
+
+    print(f"Database: {dialect}, payload mode: {args.mode}")
+    print(f"Sensors: {len(sensors)}, cycles: {args.cycles}, rate: {args.rate or 'unthrottled'}, "
+          f"batch size: {args.batch_size}")
+    print(f"  messages     {results['messages']:>12,} ({results['messages_per_s']:,.0f} msg/s)")
+    print(f"  rows         {results['rows']:>12,} ({results['rows_per_s']:,.0f} rows/s, "
+          f"{results['rows_failed']:,} failed, {results['rows_duplicate']:,} duplicates)")
+    print(f"  commits      {results['batches']:>12,} ({results['backpressure_waits']:,} backpressure waits)")
+    for name, value in results['commit_ms'].items():
+        print(f"  commit {name:<5} {value:>12.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
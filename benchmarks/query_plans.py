@@ -0,0 +1,193 @@
+"""
+Query-plan benchmark for the energy analytics queries.
+
+Grows energy_readings in a scratch PostgreSQL schema to each requested size and,
+with and without the analytics indexes, runs the real analytics helpers while
+capturing the SQL they issue. Every captured statement is then re-run under
+EXPLAIN (ANALYZE, BUFFERS) and its execution time and top plan node reported.
+
+Usage:
+    python -m benchmarks.query_plans --database-uri postgresql://user:pw@localhost/db
+    python -m benchmarks.query_plans --database-uri ... --sizes 1000000 10000000 50000000
+
+The scratch schema is dropped afterwards unless --keep is given.
+"""
+import argparse
+import json
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import sqlalchemy as sa
+
+from app import create_app, db
+from app.buildings import sync_buildings
+from app.emissions import seed_emission_factors
+from app.models import Building, EnergyReading
+from app.rollups import rebuild_rollups
+from app.views import energy_analytics
+
+INDEX_DDL = {
+    'ix_energy_readings_building_category_timestamp':
+        "CREATE UNIQUE INDEX ix_energy_readings_building_category_timestamp "
+        "ON energy_readings (building_id, category, timestamp)",
+    'ix_energy_readings_timestamp_brin':
+        "CREATE INDEX ix_energy_readings_timestamp_brin ON energy_readings USING brin (timestamp)",
+}
+
+# Continues the synthetic series where the previous size stopped:
+# each 5-minute tick holds an electricity and a gas reading for every building.
+FILL = """
+    INSERT INTO energy_readings (timestamp, value, building_id, category)
+    SELECT TIMESTAMP '2024-01-01' + (g / (2 * :sensors)) * INTERVAL '5 minutes',
+           round((random() * 600)::numeric, 2), (g / 2) % :sensors, g % 2
+    FROM generate_series(:start, :stop - 1) AS g
+"""
+
+
+# === Capture the SQL Issued by the Analytics Helpers ===
+@contextmanager
+def capture_statements(engine):
+    """Collects (statement, parameters) for every SELECT run inside the block."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    sa.event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        sa.event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def analytics_workload(app, buildings, start_date, end_date):
+    """
+    Calls each analytics code path once; returns {query label: [(sql, params), ...]}.
+    """
+    request = {'buildings': buildings, 'energy_type': 'both', 'start_date': start_date, 'end_date': end_date}
+    workloads = {
+        'get_traces': lambda: energy_analytics.get_traces(buildings, 'both', start_date, end_date),
+        'get_co2_energy_data': lambda: _call_view(app, energy_analytics.get_emissions_line_chart_view, request),
+        'get_energy_usage_by_zone': energy_analytics.get_energy_usage_by_zone,
+    }
+
+    statements = {}
+    for label, run in workloads.items():
+        with capture_statements(db.engine) as captured:
+            run()
+        statements[label] = captured
+    return statements
+
+
+def _call_view(app, view, payload):
+    with app.test_request_context(method='POST', json=payload):
+        return view()
+
+
+def explain(statement, parameters):
+    """Runs one statement under EXPLAIN ANALYZE; returns (execution ms, top plan node)."""
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+        plan = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]['Plan']
+    return plan[0]['Execution Time'], ', '.join(sorted(set(_scan_nodes(root)))) or root['Node Type']
+
+
+def _scan_nodes(node):
+    """Lists how energy tables were read in a plan tree, e.g. 'Index Scan' or 'Seq Scan'."""
+    found = []
+    if node.get('Relation Name', '').startswith('energy_'):
+        found.append(node['Node Type'])
+    for child in node.get('Plans', []):
+        found.extend(_scan_nodes(child))
+    return found
+
+
+# === Benchmark Driver ===
+def set_indexes(enabled):
+    """Creates or drops the analytics indexes."""
+    for name, ddl in INDEX_DDL.items():
+        db.session.execute(sa.text(f"DROP INDEX IF EXISTS {name}"))
+        if enabled:
+            db.session.execute(sa.text(ddl))
+    db.session.commit()
+    db.session.execute(sa.text("ANALYZE energy_readings"))
+    db.session.commit()
+
+
+def grow_to(rows, sensors):
+    """Appends synthetic readings until energy_readings holds `rows` rows."""
+    current = db.session.scalar(sa.select(sa.func.count()).select_from(EnergyReading))
+    if current < rows:
+        started = time.perf_counter()
+        db.session.execute(sa.text(FILL), {'sensors': sensors, 'start': current, 'stop': rows})
+        db.session.commit()
+        print(f"Loaded {rows - current:,} rows in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-uri', required=True, help='PostgreSQL SQLAlchemy URI')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 10_000_000, 50_000_000])
+    parser.add_argument('--buildings', type=int, default=3, help='Buildings selected in the chart queries')
+    parser.add_argument('--days', type=int, default=30, help='Date range of the chart queries')
+    parser.add_argument('--schema', default='query_bench', help='Scratch schema (created and dropped)')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch schema afterwards')
+    args = parser.parse_args()
+
+    admin = sa.create_engine(args.database_uri)
+    if admin.dialect.name != 'postgresql':
+        parser.error("The query-plan benchmark needs PostgreSQL (EXPLAIN ANALYZE, BRIN).")
+    with admin.begin() as connection:
+        connection.execute(sa.text(f"CREATE SCHEMA IF NOT EXISTS {args.schema}"))
+
+    app = create_app(test_config={
+        'SQLALCHEMY_DATABASE_URI': args.database_uri,
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'options': f'-csearch_path={args.schema}'}},
+        'ENERGY_RAW_TRACE_MAX_DAYS': args.days + 1,  # Keep get_traces on raw readings, the indexes' workload
+    })
+
+    results = []
+    with app.app_context():
+        db.create_all()
+        sync_buildings()
+        seed_emission_factors()
+        sensors = db.session.scalar(sa.select(sa.func.count()).select_from(Building))
+        buildings = db.session.scalars(
+            sa.select(Building.name).where(Building.code != '').order_by(Building.id).limit(args.buildings)
+        ).all()
+
+        for size in sorted(args.sizes):
+            grow_to(size, sensors)
+            rebuild_rollups()  # The CO2 chart reads the daily rollups
+            db.session.commit()
+            latest = db.session.scalar(sa.select(sa.func.max(EnergyReading.timestamp)))
+            end_date = latest.date().isoformat()
+            start_date = (latest - timedelta(days=args.days)).date().isoformat()
+
+            for indexed in (False, True):
+                set_indexes(indexed)
+                for label, statements in analytics_workload(app, buildings, start_date, end_date).items():
+                    timings = [explain(sql, params) for sql, params in statements]
+                    total_ms = sum(ms for ms, _ in timings)
+                    plans = '; '.join(sorted({plan for _, plan in timings}))
+                    results.append((size, 'indexed' if indexed else 'pk only', label, len(timings), total_ms, plans))
+
+    if not args.keep:
+        with admin.begin() as connection:
+            connection.execute(sa.text(f"DROP SCHEMA {args.schema} CASCADE"))
+
+    print(f"\n{'rows':>12}  {'indexes':<8}  {'query':<26}{'stmts':>6}{'exec ms':>12}  plan")
+    for size, variant, label, count, total_ms, plans in results:
+        print(f"{size:>12,}  {variant:<8}  {label:<26}{count:>6}{total_ms:>12.1f}  {plans}")
+
+
+if __name__ == '__main__':
+    main()
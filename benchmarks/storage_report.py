@@ -0,0 +1,140 @@
+"""
+Storage report: table and index size of the legacy vs normalised energy_readings layout.
+
+Builds two scratch tables in a PostgreSQL database, fills both with the same
+synthetic readings using generate_series, and prints heap, index and total
+size for each. Both tables get a primary key plus the (building, category,
+timestamp) index the analytics filters need, so index sizes are comparable.
+
+Usage:
+    python -m benchmarks.storage_report --database-uri postgresql://user:pw@localhost/db --rows 10000000
+
+The scratch tables are dropped afterwards unless --keep is given.
+"""
+import argparse
+import time
+
+import sqlalchemy as sa
+
+from app.buildings import get_registry
+
+LEGACY_DDL = """
+    CREATE TABLE bench_legacy_readings (
+        id SERIAL PRIMARY KEY,
+        timestamp TIMESTAMP NOT NULL,
+        building VARCHAR(100) NOT NULL,
+        building_code VARCHAR(10) NOT NULL,
+        zone VARCHAR(50) NOT NULL,
+        value DOUBLE PRECISION NOT NULL,
+        category VARCHAR(50) NOT NULL
+    )
+"""
+
+NORMALISED_DDL = """
+    CREATE TABLE bench_normalised_readings (
+        id BIGSERIAL PRIMARY KEY,
+        timestamp TIMESTAMP NOT NULL,
+        value REAL NOT NULL,
+        building_id SMALLINT NOT NULL,
+        category SMALLINT NOT NULL
+    )
+"""
+
+# Readings are laid out as: for each 5-minute tick, every sensor, electricity then gas
+LEGACY_FILL = """
+    INSERT INTO bench_legacy_readings (timestamp, building, building_code, zone, value, category)
+    SELECT TIMESTAMP '2024-01-01' + (g / (2 * :sensors)) * INTERVAL '5 minutes',
+           b.name, b.code, b.zone, round((random() * 600)::numeric, 2),
+           CASE WHEN g % 2 = 0 THEN 'electricity' ELSE 'gas' END
+    FROM generate_series(0, :rows - 1) AS g
+    JOIN bench_buildings b ON b.id = (g / 2) % :sensors
+"""
+
+NORMALISED_FILL = """
+    INSERT INTO bench_normalised_readings (timestamp, value, building_id, category)
+    SELECT TIMESTAMP '2024-01-01' + (g / (2 * :sensors)) * INTERVAL '5 minutes',
+           round((random() * 600)::numeric, 2), (g / 2) % :sensors, g % 2
+    FROM generate_series(0, :rows - 1) AS g
+"""
+
+INDEXES = [
+    "CREATE INDEX bench_legacy_filter_idx ON bench_legacy_readings (building, category, timestamp)",
+    "CREATE INDEX bench_normalised_filter_idx ON bench_normalised_readings (building_id, category, timestamp)",
+]
+
+TABLES = ('bench_legacy_readings', 'bench_normalised_readings')
+
+
+def drop_tables(connection):
+    for table in TABLES + ('bench_buildings',):
+        connection.execute(sa.text(f"DROP TABLE IF EXISTS {table}"))
+
+
+def build(engine, rows):
+    """Creates and fills both layouts with the same number of rows."""
+    sensors = get_registry().sensors()
+
+    with engine.begin() as connection:
+        drop_tables(connection)
+        connection.execute(sa.text(
+            "CREATE TABLE bench_buildings (id SMALLINT PRIMARY KEY, name VARCHAR(100), code VARCHAR(10), zone VARCHAR(50))"
+        ))
+        connection.execute(
+            sa.text("INSERT INTO bench_buildings VALUES (:id, :name, :code, :zone)"),
+            [{'id': i, 'name': s.name, 'code': s.code, 'zone': s.zone} for i, s in enumerate(sensors)]
+        )
+        connection.execute(sa.text(LEGACY_DDL))
+        connection.execute(sa.text(NORMALISED_DDL))
+
+    params = {'rows': rows, 'sensors': len(sensors)}
+    for label, fill in (('legacy', LEGACY_FILL), ('normalised', NORMALISED_FILL)):
+        started = time.perf_counter()
+        with engine.begin() as connection:
+            connection.execute(sa.text(fill), params)
+        print(f"Filled {label} table with {rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+    with engine.begin() as connection:
+        for ddl in INDEXES:
+            connection.execute(sa.text(ddl))
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        for table in TABLES:
+            connection.execute(sa.text(f"VACUUM ANALYZE {table}"))
+
+
+def report(engine, rows):
+    """Prints heap, index and total size per layout."""
+    print(f"\n{'layout':<28}{'heap':>12}{'indexes':>12}{'total':>12}{'bytes/row':>12}")
+    with engine.connect() as connection:
+        for table in TABLES:
+            heap, indexes, total = connection.execute(sa.text(
+                "SELECT pg_relation_size(:t), pg_indexes_size(:t), pg_total_relation_size(:t)"
+            ), {'t': table}).one()
+            print(f"{table:<28}{_mb(heap):>12}{_mb(indexes):>12}{_mb(total):>12}{total / rows:>12.1f}")
+
+
+def _mb(size):
+    return f"{size / 1024 ** 2:,.0f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-uri', required=True, help='PostgreSQL SQLAlchemy URI')
+    parser.add_argument('--rows', type=int, default=10_000_000, help='Rows per layout')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch tables afterwards')
+    args = parser.parse_args()
+
+    engine = sa.create_engine(args.database_uri)
+    if engine.dialect.name != 'postgresql':
+        parser.error("The storage report needs PostgreSQL (it reads pg_relation_size).")
+
+    build(engine, args.rows)
+    report(engine, args.rows)
+
+    if not args.keep:
+        with engine.begin() as connection:
+            drop_tables(connection)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Trace fetch benchmark: compares the per-trace query loop previously used by
+get_traces with the single streamed query it now issues.
+
+Usage:
+    python -m benchmarks.trace_fetch --buildings 20 --days 7
+    python -m benchmarks.trace_fetch --database-uri postgresql://user:pw@localhost/db
+
+Readings are written for the selected buildings at timestamps in the year 2000
+and deleted afterwards, so the benchmark can be pointed at a development database.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from app import create_app, db
+from app.buildings import sync_buildings
+from app.downsampling import downsample_series, format_timestamps
+from app.ingest import bulk_insert_readings
+from app.models import Building, EnergyReading
+from app.views.energy_analytics import get_traces
+
+BENCHMARK_START = datetime(2000, 1, 1)
+BENCHMARK_END = datetime(2001, 1, 1)
+
+
+# === Synthetic Readings ===
+def load_readings(building_ids, days):
+    """Writes a 5-minute electricity and gas series for each building; returns the row count."""
+    ticks = days * 24 * 12
+    rows = [
+        (BENCHMARK_START + timedelta(minutes=5 * tick), building_id, category, float((tick * 7 + building_id) % 600))
+        for building_id in building_ids
+        for category in ('electricity', 'gas')
+        for tick in range(ticks)
+    ]
+    for start in range(0, len(rows), 50_000):
+        bulk_insert_readings(rows[start:start + 50_000])
+    db.session.commit()
+    return len(rows)
+
+
+def cleanup():
+    """Removes every row written by the benchmark."""
+    db.session.query(EnergyReading).filter(
+        EnergyReading.timestamp >= BENCHMARK_START,
+        EnergyReading.timestamp < BENCHMARK_END
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+
+# === Fetch Paths Under Test ===
+def per_trace_loop(buildings, start_date, end_date, max_points):
+    """Previous behaviour: one query per building and energy type."""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    stop = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+    traces = []
+    for building in buildings:
+        for etype in ('electricity', 'gas'):
+            readings = (
+                db.session.query(EnergyReading.timestamp, EnergyReading.value)
+                .join(EnergyReading.building)
+                .filter(
+                    Building.name == building,
+                    EnergyReading.category == etype,
+                    EnergyReading.timestamp >= start,
+                    EnergyReading.timestamp < stop
+                )
+                .order_by(EnergyReading.timestamp)
+                .all()
+            )
+            if readings:
+                seconds, values = downsample_series(*zip(*readings), max_points)
+                traces.append((format_timestamps(seconds), values.tolist()))
+    return traces
+
+
+def single_query(buildings, start_date, end_date, max_points):
+    """Current behaviour: get_traces with one streamed query for every trace."""
+    return get_traces(buildings, 'both', start_date, end_date, max_points=max_points)
+
+
+def run(fetch, args, repeats):
+    """Returns (median seconds, statements per call, traces) over `repeats` calls."""
+    statements = []
+
+    def count_statement(*_):
+        statements.append(1)
+
+    timings = []
+    sa.event.listen(db.engine, 'before_cursor_execute', count_statement)
+    try:
+        for _ in range(repeats):
+            statements.clear()
+            db.session.rollback()
+            started = time.perf_counter()
+            traces = fetch(*args)
+            timings.append(time.perf_counter() - started)
+    finally:
+        sa.event.remove(db.engine, 'before_cursor_execute', count_statement)
+    return statistics.median(timings), len(statements), len(traces)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--buildings', type=int, default=20, help='Buildings selected in the chart')
+    parser.add_argument('--days', type=int, default=7, help='Days of 5-minute readings per trace')
+    parser.add_argument('--max-points', type=int, default=1000, help='Points per trace after downsampling')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed calls per path (median reported)')
+    parser.add_argument('--database-uri', default='sqlite:///:memory:', help='SQLAlchemy database URI')
+    args = parser.parse_args()
+
+    app = create_app(test_config={
+        'SQLALCHEMY_DATABASE_URI': args.database_uri,
+        'ENERGY_RAW_TRACE_MAX_DAYS': args.days + 1,  # Both paths read raw readings
+    })
+
+    with app.app_context():
+        db.create_all()
+        sync_buildings()
+        selected = db.session.execute(
+            sa.select(Building.id, Building.name).where(Building.code != '').order_by(Building.id).limit(args.buildings)
+        ).all()
+        rows = load_readings([building_id for building_id, _ in selected], args.days)
+        fetch_args = (
+            [name for _, name in selected], BENCHMARK_START.date().isoformat(),
+            (BENCHMARK_START + timedelta(days=args.days - 1)).date().isoformat(), args.max_points
+        )
+        try:
+            results = {
+                'per-trace loop': run(per_trace_loop, fetch_args, args.repeats),
+                'single query': run(single_query, fetch_args, args.repeats),
+            }
+        finally:
+            cleanup()
+        dialect = db.engine.dialect.name
+
+    print(f"Database: {dialect}")
+    print(f"Buildings: {len(selected)}, energy types: 2, rows: {rows:,}")
+    for name, (seconds, statements, traces) in results.items():
+        print(f"  {name:<15} {seconds * 1000:>10.1f} ms  {statements:>4} statements  {traces:>4} traces")
+    print(f"  speed-up        {results['per-trace loop'][0] / results['single query'][0]:>10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -45,4 +45,28 @@ class Config:
     SCHEDULER_TEST_NOW = os.environ.get('SCHEDULER_TEST_NOW')      # Run jobs on startup if True
 
     # === IoT Simulator Toggle ===
-    IOT_SIMULATOR_ACTIVE = os.environ.get('IOT_SIMULATOR_ACTIVE')  # Toggle simulator for energy data
+    IOT_SIMULATOR_ACTIVE = os.environ.get('IOT_SIMULATOR_ACTIVE')  # `flask iot run` also publishes simulated energy data
+    IOT_PAYLOAD_MODE = os.environ.get('IOT_PAYLOAD_MODE', 'batch')  # 'batch' (binary, per group) or 'json' (per sensor)
+    IOT_SIMULATOR_SEED = int(os.environ['IOT_SIMULATOR_SEED']) if os.environ.get('IOT_SIMULATOR_SEED') else None  # Fixed seed for reproducible load tests
+
+    # === Sensor Ingest Writer ===
+    IOT_INGEST_MAX_LATENCY = float(os.environ.get('IOT_INGEST_MAX_LATENCY', 5))     # Max seconds a reading waits before commit
+    IOT_INGEST_QUEUE_SIZE = int(os.environ.get('IOT_INGEST_QUEUE_SIZE', 10000))     # Queued readings before producers block
+    IOT_INGEST_ON_CONFLICT = os.environ.get('IOT_INGEST_ON_CONFLICT', 'ignore')      # Redelivered readings: 'ignore' or 'update'
+    IOT_INGEST_WORKERS = int(os.environ.get('IOT_INGEST_WORKERS', 2))               # Ingest processes run by `flask iot run`
+    IOT_INGEST_SHARD_BY = os.environ.get('IOT_INGEST_SHARD_BY', 'zone')             # 'zone' or 'building'
+
+    # === Anomaly Detection on Ingest ===
+    ENERGY_ANOMALY_THRESHOLD = float(os.environ.get('ENERGY_ANOMALY_THRESHOLD', 4.0))    # Standard deviations from the hour-of-week mean
+    ENERGY_ANOMALY_MIN_SAMPLES = int(os.environ.get('ENERGY_ANOMALY_MIN_SAMPLES', 12))   # Readings per slot before it can alert
+
+    # === Energy Charts ===
+    ENERGY_RAW_TRACE_MAX_DAYS = int(os.environ.get('ENERGY_RAW_TRACE_MAX_DAYS', 7))   # Longer ranges are drawn from hourly rollups
+    ENERGY_TRACE_MAX_POINTS = int(os.environ.get('ENERGY_TRACE_MAX_POINTS', 1000))    # LTTB-downsampled points per trace
+    ENERGY_FORECAST_HISTORY_WEEKS = int(os.environ.get('ENERGY_FORECAST_HISTORY_WEEKS', 8))  # Hourly history read by the first forecast fit
+    ENERGY_CACHE_MAX_BYTES = int(os.environ.get('ENERGY_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # Per-process response cache; 0 disables
+
+    # === energy_readings Partitions (PostgreSQL) ===
+    ENERGY_PARTITION_MONTHS_AHEAD = int(os.environ.get('ENERGY_PARTITION_MONTHS_AHEAD', 3))   # Monthly partitions created ahead of time
+    ENERGY_RETENTION_MONTHS = int(os.environ.get('ENERGY_RETENTION_MONTHS', 0))               # Expire older months; 0 keeps everything
+    ENERGY_RETENTION_ACTION = os.environ.get('ENERGY_RETENTION_ACTION', 'detach')             # 'detach' (keep table) or 'drop'
@@ -0,0 +1,110 @@
+"""normalise energy_readings against a buildings dimension table
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 11:05:12.418330
+
+Moves building name, code and zone out of every reading into `buildings`
+(smallint key) and stores the category as a smallint code (0 = electricity,
+1 = gas) next to a 4-byte REAL value. Readings are copied into a freshly laid
+out table rather than altered in place, so PostgreSQL reclaims the space of the
+dropped string columns and packs the new row without alignment padding.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('buildings',
+    sa.Column('id', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('code', sa.String(length=10), nullable=False),
+    sa.Column('zone', sa.String(length=50), nullable=False),
+    sa.Column('parent', sa.String(length=100), nullable=True),
+    sa.Column('is_accommodation', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+
+    # One building row per distinct name already present in the readings; ids are
+    # assigned in name order and adopted by the BuildingRegistry on next startup.
+    op.execute("""
+        INSERT INTO buildings (id, name, code, zone, parent, is_accommodation)
+        SELECT CAST(ROW_NUMBER() OVER (ORDER BY building) - 1 AS SMALLINT),
+               building, MAX(building_code), MAX(zone), NULL,
+               MAX(building_code) = '' AND MAX(zone) = ''
+        FROM energy_readings
+        GROUP BY building
+    """)
+
+    op.create_table('energy_readings_new',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('value', sa.REAL(), nullable=False),
+    sa.Column('building_id', sa.SmallInteger(), nullable=False),
+    sa.Column('category', sa.SmallInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['building_id'], ['buildings.id'], name='energy_readings_building_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='energy_readings_new_pkey')
+    )
+    op.execute("""
+        INSERT INTO energy_readings_new (id, timestamp, value, building_id, category)
+        SELECT r.id, r.timestamp, r.value, b.id,
+               CASE r.category WHEN 'electricity' THEN 0 WHEN 'gas' THEN 1 END
+        FROM energy_readings r
+        JOIN buildings b ON b.name = r.building
+        WHERE r.category IN ('electricity', 'gas')
+    """)
+
+    op.drop_table('energy_readings')
+    op.rename_table('energy_readings_new', 'energy_readings')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER INDEX energy_readings_new_pkey RENAME TO energy_readings_pkey")
+    _reset_id_sequence('energy_readings_new_id_seq')
+
+
+def downgrade():
+    op.create_table('energy_readings_old',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('building', sa.String(length=100), nullable=False),
+    sa.Column('building_code', sa.String(length=10), nullable=False),
+    sa.Column('zone', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.PrimaryKeyConstraint('id', name='energy_readings_old_pkey')
+    )
+    op.execute("""
+        INSERT INTO energy_readings_old (id, timestamp, building, building_code, zone, value, category)
+        SELECT r.id, r.timestamp, b.name, b.code, b.zone, r.value,
+               CASE r.category WHEN 0 THEN 'electricity' ELSE 'gas' END
+        FROM energy_readings r
+        JOIN buildings b ON b.id = r.building_id
+    """)
+
+    op.drop_table('energy_readings')
+    op.drop_table('buildings')
+    op.rename_table('energy_readings_old', 'energy_readings')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER INDEX energy_readings_old_pkey RENAME TO energy_readings_pkey")
+    _reset_id_sequence('energy_readings_old_id_seq')
+
+
+def _reset_id_sequence(created_name):
+    """
+    On PostgreSQL, give the serial sequence of the copied table its conventional
+    name and move it past the copied ids.
+    """
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(f"ALTER SEQUENCE {created_name} RENAME TO energy_readings_id_seq")
+    op.execute("""
+        SELECT setval('energy_readings_id_seq', COALESCE((SELECT MAX(id) FROM energy_readings), 0) + 1, false)
+    """)
@@ -0,0 +1,38 @@
+"""index energy_readings for analytics filters
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:20:41.093126
+
+Adds a composite B-tree on (building_id, category, timestamp) for the
+per-building chart queries and, on PostgreSQL, a BRIN index on timestamp for
+time-range scans. On PostgreSQL both are built CONCURRENTLY so ingest keeps
+writing while a large table is indexed.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('ix_energy_readings_building_category_timestamp', 'energy_readings',
+                            ['building_id', 'category', 'timestamp'], postgresql_concurrently=True)
+            op.create_index('ix_energy_readings_timestamp_brin', 'energy_readings', ['timestamp'],
+                            postgresql_using='brin', postgresql_concurrently=True)
+    else:
+        op.create_index('ix_energy_readings_building_category_timestamp', 'energy_readings',
+                        ['building_id', 'category', 'timestamp'])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_energy_readings_timestamp_brin', table_name='energy_readings')
+    op.drop_index('ix_energy_readings_building_category_timestamp', table_name='energy_readings')
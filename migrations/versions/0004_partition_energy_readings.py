@@ -0,0 +1,130 @@
+"""partition energy_readings by month on timestamp
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 14:12:40.221904
+
+PostgreSQL only. energy_readings becomes a RANGE (timestamp) partitioned table
+with one partition per month (energy_readings_yYYYYmMM) and a default partition
+for rows outside every month. Existing readings are copied into partitions
+covering their months plus three months ahead; after that the
+manage_energy_partitions scheduler job (app/partitions.py) keeps partitions
+ahead of time and expires old ones.
+
+A partitioned table's primary key must contain the partition column, so the key
+becomes (id, timestamp). id still comes from energy_readings_id_seq and stays
+unique; the ORM keeps identifying rows by id alone.
+
+Other databases keep the plain table.
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = """
+    id BIGINT NOT NULL DEFAULT nextval('energy_readings_id_seq'),
+    timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    value REAL NOT NULL,
+    building_id SMALLINT NOT NULL,
+    category SMALLINT NOT NULL
+"""
+
+INDEXES = (
+    "CREATE INDEX ix_energy_readings_building_category_timestamp "
+    "ON energy_readings (building_id, category, timestamp)",
+    "CREATE INDEX ix_energy_readings_timestamp_brin ON energy_readings USING brin (timestamp)",
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute(f"""
+        CREATE TABLE energy_readings_partitioned (
+            {COLUMNS},
+            CONSTRAINT energy_readings_partitioned_pkey PRIMARY KEY (id, timestamp),
+            CONSTRAINT energy_readings_partitioned_building_id_fkey
+                FOREIGN KEY (building_id) REFERENCES buildings (id)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+
+    first, last = op.get_bind().execute(sa.text("SELECT MIN(timestamp), MAX(timestamp) FROM energy_readings")).one()
+    today = datetime.utcnow()
+    month = _month_start(min(first or today, today))
+    stop = _add_months(_month_start(max(last or today, today)), MONTHS_AHEAD)
+    while month <= stop:
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE energy_readings_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF energy_readings_partitioned FOR VALUES FROM ('{month}') TO ('{following}')"
+        )
+        month = following
+    op.execute("CREATE TABLE energy_readings_default PARTITION OF energy_readings_partitioned DEFAULT")
+
+    op.execute("""
+        INSERT INTO energy_readings_partitioned (id, timestamp, value, building_id, category)
+        SELECT id, timestamp, value, building_id, category FROM energy_readings
+    """)
+
+    # Keep the id sequence alive when the old table (its owner) is dropped
+    op.execute("ALTER SEQUENCE energy_readings_id_seq OWNED BY energy_readings_partitioned.id")
+    op.drop_table('energy_readings')
+    op.rename_table('energy_readings_partitioned', 'energy_readings')
+    op.execute("ALTER TABLE energy_readings RENAME CONSTRAINT energy_readings_partitioned_pkey TO energy_readings_pkey")
+    op.execute(
+        "ALTER TABLE energy_readings RENAME CONSTRAINT energy_readings_partitioned_building_id_fkey "
+        "TO energy_readings_building_id_fkey"
+    )
+    for ddl in INDEXES:
+        op.execute(ddl)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Only attached partitions are copied back; detached (archived) months stay as standalone tables
+    op.execute(f"""
+        CREATE TABLE energy_readings_plain (
+            {COLUMNS},
+            CONSTRAINT energy_readings_plain_pkey PRIMARY KEY (id),
+            CONSTRAINT energy_readings_plain_building_id_fkey
+                FOREIGN KEY (building_id) REFERENCES buildings (id)
+        )
+    """)
+    op.execute("""
+        INSERT INTO energy_readings_plain (id, timestamp, value, building_id, category)
+        SELECT id, timestamp, value, building_id, category FROM energy_readings ORDER BY timestamp
+    """)
+
+    op.execute("ALTER SEQUENCE energy_readings_id_seq OWNED BY energy_readings_plain.id")
+    op.drop_table('energy_readings')  # Drops every attached partition with it
+    op.rename_table('energy_readings_plain', 'energy_readings')
+    op.execute("ALTER TABLE energy_readings RENAME CONSTRAINT energy_readings_plain_pkey TO energy_readings_pkey")
+    op.execute(
+        "ALTER TABLE energy_readings RENAME CONSTRAINT energy_readings_plain_building_id_fkey "
+        "TO energy_readings_building_id_fkey"
+    )
+    for ddl in INDEXES:
+        op.execute(ddl)
+
+
+def _month_start(moment):
+    return date(moment.year, moment.month, 1)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
@@ -0,0 +1,87 @@
+"""make (building_id, category, timestamp) unique on energy_readings
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 16:05:12.384710
+
+Redelivered MQTT messages, simulator restarts and replays used to store the
+same reading several times. Duplicates are deleted, keeping the first one
+stored (lowest id), and the (building_id, category, timestamp) index becomes
+unique so the ingest writer can upsert with ON CONFLICT (app.ingest.upsert_readings).
+On PostgreSQL the unique index covers the partition key, so it is created on
+every partition as well.
+
+The rollups, load histograms and zone totals of the days that held
+duplicates are then rebuilt from the remaining readings (app.rollups), so they
+stop counting the deleted rows.
+
+"""
+from datetime import timedelta
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.orm import Session
+
+from app.rollups import rebuild_rollups
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+INDEX = 'ix_energy_readings_building_category_timestamp'
+KEY = ['building_id', 'category', 'timestamp']
+
+
+def upgrade():
+    days = duplicated_days()
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("""
+            DELETE FROM energy_readings AS duplicate
+            USING energy_readings AS kept
+            WHERE duplicate.building_id = kept.building_id
+              AND duplicate.category = kept.category
+              AND duplicate.timestamp = kept.timestamp
+              AND duplicate.id > kept.id
+        """)
+    else:
+        op.execute("""
+            DELETE FROM energy_readings
+            WHERE id NOT IN (SELECT MIN(id) FROM energy_readings GROUP BY building_id, category, timestamp)
+        """)
+
+    op.drop_index(INDEX, table_name='energy_readings')
+    op.create_index(INDEX, 'energy_readings', KEY, unique=True)
+
+    session = Session(bind=op.get_bind())
+    for start, end in day_runs(days):
+        rebuild_rollups(start, end, session=session)
+    session.close()
+
+
+def duplicated_days():
+    """UTC days holding more than one reading for a (building_id, category, timestamp) key."""
+    select = sa.text("""
+        SELECT timestamp FROM energy_readings
+        GROUP BY building_id, category, timestamp
+        HAVING COUNT(*) > 1
+    """).columns(timestamp=sa.DateTime)
+    return sorted({timestamp.date() for timestamp in op.get_bind().execute(select).scalars()})
+
+
+def day_runs(days):
+    """Groups sorted dates into (first, last) runs of consecutive days, one rebuild each."""
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+def downgrade():
+    op.drop_index(INDEX, table_name='energy_readings')
+    op.create_index(INDEX, 'energy_readings', KEY)
@@ -1,11 +1,19 @@
+import os
 from datetime import datetime
 from unittest.mock import MagicMock
 
 print("Loading conftest.py")
 
 import pytest
+from flask_migrate import downgrade, upgrade
+
 from app import create_app, db
-from app.models import User
+from app.models import (EmissionFactor, EnergyAlert, EnergyLoadHistogram, EnergyReading, EnergyRollupDaily,
+                        EnergyRollupHourly, EnergyZoneTotal, IngestWatermark, User)
+
+# Tables written by the energy pipeline and its tests, emptied by clean_energy_tables
+ENERGY_MODELS = (EnergyReading, EnergyAlert, EnergyRollupHourly, EnergyRollupDaily, EnergyLoadHistogram,
+                 EnergyZoneTotal, IngestWatermark, EmissionFactor)
 
 # === Fixture: Create Test App ===
 @pytest.fixture(scope="module")
@@ -34,6 +42,27 @@ def app():
         db.drop_all()    # Clean up DB schema after tests finish
 
 
+# === Fixture: Migrated PostgreSQL App ===
+@pytest.fixture(scope="module")
+def pg_app():
+    """
+    App bound to the throwaway PostgreSQL database named by TEST_POSTGRES_URI,
+    migrated to head (so energy_readings is partitioned by month) and migrated
+    back down after the module. Tests using it are skipped when it is not set.
+    """
+    uri = os.environ.get('TEST_POSTGRES_URI')
+    if not uri:
+        pytest.skip("TEST_POSTGRES_URI is not set")
+
+    app = create_app(config_class=None, test_config={'TESTING': True, 'SQLALCHEMY_DATABASE_URI': uri})
+    directory = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+    with app.app_context():
+        upgrade(directory)
+        yield app
+        db.session.remove()
+        downgrade(directory, revision='base')
+
+
 # === Fixture: Flask Test Client ===
 @pytest.fixture
 def client(app):
@@ -79,6 +108,23 @@ def db_session(app):
         session.remove()
 
 
+# === Fixture: Empty Energy Tables After Each Test ===
+@pytest.fixture(scope="function")
+def clean_energy_tables(request):
+    """
+    Empties the energy readings, alerts, rollups, watermark and emission factors
+    after a test, so modules sharing the app's database start each test clean.
+    Clears the pg_app database for tests that use it, the app database otherwise.
+    """
+    app = request.getfixturevalue('pg_app' if 'pg_app' in request.fixturenames else 'app')
+    yield
+    with app.app_context():
+        db.session.rollback()  # Discard whatever a failed test left pending
+        for model in ENERGY_MODELS:
+            db.session.query(model).delete()
+        db.session.commit()
+
+
 # === Fixture: Mocked EnergyReading Records ===
 @pytest.fixture
 def mock_energy_readings():
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import url_for
+
+from app import db
+from app import ingest
+from app.anomalies import AnomalyDetector, hour_of_week
+from app.buildings import get_registry, sync_buildings
+from app.ingest import IngestWriter
+from app.models import Building, EnergyAlert
+
+MONDAY_NINE = datetime(2025, 1, 6, 9, 0)
+
+
+def usual_hour(building_id=1, start=MONDAY_NINE):
+    """Twelve 5-minute gas readings around 100 within one hour."""
+    return [(start + timedelta(minutes=5 * i), building_id, 'gas', 100.0 + (i % 3 - 1)) for i in range(12)]
+
+
+# === Unit Test: Hour-of-Week Slots ===
+def test_hour_of_week_starts_on_monday():
+    """
+     Scenario: Map Monday 00:00, Monday 09:00 and Sunday 23:00 UTC to slots.
+     Expected: They land in slots 0, 9 and 167.
+    """
+    moments = [datetime(2025, 1, 6), MONDAY_NINE, datetime(2025, 1, 12, 23)]
+    seconds = [int((moment - datetime(1970, 1, 1)).total_seconds()) for moment in moments]
+    assert hour_of_week(seconds).tolist() == [0, 9, 167]
+
+
+# === Unit Test: Detector Flags Only Outliers of a Learned Slot ===
+def test_detector_flags_outliers_after_warm_up():
+    """
+     Scenario: A sensor's Monday 09:00 slot learns twelve readings near 100, then sees 101 and 500;
+               a spike in an unseen slot follows.
+     Expected: Only the 500 reading alerts, with the slot's running mean as its expected value.
+    """
+    detector = AnomalyDetector(threshold=4.0, min_samples=12)
+    assert detector.observe(usual_hour()) == []
+
+    later = MONDAY_NINE + timedelta(weeks=1)
+    alerts = detector.observe([
+        (later, 1, 'gas', 101.0),
+        (later + timedelta(minutes=5), 1, 'gas', 500.0),
+        (later + timedelta(hours=1), 1, 'gas', 900.0),
+    ])
+
+    assert [(alert['building_id'], alert['value']) for alert in alerts] == [(1, 500.0)]
+    assert abs(alerts[0]['expected'] - 1301 / 13) < 1e-9  # Mean of the slot, including the 101 just before
+    assert alerts[0]['z_score'] > 4.0
+
+
+# === Unit Test: Scoring Leaves the Statistics Until Applied ===
+def test_detector_score_defers_learning_until_apply():
+    """
+     Scenario: A warmed-up slot scores a spike with score(), which is then applied.
+     Expected: score() alone changes no statistics and rescoring gives the same alert; after apply() the
+               statistics match a detector that observed the same readings.
+    """
+    detector, reference = AnomalyDetector(min_samples=12), AnomalyDetector(min_samples=12)
+    for warmed in (detector, reference):
+        warmed.observe(usual_hour())
+    spike = [(MONDAY_NINE + timedelta(weeks=1), 1, 'gas', 500.0)]
+
+    alerts, update = detector.score(spike)
+    assert detector.score(spike)[0] == alerts and len(alerts) == 1
+    assert detector.count.sum() == 12
+
+    detector.apply(update)
+    assert reference.observe(spike) == alerts
+    assert (detector.count == reference.count).all() and np.allclose(detector.m2, reference.m2)
+
+
+# === Integration Test: Ingest Writer Stores Alerts and the Endpoint Lists Them ===
+def test_ingest_writer_records_alerts_listed_by_endpoint(app, client, clean_energy_tables):
+    """
+     Scenario: A writer with a detector ingests a usual hour for a building, then one spike a week later.
+     Expected: One alert is committed with the readings and /energy_alerts returns it for that building.
+    """
+    with app.app_context():
+        sync_buildings()
+    building = get_registry().get(1).name
+    writer = IngestWriter(app, batch_size=100, max_latency=60,
+                          detector=AnomalyDetector(min_samples=12)).start()
+    writer.submit_many(usual_hour())
+    writer.flush()
+    writer.submit((MONDAY_NINE + timedelta(weeks=1), 1, 'gas', 450.0))
+    writer.close()
+
+    listed = client.get(url_for('energy_dash.get_energy_alerts', building=building)).get_json()['alerts']
+    unknown = client.get(url_for('energy_dash.get_energy_alerts', building='Nowhere'))
+
+    assert writer.stats()['alerts_raised'] == 1
+    assert writer.rows_written == 13
+    assert [(alert['building'], alert['category'], alert['value']) for alert in listed] == [(building, 'gas', 450.0)]
+    assert listed[0]['timestamp'] == '2025-01-13 09:00:00'
+    assert unknown.status_code == 404
+
+
+# === Integration Test: Failed Batches Are Not Learned ===
+def test_writer_learns_only_committed_readings(app, clean_energy_tables, monkeypatch):
+    """
+     Scenario: A writer's first batch fails before committing, then the same readings are written again.
+     Expected: The failed batch leaves the detector's statistics empty; the committed one is learned once.
+    """
+    with app.app_context():
+        sync_buildings()
+    detector = AnomalyDetector(min_samples=12)
+
+    def fail(rows):
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(ingest, 'update_rollups', fail)
+    writer = IngestWriter(app, batch_size=100, max_latency=60, detector=detector).start()
+    writer.submit_many(usual_hour())
+    writer.close()
+    assert writer.rows_failed == 12 and detector.count.sum() == 0
+
+    monkeypatch.undo()
+    writer = IngestWriter(app, batch_size=100, max_latency=60, detector=detector).start()
+    writer.submit_many(usual_hour())
+    writer.close()
+    assert writer.rows_written == 12 and detector.count.sum() == 12
+
+
+# === Integration Test: Alerts of Buildings Removed From the Registry ===
+def test_energy_alerts_name_buildings_no_longer_registered(app, client, clean_energy_tables):
+    """
+     Scenario: An alert is stored for a building that is in the buildings table but gone from buildings_data.json.
+     Expected: /energy_alerts still lists it, named from the stored buildings row.
+    """
+    with app.app_context():
+        db.session.add(Building(id=32000, name='Old Annex', code='X9', zone='Blue'))
+        db.session.add(EnergyAlert(timestamp=MONDAY_NINE, building_id=32000, category='gas', value=450.0,
+                                   expected=100.0, z_score=9.0))
+        db.session.commit()
+        assert get_registry().get(32000) is None
+
+    response = client.get(url_for('energy_dash.get_energy_alerts'))
+
+    with app.app_context():
+        db.session.query(EnergyAlert).delete()
+        db.session.query(Building).filter_by(id=32000).delete()
+        db.session.commit()
+    assert response.status_code == 200
+    assert [(alert['building'], alert['value']) for alert in response.get_json()['alerts']] == [('Old Annex', 450.0)]
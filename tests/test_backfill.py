@@ -0,0 +1,114 @@
+from datetime import date, datetime
+
+import pytest
+
+from app import db
+from app.backfill import import_readings
+from app.buildings import get_registry, sync_buildings
+from app.ingest import upsert_readings
+from app.models import EnergyReading, EnergyRollupDaily
+from app.partitions import list_partitions
+
+
+# === Integration Test: CSV Export Imported in Chunks ===
+def test_import_readings_from_csv(app, tmp_path, clean_energy_tables):
+    """
+     Scenario: Import a CSV export by building name in chunks of a few lines, with two bad records and the
+     first reading repeated with another UTC offset.
+     Expected: Good records are stored once as naive UTC readings, bad ones and repeats counted, and the
+     daily rollups rebuilt; importing the file again adds nothing.
+    """
+    path = tmp_path / 'export.csv'
+    path.write_text(
+        'timestamp,building,category,value\n'
+        '2024-03-01T00:00:00Z,Medical School,electricity,120.5\n'
+        '2024-03-01 00:05:00,Medical School,gas,30.25\n'
+        '2024-03-01T01:00:00+01:00,Medical School,electricity,99\n'
+        '2024-03-01T00:10:00,Nowhere Hall,gas,1\n'
+        '2024-03-01T00:15:00,Medical School,steam,1\n'
+    )
+    reports = []
+
+    with app.app_context():
+        result = import_readings(str(path), workers=1, chunk_size=64, progress=reports.append)
+        building_id = get_registry().by_code('B1').id
+
+        assert (result.rows, result.rejected, result.duplicates) == (2, 2, 1)
+        assert len(reports) > 1 and reports[-1].done == reports[-1].total
+        stored = db.session.query(EnergyReading).order_by(EnergyReading.timestamp, EnergyReading.value).all()
+        assert [(r.timestamp, r.building_id, r.category, r.value) for r in stored] == [
+            (datetime(2024, 3, 1, 0, 0), building_id, 'electricity', 120.5),
+            (datetime(2024, 3, 1, 0, 5), building_id, 'gas', 30.25),
+        ]
+        assert sum(row.count for row in db.session.query(EnergyRollupDaily)) == 2
+
+        again = import_readings(str(path), workers=1)
+        assert (again.rows, again.duplicates) == (0, 3)
+        assert db.session.query(EnergyReading).count() == 2
+
+
+# === Integration Test: Chunks of Stored Readings Count as Duplicates ===
+def test_import_readings_skips_stored_readings(app, tmp_path, clean_energy_tables):
+    """
+     Scenario: Two readings are already stored (one with another value) when a file holding them and one new
+     reading is imported by building id.
+     Expected: Only the new reading is written, the stored values are kept and the other two count as duplicates.
+    """
+    path = tmp_path / 'export.csv'
+    with app.app_context():
+        sync_buildings()
+        building_id = get_registry().by_code('B1').id
+        path.write_text(
+            'building_id,timestamp,category,value\n'
+            f'{building_id},2024-03-01T00:00:00,electricity,120.5\n'
+            f'{building_id},2024-03-01T00:05:00,electricity,99\n'
+            f'{building_id},2024-03-01T00:10:00,electricity,80\n'
+        )
+        upsert_readings([(datetime(2024, 3, 1, 0, 0), building_id, 'electricity', 120.5),
+                         (datetime(2024, 3, 1, 0, 5), building_id, 'electricity', 100.0)])
+        db.session.commit()
+
+        result = import_readings(str(path), workers=1)
+
+        assert (result.rows, result.rejected, result.duplicates) == (1, 0, 2)
+        assert [r.value for r in db.session.query(EnergyReading).order_by(EnergyReading.timestamp)] == [
+            120.5, 100.0, 80.0
+        ]
+
+
+# === Integration Test: Import Into the Partitioned PostgreSQL Table ===
+def test_import_readings_on_partitioned_postgres(pg_app, tmp_path, clean_energy_tables):
+    """
+     Scenario: Import a CSV for a month without a partition into the migrated PostgreSQL database, twice.
+     Expected: The month's partition is created and the readings stored once; the second import finds
+     only duplicates.
+    """
+    path = tmp_path / 'export.csv'
+    path.write_text(
+        'timestamp,building,category,value\n'
+        '2019-06-01T00:00:00Z,Medical School,electricity,120.5\n'
+        '2019-06-01T00:05:00Z,Medical School,gas,30.25\n'
+    )
+
+    with pg_app.app_context():
+        result = import_readings(str(path), workers=1)
+        again = import_readings(str(path), workers=1)
+
+        assert (result.rows, result.duplicates, again.rows, again.duplicates) == (2, 0, 0, 2)
+        assert date(2019, 6, 1) in list_partitions(db.session.connection())
+        assert sum(row.count for row in db.session.query(EnergyRollupDaily)) == 2
+
+
+# === Unit Test: Exports Without a Building Column Are Rejected ===
+def test_import_readings_requires_building_column(app, tmp_path):
+    """
+     Scenario: Import a CSV that has neither a building_id nor a building column.
+     Expected: ValueError before anything is written.
+    """
+    path = tmp_path / 'export.csv'
+    path.write_text('timestamp,category,value\n2024-03-01T00:00:00,gas,1\n')
+
+    with app.app_context():
+        with pytest.raises(ValueError, match='building_id or building'):
+            import_readings(str(path), workers=1)
+        assert db.session.query(EnergyReading).count() == 0
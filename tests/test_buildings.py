@@ -0,0 +1,113 @@
+import json
+import os
+
+from app import buildings, db
+from app.buildings import BuildingRegistry, adopt_building_ids, sync_buildings
+from app.models import Building
+
+DATA = {
+    'university_buildings': [
+        {'building': 'Muirhead Tower', 'building_code': 'R21', 'zone': 'Red'},
+        {'building': 'Medical School', 'building_code': 'B1', 'zone': 'Blue'},
+    ],
+    'accommodation_buildings': [
+        {'building': 'Mason Hall', 'village_name': 'The Vale', 'total_flats': 2, 'is_accommodation': True},
+    ]
+}
+
+
+def write_data(path, data):
+    path.write_text(json.dumps(data))
+
+
+# === Unit Test: Lookup by Id, Code and Zone ===
+def test_registry_lookups(tmp_path):
+    """
+     Scenario: Load a buildings file with two buildings and a two-flat hall.
+     Expected: Buildings and flats get small sequential ids and resolve by code, zone and id.
+    """
+    path = tmp_path / 'buildings_data.json'
+    write_data(path, DATA)
+    registry = BuildingRegistry(str(path))
+
+    assert [s.name for s in registry.sensors()] == [
+        'Muirhead Tower', 'Medical School', 'Mason Hall Flat 1', 'Mason Hall Flat 2'
+    ]
+    assert registry.by_code('B1').id == 1
+    assert [b.name for b in registry.by_zone('Red')] == ['Muirhead Tower']
+    assert registry.get(3).parent == 'Mason Hall'
+    assert registry.get(99) is None
+    assert registry.building_names() == ['Muirhead Tower', 'Medical School']
+
+
+# === Unit Test: Reload Only When the File Changes ===
+def test_registry_reloads_on_mtime_change_and_keeps_ids(tmp_path):
+    """
+     Scenario: The buildings file is edited after the first load.
+     Expected: Unchanged file is not re-read; an edited file is, and existing names keep their ids.
+    """
+    path = tmp_path / 'buildings_data.json'
+    write_data(path, DATA)
+    registry = BuildingRegistry(str(path))
+
+    assert registry.refresh() is True
+    assert registry.refresh() is False
+
+    updated = {'university_buildings': [
+        {'building': 'Physics West', 'building_code': 'R8', 'zone': 'Red'},
+        {'building': 'Medical School', 'building_code': 'B1', 'zone': 'Blue'},
+    ]}
+    write_data(path, updated)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert registry.by_code('B1').id == 1
+    assert registry.by_code('R8').id == 4
+    assert registry.by_code('R21') is None
+
+
+# === Integration Test: Buildings Table Synced from the Registry ===
+def test_sync_buildings_inserts_missing_and_keeps_stored_ids(app, tmp_path, monkeypatch):
+    """
+     Scenario: The buildings table already holds one building under a different id.
+     Expected: The registry adopts the stored id and only the missing entries are inserted.
+    """
+    path = tmp_path / 'buildings_data.json'
+    write_data(path, DATA)
+    registry = BuildingRegistry(str(path))
+    monkeypatch.setattr(buildings, '_registry', registry)
+
+    with app.app_context():
+        db.session.add(Building(id=10, name='Medical School', code='B1', zone='Blue'))
+        db.session.commit()
+
+        assert sync_buildings() == 3
+        assert registry.by_code('B1').id == 10
+        assert db.session.get(Building, registry.id_for('Mason Hall Flat 2')).parent == 'Mason Hall'
+        assert sync_buildings() == 0
+
+        db.session.query(Building).delete()
+        db.session.commit()
+
+
+# === Integration Test: Worker Processes Read Stored Ids Without Writing ===
+def test_adopt_building_ids_reads_without_inserting(app, tmp_path, monkeypatch):
+    """
+     Scenario: A fresh registry adopts the ids of a buildings table holding one building under a different id.
+     Expected: The registry takes the stored id and nothing is inserted, so parallel workers cannot collide.
+    """
+    path = tmp_path / 'buildings_data.json'
+    write_data(path, DATA)
+    registry = BuildingRegistry(str(path))
+    monkeypatch.setattr(buildings, '_registry', registry)
+
+    with app.app_context():
+        db.session.add(Building(id=10, name='Medical School', code='B1', zone='Blue'))
+        db.session.commit()
+
+        assert adopt_building_ids() == {'Medical School': 10}
+        assert registry.by_code('B1').id == 10
+        assert db.session.query(Building).count() == 1
+
+        db.session.query(Building).delete()
+        db.session.commit()
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from flask import url_for
+
+from app import db
+from app.buildings import sync_buildings
+from app.cache import ResponseCache
+from app.ingest import bulk_insert_readings
+from app.models import Building
+from app.rollups import read_watermark, update_rollups
+
+
+# === Unit Test: LRU Eviction by Size ===
+def test_response_cache_evicts_least_recently_used_by_bytes():
+    """
+     Scenario: Three 40-byte entries are stored in a 100-byte cache after reading the first one back.
+     Expected: The least recently used entry is evicted, and a newer watermark version empties the cache.
+    """
+    cache = ResponseCache(max_bytes=100)
+    cache.put('a', 1, b'a' * 40, 40)
+    cache.put('b', 1, b'b' * 40, 40)
+    assert cache.get('a', 1) == b'a' * 40
+
+    cache.put('c', 1, b'c' * 40, 40)
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) is not None and cache.get('c', 1) is not None
+    assert cache.size == 80
+    assert not cache.put('huge', 1, b'x' * 101, 101)
+
+    assert cache.get('a', 2) is None
+    assert len(cache) == 0 and cache.size == 0
+    assert not cache.put('stale', 1, b's', 1)
+
+
+# === Integration Test: ETag Revalidation and Ingest Invalidation ===
+def test_energy_chart_revalidates_until_next_ingest_batch(app, client, clean_energy_tables):
+    """
+     Scenario: A chart is fetched, revalidated with its ETag, then fetched again after a new batch is ingested.
+     Expected: The repeat gets a 304; after the batch the ETag changes and the new reading is in the response.
+    """
+    start = datetime(2025, 1, 1)
+    with app.app_context():
+        sync_buildings()
+        name = db.session.get(Building, 1).name
+        rows = [(start + timedelta(minutes=5 * i), 1, 'gas', 1.0) for i in range(6)]
+        bulk_insert_readings(rows)
+        update_rollups(rows)
+        db.session.commit()
+
+    url = url_for('energy_dash.get_line_chart_view')
+    payload = {'buildings': [name], 'energy_type': 'gas', 'start_date': '2025-01-01', 'end_date': '2025-01-01'}
+    first = client.post(url, json=payload)
+    repeat = client.post(url, json=payload, headers={'If-None-Match': first.headers['ETag']})
+
+    with app.app_context():
+        rows = [(start + timedelta(hours=1), 1, 'gas', 2.0)]
+        bulk_insert_readings(rows)
+        update_rollups(rows)
+        db.session.commit()
+        version, latest = read_watermark()
+    after_ingest = client.post(url, json=payload, headers={'If-None-Match': first.headers['ETag']})
+
+    assert first.status_code == 200 and first.headers['ETag']
+    assert repeat.status_code == 304 and repeat.headers['ETag'] == first.headers['ETag']
+    assert (version, latest) == (2, start + timedelta(hours=1))
+    assert after_ingest.status_code == 200 and after_ingest.headers['ETag'] != first.headers['ETag']
+    assert after_ingest.get_json()['traces'][0]['y'][-1] == 2.0
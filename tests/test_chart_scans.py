@@ -0,0 +1,170 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+import sqlalchemy as sa
+from flask import url_for
+
+from app import db
+from app.buildings import sync_buildings
+from app.chart_scans import ChartSpec, chart_series, plan_scans
+from app.emissions import seed_emission_factors
+from app.ingest import bulk_insert_readings
+from app.models import Building
+from app.rollups import update_rollups
+
+JAN_1 = datetime(2025, 1, 1)
+
+
+def chart(chart_id, kind, start, days, buildings=('A',)):
+    return ChartSpec(chart_id, kind, list(buildings), ['electricity', 'gas'], start, start + timedelta(days=days), 100)
+
+
+# === Unit Test: Scan Planning ===
+def test_plan_scans_shares_scans_between_overlapping_charts():
+    """
+     Scenario: A 2-day usage chart with emissions over the same days, two overlapping 30-day usage charts,
+               and an emissions chart a year later.
+     Expected: Three scans: raw readings for the short pair, one hourly scan for both long charts and
+               a daily rollup scan for the distant emissions chart.
+    """
+    charts = [
+        chart('usage', 'usage', JAN_1, 2, buildings=['A']),
+        chart('co2', 'emissions', JAN_1, 2, buildings=['B']),
+        chart('month', 'usage', JAN_1, 30),
+        chart('later-month', 'usage', JAN_1 + timedelta(days=10), 30),
+        chart('next-year', 'emissions', JAN_1 + timedelta(days=365), 7),
+    ]
+
+    scans = plan_scans(charts, raw_max_days=7)
+
+    assert [(scan.source, [c.id for c in scan.charts]) for scan in scans] == [
+        ('raw', ['usage', 'co2']),
+        ('hourly', ['month', 'later-month']),
+        ('daily', ['next-year']),
+    ]
+    assert scans[0].series == [('A', 'electricity'), ('A', 'gas'), ('B', 'electricity'), ('B', 'gas')]
+    assert scans[1].stop == JAN_1 + timedelta(days=40)
+
+
+# === Integration Test: Batch Endpoint Matches the Single-Chart Endpoints ===
+@pytest.fixture
+def two_days_of_readings(app, clean_energy_tables):
+    with app.app_context():
+        sync_buildings()
+        seed_emission_factors()
+        names = [db.session.get(Building, building_id).name for building_id in (1, 2)]
+        rows = [
+            (JAN_1 + timedelta(minutes=30 * i), building_id, category, float(building_id + i % 7))
+            for building_id in (1, 2) for category in ('electricity', 'gas') for i in range(96)
+        ]
+        bulk_insert_readings(rows)
+        update_rollups(rows)
+        db.session.commit()
+        yield names
+
+
+def test_dashboard_data_matches_single_endpoints_in_one_scan(app, client, two_days_of_readings):
+    """
+     Scenario: Usage and emissions charts over the same two days are requested in one batch.
+     Expected: Each chart equals its single-chart endpoint's response, and the rows are read by one scan
+               (plus the emission factor lookup).
+    """
+    first, second = two_days_of_readings
+    usage = {'buildings': [first, second], 'energy_type': 'both', 'time_range': 'custom',
+             'start_date': '2025-01-01', 'end_date': '2025-01-02'}
+    co2 = {'buildings': [second], 'energy_type': 'both', 'start_date': '2025-01-01', 'end_date': '2025-01-02'}
+
+    single_usage = client.post(url_for('energy_dash.get_line_chart_view'), json=usage).get_json()['traces']
+    single_co2 = client.post(url_for('energy_dash.get_emissions_line_chart_view'), json=co2).get_json()['traces']
+
+    statements = []
+
+    def count_statement(_connection, _cursor, statement, *_):
+        statements.append(statement)
+
+    with app.app_context():
+        sa.event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            batch = client.post(url_for('energy_dash.get_dashboard_data'), json={'charts': [
+                {'id': 'energy', 'kind': 'usage', **usage},
+                {'id': 'co2', 'kind': 'emissions', **co2},
+            ]}).get_json()['charts']
+        finally:
+            sa.event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+    assert batch['energy']['traces'] == single_usage
+    assert batch['co2']['traces'][0]['x'] == single_co2[0]['x']
+    assert batch['co2']['traces'][0]['y'] == pytest.approx(single_co2[0]['y'])
+    assert sum('energy_readings' in statement for statement in statements) == 1
+    assert not any('energy_rollups' in statement for statement in statements)
+
+
+# === Integration Test: The Page-Load Batch Shares One Scan ===
+def test_default_dashboard_batch_reads_one_scan(app, client, clean_energy_tables):
+    """
+     Scenario: The batch charts.js sends on page load: usage and emissions with 'custom' ranges and no dates,
+               so both cover the 30 days up to now. One reading falls on the first day before the usage window.
+     Expected: One scan serves both charts, and the emissions still match the single endpoint, that early
+               reading included.
+    """
+    today = datetime.combine(date.today(), datetime.min.time())
+    with app.app_context():
+        sync_buildings()
+        seed_emission_factors()
+        name = db.session.get(Building, 1).name
+        rows = [(today - timedelta(days=30), 1, 'electricity', 50.0)] + [
+            (today - timedelta(days=10, hours=-i), 1, category, 10.0 + i)
+            for category in ('electricity', 'gas') for i in range(24)
+        ]
+        bulk_insert_readings(rows)
+        update_rollups(rows)
+        db.session.commit()
+
+    defaults = {'buildings': [name], 'energy_type': 'both', 'time_range': 'custom', 'start_date': '', 'end_date': ''}
+    single_co2 = client.post(url_for('energy_dash.get_emissions_line_chart_view'), json=defaults).get_json()['traces']
+
+    statements = []
+
+    def count_statement(_connection, _cursor, statement, *_):
+        statements.append(statement)
+
+    with app.app_context():
+        sa.event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            batch = client.post(url_for('energy_dash.get_dashboard_data'), json={'charts': [
+                {'id': 'energy', 'kind': 'usage', **defaults, 'max_points': 800},
+                {'id': 'co2', 'kind': 'emissions', **defaults},
+            ]}).get_json()['charts']
+        finally:
+            sa.event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+    assert sum('energy_readings' in statement or 'energy_rollups' in statement for statement in statements) == 1
+    assert len(batch['energy']['traces']) == 2
+    assert batch['co2']['traces'][0]['x'] == single_co2[0]['x']
+    assert batch['co2']['traces'][0]['y'] == pytest.approx(single_co2[0]['y'])
+    assert single_co2[0]['y'][0] is not None
+
+
+def test_chart_series_without_buildings_runs_no_scan(app):
+    """
+     Scenario: Charts without buildings are planned.
+     Expected: No scan runs; usage comes back empty and emissions all-NaN for each requested day.
+    """
+    with app.app_context():
+        series = chart_series([chart('usage', 'usage', JAN_1, 1, buildings=[]),
+                               chart('co2', 'emissions', JAN_1, 2, buildings=[])], raw_max_days=7)
+
+    assert series['usage'] == []
+    days, emissions = series['co2']
+    assert len(days) == 2 and emissions == {}
+
+
+def test_dashboard_data_rejects_unknown_chart_kind(client):
+    """
+     Scenario: A batch lists a chart with an unsupported kind.
+     Expected: 400 with an error naming the chart.
+    """
+    response = client.post(url_for('energy_dash.get_dashboard_data'), json={'charts': [{'kind': 'pie'}]})
+
+    assert response.status_code == 400
+    assert 'Chart 0' in response.get_json()['error']
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from flask import url_for
+
+from app import db
+from app.buildings import sync_buildings
+from app.columnar import COLUMNAR_MIMETYPE, decode_trace, encode_trace
+from app.ingest import bulk_insert_readings
+from app.models import Building, EnergyReading
+
+
+# === Unit Test: Columnar Round Trip ===
+@pytest.mark.parametrize('seconds', [[0, 300, 600, 900], [0, 300, 900, 86400], [42]])
+def test_encode_trace_round_trips(seconds):
+    """
+     Scenario: Evenly spaced, irregular and single-point series are encoded and decoded.
+     Expected: Timestamps come back exactly, values as float32 with NaN preserved, and even spacing uses a step.
+    """
+    values = [1.5, np.nan, 3.25, 600.0][:len(seconds)]
+    trace = encode_trace('Building - Gas', seconds, values)
+
+    decoded_seconds, decoded_values = decode_trace(trace)
+    assert decoded_seconds.tolist() == seconds
+    np.testing.assert_array_equal(decoded_values, np.array(values, dtype=np.float32))
+    assert ('step' in trace['x']) == (seconds != [0, 300, 900, 86400])
+
+
+# === Integration Test: Energy Chart Negotiates the Columnar Encoding ===
+def test_energy_chart_serves_columnar_on_accept(app, client):
+    """
+     Scenario: The same chart request is sent as plain JSON and with the columnar Accept header.
+     Expected: The columnar response decodes to the same timestamps and values as the JSON one.
+    """
+    start = datetime(2025, 1, 1)
+    with app.app_context():
+        sync_buildings()
+        name = db.session.get(Building, 1).name
+        bulk_insert_readings([(start + timedelta(minutes=5 * i), 1, 'gas', i / 4) for i in range(12)])
+        db.session.commit()
+
+    payload = {'buildings': [name], 'energy_type': 'gas', 'start_date': '2025-01-01', 'end_date': '2025-01-01'}
+    try:
+        plain = client.post(url_for('energy_dash.get_line_chart_view'), json=payload).get_json()['traces'][0]
+        response = client.post(url_for('energy_dash.get_line_chart_view'), json=payload,
+                               headers={'Accept': COLUMNAR_MIMETYPE})
+    finally:
+        with app.app_context():
+            db.session.query(EnergyReading).delete()
+            db.session.commit()
+
+    assert response.mimetype == COLUMNAR_MIMETYPE
+    body = response.get_json()
+    assert body['encoding'] == 'columnar'
+    seconds, values = decode_trace(body['traces'][0])
+    labels = np.datetime_as_string(seconds.astype('datetime64[s]')).tolist()
+    assert [label.replace('T', ' ') for label in labels] == plain['x']
+    assert values.tolist() == plain['y']
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import url_for
+
+from app import db
+from app.buildings import sync_buildings
+from app.downsampling import downsample_series, format_timestamps, lttb
+from app.ingest import bulk_insert_readings
+from app.models import Building, EnergyReading
+
+
+# === Unit Test: LTTB Keeps Endpoints and Extremes ===
+def test_lttb_keeps_endpoints_and_spikes():
+    """
+     Scenario: A flat 1,000-point series with one spike and one dip is reduced to 20 points.
+     Expected: 20 ascending indices including the first, last, spike and dip points.
+    """
+    y = np.zeros(1000)
+    y[321], y[777] = 50.0, -40.0
+
+    keep = lttb(np.arange(1000), y, 20)
+    assert len(keep) == 20
+    assert keep[0] == 0 and keep[-1] == 999
+    assert np.all(np.diff(keep) > 0)
+    assert {321, 777} <= set(keep.tolist())
+
+
+# === Unit Test: Short Series Are Returned Whole ===
+def test_lttb_returns_short_series_unchanged():
+    """
+     Scenario: The series already has no more points than requested.
+     Expected: Every index is returned.
+    """
+    assert lttb([0, 1, 2, 3], [5, 6, 7, 8], 10).tolist() == [0, 1, 2, 3]
+
+
+# === Unit Test: Downsampled Series Keep Chart Labels ===
+def test_downsample_series_formats_kept_timestamps():
+    """
+     Scenario: A day of 5-minute readings is reduced to 50 points.
+     Expected: 50 labels in 'YYYY-MM-DD HH:MM:SS' form, starting and ending with the original readings.
+    """
+    start = datetime(2025, 1, 1)
+    readings = [(start + timedelta(minutes=5 * i), float(i % 12)) for i in range(288)]
+
+    seconds, y = downsample_series(*zip(*readings), 50)
+    x = format_timestamps(seconds)
+    assert len(x) == len(y) == 50
+    assert x[0] == '2025-01-01 00:00:00' and x[-1] == '2025-01-01 23:55:00'
+    assert y[0] == 0.0 and y[-1] == readings[-1][1]
+
+
+# === Integration Test: Energy Chart Honours max_points ===
+def test_energy_chart_downsamples_to_max_points(app, client):
+    """
+     Scenario: Two days of 5-minute readings are requested with max_points=100.
+     Expected: A single trace of 100 points covering the whole custom range.
+    """
+    start = datetime(2025, 1, 1)
+    with app.app_context():
+        sync_buildings()
+        name = db.session.get(Building, 1).name
+        bulk_insert_readings([(start + timedelta(minutes=5 * i), 1, 'electricity', float(i)) for i in range(576)])
+        db.session.commit()
+
+    try:
+        response = client.post(url_for('energy_dash.get_line_chart_view'), json={
+            'buildings': [name], 'energy_type': 'electricity', 'time_range': 'custom',
+            'start_date': '2025-01-01', 'end_date': '2025-01-02', 'max_points': 100
+        })
+        traces = response.get_json()['traces']
+        assert len(traces) == 1
+        assert len(traces[0]['x']) == 100
+        assert traces[0]['x'][0] == '2025-01-01 00:00:00' and traces[0]['x'][-1] == '2025-01-02 23:55:00'
+    finally:
+        with app.app_context():
+            db.session.query(EnergyReading).delete()
+            db.session.commit()
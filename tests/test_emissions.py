@@ -0,0 +1,59 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from app import db
+from app.buildings import sync_buildings
+from app.emissions import daily_emissions, seed_emission_factors, set_emission_factor
+from app.models import Building, EmissionFactor
+from app.rollups import update_rollups
+
+
+@pytest.fixture
+def emission_data(app, clean_energy_tables):
+    """Two buildings with three days of rollups and a gas factor revised on the second day."""
+    with app.app_context():
+        sync_buildings()
+        seed_emission_factors()
+        set_emission_factor('gas', 0.2, date(2025, 1, 2))
+        update_rollups([
+            (datetime(2025, 1, 1, 9), 1, 'electricity', 100.0),
+            (datetime(2025, 1, 1, 9), 1, 'gas', 10.0),
+            (datetime(2025, 1, 2, 9), 1, 'gas', 10.0),
+            (datetime(2025, 1, 3, 9), 2, 'electricity', 50.0),
+        ])
+        db.session.commit()
+        yield db.session.get(Building, 1).name, db.session.get(Building, 2).name
+
+
+# === Unit Test: Versioned Factors and Aligned Series ===
+def test_daily_emissions_applies_factor_in_force(app, emission_data):
+    """
+     Scenario: Emissions for two buildings over three days, with the gas factor revised on day two.
+     Expected: Series aligned on the same days, each day using its own factor, NaN where there is no data.
+    """
+    first, second = emission_data
+    with app.app_context():
+        days, series = daily_emissions([first, second], ['electricity', 'gas'],
+                                       datetime(2025, 1, 1), datetime(2025, 1, 4))
+
+    assert np.datetime_as_string(days).tolist() == ['2025-01-01', '2025-01-02', '2025-01-03']
+    np.testing.assert_allclose(series[first], [23.3 + 1.84, 2.0, np.nan])
+    np.testing.assert_allclose(series[second], [np.nan, np.nan, 11.65])
+
+
+# === Unit Test: Republishing a Factor Version Replaces It ===
+def test_set_emission_factor_replaces_same_start_date(app, emission_data):
+    """
+     Scenario: The gas factor from 2025-01-02 is published again with a corrected value.
+     Expected: The version is updated in place rather than duplicated.
+    """
+    with app.app_context():
+        set_emission_factor('gas', 0.25, date(2025, 1, 2))
+        db.session.commit()
+        versions = db.session.query(EmissionFactor).filter(EmissionFactor.category == 'gas').count()
+        days, series = daily_emissions([emission_data[0]], ['gas'], datetime(2025, 1, 2), datetime(2025, 1, 3))
+
+    assert versions == 2
+    np.testing.assert_allclose(series[emission_data[0]], [2.5])
@@ -1,20 +1,42 @@
+import json
+from datetime import date, datetime, timedelta
 from unittest.mock import patch
 
+import pytest
+import sqlalchemy as sa
 from flask import url_for
 
-from app.views.energy_analytics import get_building_names, get_energy_usage_by_zone
+from app import db
+from app.buildings import BuildingRegistry, sync_buildings
+from app.ingest import bulk_insert_readings
+from app.models import Building, EnergyReading
+from app.views.energy_analytics import get_building_names, get_energy_usage_by_zone, get_traces
+
+
+def make_registry(tmp_path, data):
+    """Builds a BuildingRegistry over a temporary buildings_data.json."""
+    path = tmp_path / 'buildings_data.json'
+    path.write_text(json.dumps(data))
+    return BuildingRegistry(str(path))
 
 
 # === Unit Test: get_building_names ===
-@patch('app.views.energy_analytics.db.session.query')
-def test_get_building_names(mock_query, db_session):
+@patch('app.views.energy_analytics.get_registry')
+def test_get_building_names(mock_registry, db_session, tmp_path):
     """
-     Scenario: Mock database query to fetch building names.
-     Expected: Should return a list of building names.
+     Scenario: Registry file lists university buildings and an accommodation block.
+     Expected: Should return only the university building names, in file order.
     """
-    mock_query.return_value.filter.return_value.distinct.return_value.all.return_value = [
-        ('Building A',), ('Building B',), ('Building C',)
-    ]
+    mock_registry.return_value = make_registry(tmp_path, {
+        'university_buildings': [
+            {'building': 'Building A', 'building_code': 'A1', 'zone': 'Red'},
+            {'building': 'Building B', 'building_code': 'B1', 'zone': 'Blue'},
+            {'building': 'Building C', 'building_code': 'C1', 'zone': 'Red'},
+        ],
+        'accommodation_buildings': [
+            {'building': 'Hall X', 'total_flats': 2, 'is_accommodation': True},
+        ]
+    })
 
     buildings = get_building_names()
     assert buildings == ['Building A', 'Building B', 'Building C']
@@ -27,7 +49,7 @@ def test_get_energy_usage_by_zone(mock_query, db_session):
      Scenario: Mock database to return grouped energy usage.
      Expected: Should categorize data into electricity and gas.
     """
-    mock_query.return_value.filter.return_value.group_by.return_value.all.return_value = [
+    mock_query.return_value.order_by.return_value.all.return_value = [
         ('Zone 1', 'electricity', 1000),
         ('Zone 1', 'gas', 500),
         ('Zone 2', 'electricity', 1500),
@@ -49,14 +71,14 @@ def test_energy_dashboard_view(db_session, client):
     assert b"Energy Analytics" in response.data
 
 
-# === Unit Test: Empty Building Query ===
-@patch('app.views.energy_analytics.db.session.query')
-def test_get_building_names_empty(mock_query, db_session):
+# === Unit Test: Empty Building Registry ===
+@patch('app.views.energy_analytics.get_registry')
+def test_get_building_names_empty(mock_registry, db_session, tmp_path):
     """
-     Scenario: No buildings found in the database.
+     Scenario: The buildings file lists no buildings.
      Expected: Return an empty list.
     """
-    mock_query.return_value.filter.return_value.distinct.return_value.all.return_value = []
+    mock_registry.return_value = make_registry(tmp_path, {})
     buildings = get_building_names()
     assert buildings == []
 
@@ -68,7 +90,7 @@ def test_get_energy_usage_by_zone_empty(mock_query, db_session):
      Scenario: No usage data returned.
      Expected: Return empty dictionaries for both electricity and gas.
     """
-    mock_query.return_value.filter.return_value.group_by.return_value.all.return_value = []
+    mock_query.return_value.order_by.return_value.all.return_value = []
     electricity_usage, gas_usage = get_energy_usage_by_zone()
     assert electricity_usage == {}
     assert gas_usage == {}
@@ -89,6 +111,41 @@ def test_get_line_chart_view_invalid_payload(db_session, client):
     assert data['traces'] == []
 
 
+# === Negative Test: Malformed Chart Dates ===
+@pytest.mark.parametrize('endpoint', ['get_line_chart_view', 'get_emissions_line_chart_view'])
+@pytest.mark.parametrize('stream', [False, True])
+def test_chart_endpoints_reject_malformed_dates(db_session, client, endpoint, stream):
+    """
+     Scenario: POST a custom date range whose end date is not YYYY-MM-DD, with and without streaming.
+     Expected: 400 with an error message instead of a server error.
+    """
+    response = client.post(url_for(f'energy_dash.{endpoint}'), json={
+        'buildings': ['Building A'], 'start_date': '2025-01-01', 'end_date': '01/31/2025', 'stream': stream
+    })
+    assert response.status_code == 400
+    assert 'YYYY-MM-DD' in response.get_json()['error']
+
+
+# === Integration Test: CO2 Chart Honours the Named Time Range ===
+def test_get_co2_energy_data_uses_time_range(app, client):
+    """
+     Scenario: The CO2 chart is requested for a 'weekly' range with custom dates set, then for 'custom'.
+     Expected: 'weekly' covers the UTC days of the last week up to today like the usage chart and ignores
+     the dates; 'custom' keeps the requested dates.
+    """
+    with app.app_context():
+        sync_buildings()
+        name = db.session.get(Building, 1).name
+
+    payload = {'buildings': [name], 'energy_type': 'both', 'start_date': '2025-01-01', 'end_date': '2025-01-02'}
+    weekly = client.post(url_for('energy_dash.get_emissions_line_chart_view'), json={**payload, 'time_range': 'weekly'})
+    custom = client.post(url_for('energy_dash.get_emissions_line_chart_view'), json={**payload, 'time_range': 'custom'})
+
+    today = date.today()
+    assert weekly.get_json()['traces'][0]['x'] == [str(today - timedelta(days=days)) for days in range(7, -1, -1)]
+    assert custom.get_json()['traces'][0]['x'] == ['2025-01-01', '2025-01-02']
+
+
 # === Unit Test: Handle Invalid Data in Energy Usage ===
 @patch('app.views.energy_analytics.db.session.query')
 def test_get_energy_usage_by_zone_invalid_data(mock_query, db_session):
@@ -96,7 +153,7 @@ def test_get_energy_usage_by_zone_invalid_data(mock_query, db_session):
     ️ Scenario: DB returns invalid or unexpected usage data.
      Expected: Gracefully handle None values and unknown categories.
     """
-    mock_query.return_value.filter.return_value.group_by.return_value.all.return_value = [
+    mock_query.return_value.order_by.return_value.all.return_value = [
         ('Zone 1', 'electricity', None),    # Invalid total usage
         ('Zone 2', 'unknown', 500),         # Unknown category
     ]
@@ -104,3 +161,69 @@ def test_get_energy_usage_by_zone_invalid_data(mock_query, db_session):
     electricity_usage, gas_usage = get_energy_usage_by_zone()
     assert electricity_usage == {'Zone 1': 0}  # Default to 0 for None
     assert gas_usage == {}  # Skip unknown categories
+
+
+# === Integration Test: Traces for Several Buildings from One Query ===
+def test_get_traces_splits_one_query_into_ordered_traces(app):
+    """
+     Scenario: Two buildings have electricity and gas readings; both are requested with energy_type 'both'.
+     Expected: One SELECT is issued and four traces come back in request order, each with its own points.
+    """
+    with app.app_context():
+        sync_buildings()
+        first, second = db.session.get(Building, 2).name, db.session.get(Building, 1).name
+        bulk_insert_readings([
+            (datetime(2025, 1, 1, hour), building_id, category, float(building_id * 10 + hour))
+            for building_id in (1, 2) for category in ('electricity', 'gas') for hour in range(3)
+        ])
+        db.session.commit()
+
+        statements = []
+
+        def count_statement(*_):
+            statements.append(1)
+
+        sa.event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            traces = get_traces([first, second], 'both', '2025-01-01', '2025-01-01', time_range='custom')
+        finally:
+            sa.event.remove(db.engine, 'before_cursor_execute', count_statement)
+            db.session.query(EnergyReading).delete()
+            db.session.commit()
+
+    assert len(statements) == 1
+    assert [trace['name'] for trace in traces] == [
+        f"{first} - Electricity", f"{first} - Gas", f"{second} - Electricity", f"{second} - Gas"
+    ]
+    assert traces[0]['y'] == [20.0, 21.0, 22.0]
+    assert traces[3]['x'] == ['2025-01-01 00:00:00', '2025-01-01 01:00:00', '2025-01-01 02:00:00']
+
+
+# === Integration Test: Streamed Energy Chart Response ===
+def test_get_line_chart_view_streams_same_traces(app, client):
+    """
+     Scenario: The same chart request is sent with and without "stream": true.
+     Expected: The streamed body is written in chunks and parses to the same traces.
+    """
+    with app.app_context():
+        sync_buildings()
+        names = [db.session.get(Building, building_id).name for building_id in (1, 2)]
+        bulk_insert_readings([
+            (datetime(2025, 1, 1, hour), building_id, category, float(hour))
+            for building_id in (1, 2) for category in ('electricity', 'gas') for hour in range(3)
+        ])
+        db.session.commit()
+
+    payload = {'buildings': names, 'energy_type': 'both', 'start_date': '2025-01-01', 'end_date': '2025-01-01'}
+    try:
+        plain = client.post(url_for('energy_dash.get_line_chart_view'), json=payload)
+        streamed = client.post(url_for('energy_dash.get_line_chart_view'), json={**payload, 'stream': True})
+        assert streamed.is_streamed
+        chunks = list(streamed.response)
+    finally:
+        with app.app_context():
+            db.session.query(EnergyReading).delete()
+            db.session.commit()
+
+    assert len(chunks) == 6  # Opening, four traces, closing
+    assert json.loads(b''.join(chunks)) == plain.get_json()
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import url_for
+
+from app import db
+from app.buildings import get_registry, sync_buildings
+from app.forecast import building_forecast, refresh_forecasts
+from app.models import EnergyForecastModel, EnergyRollupHourly
+
+
+def office_hours(hour):
+    return 100.0 if 9 <= hour < 17 else 20.0
+
+
+def add_hours(start, hours, building_id=1):
+    """Stores hourly rollups following office_hours for `hours` hours from `start`."""
+    db.session.add_all([
+        EnergyRollupHourly(building_id=building_id, category='electricity', bucket=moment,
+                           total=office_hours(moment.hour) * 12, count=12, min_value=0, max_value=0)
+        for moment in (start + timedelta(hours=h) for h in range(hours))
+    ])
+    db.session.commit()
+
+
+def clear_forecast_data():
+    db.session.query(EnergyForecastModel).delete()
+    db.session.query(EnergyRollupHourly).delete()
+    db.session.commit()
+
+
+# === Unit Test: Incremental Fit and Forecast Lookup ===
+def test_refresh_forecasts_fits_profile_incrementally(app):
+    """
+     Scenario: Two weeks of a daily office-hours load are fitted, then one more hour arrives.
+     Expected: The first refresh folds 336 hours, the next only the new one; the next 24 hours' baseline
+               and forecast follow the office-hours pattern with a narrow band.
+    """
+    now = datetime(2025, 3, 17, 0, 30)
+    start = datetime(2025, 3, 3)
+    with app.app_context():
+        sync_buildings()
+        try:
+            add_hours(start, 14 * 24)
+            assert refresh_forecasts(history_weeks=2, now=now) == 14 * 24
+            assert refresh_forecasts(history_weeks=2, now=now) == 0
+
+            add_hours(datetime(2025, 3, 17), 1)
+            assert refresh_forecasts(history_weeks=2, now=now + timedelta(hours=1)) == 1
+
+            first_hour, forecasts = building_forecast(1, now=now + timedelta(hours=1))
+        finally:
+            clear_forecast_data()
+
+    expected = [office_hours((1 + h) % 24) for h in range(24)]
+    assert first_hour == datetime(2025, 3, 17, 1)
+    assert list(forecasts) == ['electricity']
+    np.testing.assert_allclose(forecasts['electricity']['baseline'], expected, rtol=1e-6)
+    np.testing.assert_allclose(forecasts['electricity']['forecast'], expected, rtol=1e-6)
+    assert np.all(forecasts['electricity']['upper'] - forecasts['electricity']['lower'] < 1e-3)
+
+
+# === Integration Test: Forecast Endpoint ===
+def test_energy_forecast_endpoint(app, client):
+    """
+     Scenario: Request the forecast of a fitted building and of an unknown one.
+     Expected: 24 hourly labels with baseline / forecast / band series, and a 404 for the unknown building.
+    """
+    now = datetime.utcnow()
+    with app.app_context():
+        sync_buildings()
+        try:
+            add_hours(now.replace(minute=0, second=0, microsecond=0) - timedelta(weeks=1), 7 * 24)
+            refresh_forecasts(history_weeks=1, now=now)
+            db.session.commit()
+
+            name = get_registry().get(1).name
+            body = client.get(url_for('energy_dash.get_energy_forecast', building=name)).get_json()
+            unknown = client.get(url_for('energy_dash.get_energy_forecast', building='Nowhere'))
+        finally:
+            clear_forecast_data()
+
+    assert body['building'] == name
+    assert len(body['hours']) == 24
+    assert sorted(body['forecasts']['electricity']) == ['baseline', 'forecast', 'lower', 'upper']
+    assert all(value in (20.0, 100.0) for value in body['forecasts']['electricity']['baseline'])
+    assert unknown.status_code == 404
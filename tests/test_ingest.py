@@ -0,0 +1,291 @@
+import json
+import os
+import queue
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+from flask_migrate import upgrade
+
+from app import create_app, db
+from app import iot_simulator
+from app.buildings import get_registry, sync_buildings
+from app.ingest import IngestWriter, bulk_insert_reading_grid, bulk_insert_readings, upsert_readings
+from app.models import EnergyLoadHistogram, EnergyReading, EnergyRollupDaily, EnergyZoneTotal
+from app.partitions import create_partition, is_partitioned, list_partitions, month_start
+from app.rollups import rebuild_rollups
+
+READING = (datetime(2025, 1, 1, 12, 0), 1, 'electricity', 10.0)
+
+
+# === Unit Test: Bulk Insert of Reading Tuples ===
+def test_bulk_insert_readings(app):
+    """
+     Scenario: Write plain reading tuples through the bulk writer.
+     Expected: Every tuple is stored as an EnergyReading row with matching columns.
+    """
+    rows = [
+        (datetime(2025, 1, 1, 12, 0), 7, 'electricity', 120.5),
+        (datetime(2025, 1, 1, 12, 0), 7, 'gas', 30.25),
+    ]
+    with app.app_context():
+        assert bulk_insert_readings(rows) == 2
+        db.session.commit()
+
+        stored = db.session.query(EnergyReading).filter_by(building_id=7).order_by(EnergyReading.value).all()
+        assert [(r.category, r.value) for r in stored] == [('gas', 30.25), ('electricity', 120.5)]
+
+        db.session.query(EnergyReading).delete()
+        db.session.commit()
+
+
+# === Unit Test: Bulk Insert of a Generated Reading Grid ===
+def test_bulk_insert_reading_grid(app):
+    """
+     Scenario: Write a 2-timestamp x 3-building grid of gas readings.
+     Expected: One row per (timestamp, building) pair carrying the grid's value.
+    """
+    timestamps = [datetime(2025, 1, 1, 12, 0), datetime(2025, 1, 1, 12, 5)]
+    with app.app_context():
+        assert bulk_insert_reading_grid(timestamps, [4, 5, 6], 'gas', [[1.5, 2.5, 3.5], [4.5, 5.5, 6.5]]) == 6
+        db.session.commit()
+
+        stored = db.session.query(EnergyReading).order_by(EnergyReading.timestamp, EnergyReading.building_id).all()
+        assert [(r.timestamp, r.building_id, r.category, r.value) for r in stored] == [
+            (timestamp, building_id, 'gas', value)
+            for timestamp, row in zip(timestamps, [[1.5, 2.5, 3.5], [4.5, 5.5, 6.5]])
+            for building_id, value in zip([4, 5, 6], row)
+        ]
+
+        db.session.query(EnergyReading).delete()
+        db.session.commit()
+
+
+# === Integration Test: Seeding Command Bulk-Loads a Sensor Scope ===
+def test_seed_readings_command(app, clean_energy_tables):
+    """
+     Scenario: Run `flask energy seed-readings` for one day of university buildings.
+     Expected: 288 readings per building and energy type, all counted by the rebuilt daily rollups.
+    """
+    buildings = {sensor.id for sensor in get_registry().sensors() if not sensor.is_accommodation}
+
+    result = app.test_cli_runner().invoke(args=['energy', 'seed-readings', '--days', '1', '--seed', '3'])
+
+    with app.app_context():
+        assert result.exit_code == 0, result.output
+        assert f"{288 * 2 * len(buildings)} readings seeded." in result.output
+        assert {row[0] for row in db.session.query(EnergyReading.building_id).distinct()} == buildings
+        assert sum(row.count for row in db.session.query(EnergyRollupDaily)) == 288 * 2 * len(buildings)
+
+
+# === Unit Test: on_message Hands Readings to the Writer ===
+def test_on_message_flushes_full_batch(app):
+    """
+     Scenario: Receive exactly batch_size MQTT messages.
+     Expected: The writer commits the batch without an explicit flush.
+    """
+    writer = IngestWriter(app, batch_size=3, max_latency=60).start()
+
+    for minute in (0, 5, 10):
+        payload = json.dumps({
+            'timestamp': f'2025-01-01T12:{minute:02d}:00+00:00',
+            'building': 'Medical School',
+            'building_code': 'B1',
+            'zone': 'Blue',
+            'value': 42.0
+        })
+        iot_simulator.on_message(None, None, SimpleNamespace(topic=iot_simulator.TOPIC_GAS, payload=payload), writer)
+    _wait_for(lambda: writer.rows_written == 3)
+    writer.close()
+
+    with app.app_context():
+        building_id = get_registry().by_code('B1').id
+        stored = (db.session.query(EnergyReading).filter_by(building_id=building_id)
+                  .order_by(EnergyReading.timestamp).all())
+        assert len(stored) == 3
+        assert stored[0].category == 'gas'
+        assert stored[0].timestamp == datetime(2025, 1, 1, 12, 0)
+        assert writer.stats()['batches_written'] == 1
+
+        db.session.query(EnergyReading).delete()
+        db.session.commit()
+
+
+# === Unit Test: Partial Batch Flushed at the Latency Deadline ===
+def test_writer_flushes_partial_batch_after_max_latency(app):
+    """
+     Scenario: Fewer rows than batch_size arrive.
+     Expected: They are committed once max_latency has elapsed.
+    """
+    writer = IngestWriter(app, batch_size=1000, max_latency=0.05).start()
+    writer.submit(READING)
+    _wait_for(lambda: writer.rows_written == 1)
+
+    stats = writer.stats()
+    assert stats['queue_depth'] == 0
+    assert stats['flush_ms_last'] >= 0
+    writer.close()
+
+    with app.app_context():
+        db.session.query(EnergyReading).delete()
+        db.session.commit()
+
+
+# === Unit Test: Backpressure on a Full Queue ===
+def test_writer_applies_backpressure_when_queue_full(app):
+    """
+     Scenario: The queue is full and the writer thread is not draining it.
+     Expected: submit() blocks and raises queue.Full once its timeout expires.
+    """
+    writer = IngestWriter(app, max_queue=1)  # Not started, so nothing drains the queue
+    writer.submit(READING)
+
+    with pytest.raises(queue.Full):
+        writer.submit(READING, timeout=0.01)
+    assert writer.stats()['backpressure_waits'] == 1
+
+
+# === Unit Test: close() Drains Buffered Readings ===
+def test_writer_close_drains_queue(app):
+    """
+     Scenario: Rows are queued and the writer is closed before any deadline.
+     Expected: All queued rows are written before the thread exits.
+    """
+    writer = IngestWriter(app, batch_size=1000, max_latency=60).start()
+    for step in range(5):
+        writer.submit((READING[0] + timedelta(minutes=5 * step), *READING[1:]))
+    writer.close()
+
+    with app.app_context():
+        assert db.session.query(EnergyReading).count() == 5
+        db.session.query(EnergyReading).delete()
+        db.session.commit()
+
+
+# === Unit Test: Upsert Drops Redelivered Readings ===
+def test_upsert_readings_ignores_duplicates(app, clean_energy_tables):
+    """
+     Scenario: A reading is stored, then redelivered with a new one and a copy of the new one.
+     Expected: Only the new reading is inserted; the other two count as duplicates and the stored value is kept.
+    """
+    later = (READING[0] + timedelta(minutes=5), *READING[1:])
+    with app.app_context():
+        assert upsert_readings([READING]).inserted == [READING]
+        result = upsert_readings([(*READING[:3], 99.0), later, later])
+        db.session.commit()
+
+        assert (result.inserted, result.updated, result.duplicates) == ([later], [], 2)
+        assert [r.value for r in db.session.query(EnergyReading).order_by(EnergyReading.timestamp)] == [10.0, 10.0]
+
+
+# === Unit Test: Upsert in Update Mode Takes the Latest Value ===
+def test_upsert_readings_updates_changed_values(app, clean_energy_tables):
+    """
+     Scenario: A stored reading is redelivered twice in one batch with a corrected value, in 'update' mode.
+     Expected: The last value wins and is reported as an update; an unchanged redelivery is a duplicate.
+    """
+    with app.app_context():
+        upsert_readings([READING])
+        corrected = (*READING[:3], 12.5)
+        result = upsert_readings([(*READING[:3], 11.0), corrected], on_conflict='update')
+        assert (result.inserted, result.updated, result.duplicates) == ([], [corrected], 1)
+        assert upsert_readings([corrected], on_conflict='update').duplicates == 1
+        db.session.commit()
+
+        assert [r.value for r in db.session.query(EnergyReading)] == [12.5]
+        with pytest.raises(ValueError):
+            upsert_readings([READING], on_conflict='replace')
+
+
+# === Integration Test: Writer Counts Redelivered Readings ===
+def test_writer_drops_redelivered_readings(app, clean_energy_tables):
+    """
+     Scenario: The same reading is submitted three times, in one batch and again in a later one.
+     Expected: One row is stored, the daily rollup counts it once and the writer reports two duplicates.
+    """
+    reading = (datetime(2025, 2, 1, 12, 0), 1, 'electricity', 10.0)
+    writer = IngestWriter(app, batch_size=1000, max_latency=60).start()
+    writer.submit_many([reading, reading])
+    writer.flush()
+    writer.submit(reading)
+    writer.close()
+
+    with app.app_context():
+        stats = writer.stats()
+        assert (stats['rows_written'], stats['rows_duplicate']) == (1, 2)
+        assert db.session.query(EnergyReading).count() == 1
+        assert db.session.query(EnergyRollupDaily).filter_by(bucket=datetime(2025, 2, 1)).one().count == 1
+
+
+# === Integration Test: Upsert on the Partitioned PostgreSQL Table ===
+def test_upsert_readings_on_partitioned_postgres(pg_app, clean_energy_tables):
+    """
+     Scenario: Through the COPY staging path into the migrated, monthly-partitioned table, store a reading, redeliver
+     it with a new one, correct it in 'update' mode, then write a batch with a repeat through the ingest writer.
+     Expected: Inserts, duplicates and the update (with the value it replaced) are told apart, and the writer commits.
+    """
+    later = (READING[0] + timedelta(minutes=5), *READING[1:])
+    corrected = (*READING[:3], 12.5)
+    with pg_app.app_context():
+        sync_buildings()
+        connection = db.session.connection()
+        assert is_partitioned(connection)
+        if month_start(READING[0]) not in list_partitions(connection):
+            create_partition(connection, month_start(READING[0]))
+
+        assert upsert_readings([READING]) == ([READING], [], [], 0)
+        assert upsert_readings([READING, later]) == ([later], [], [], 1)
+        assert upsert_readings([corrected], on_conflict='update') == ([], [corrected], [READING], 0)
+        db.session.commit()
+
+    reading = (datetime(2025, 2, 1, 12, 0), 1, 'gas', 3.0)
+    writer = IngestWriter(pg_app, batch_size=1000, max_latency=60).start()
+    writer.submit_many([reading, reading])
+    writer.close()
+
+    with pg_app.app_context():
+        stats = writer.stats()
+        assert (stats['rows_written'], stats['rows_duplicate'], stats['rows_failed']) == (1, 1, 0)
+        assert sorted(r.value for r in db.session.query(EnergyReading)) == [3.0, 10.0, 12.5]
+
+
+# === Integration Test: Deduplicating Migration Rebuilds the Rollups ===
+def test_unique_key_migration_rebuilds_duplicated_days(tmp_path):
+    """
+     Scenario: A database at revision 0011 stores one reading three times, counted three times by its rollups,
+     then migrates to 0012.
+     Expected: Only the first reading is kept, and the daily rollup, zone total and load histogram count it once.
+    """
+    app = create_app(config_class=None, test_config={
+        'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'energy.db'}"
+    })
+    directory = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+    with app.app_context():
+        upgrade(directory, revision='0011')
+        sync_buildings()
+        db.session.execute(sa.insert(EnergyReading), [
+            {'timestamp': READING[0], 'building_id': 1, 'category': 'electricity', 'value': value}
+            for value in (10.0, 11.0, 5.0)
+        ])
+        rebuild_rollups()
+        db.session.commit()
+        assert db.session.query(EnergyRollupDaily).one().count == 3
+
+        upgrade(directory)
+
+        assert [r.value for r in db.session.query(EnergyReading)] == [10.0]
+        daily = db.session.query(EnergyRollupDaily).one()
+        assert (daily.total, daily.count) == (10.0, 1)
+        assert [(z.total, z.count) for z in db.session.query(EnergyZoneTotal)] == [(10.0, 1)]
+        assert db.session.query(sa.func.sum(EnergyLoadHistogram.count)).scalar() == 1
+        db.session.remove()
+
+
+def _wait_for(condition, timeout=5.0):
+    """Polls `condition` until it holds or `timeout` seconds pass."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for ingest writer"
+        time.sleep(0.01)
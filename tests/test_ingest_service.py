@@ -0,0 +1,62 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app import iot_simulator
+from app.buildings import get_registry
+from app.ingest_service import plan_shards
+
+
+# === Unit Test: Shards Cover Every Sensor Once ===
+@pytest.mark.parametrize('shard_by', ['zone', 'building'])
+def test_plan_shards_partitions_sensors(app, shard_by):
+    """
+     Scenario: Split the registry's sensors across 3 workers.
+     Expected: Every sensor lands in exactly one shard.
+    """
+    with app.app_context():
+        sensors = get_registry().sensors()
+    shards = plan_shards(sensors, 3, shard_by)
+
+    assert len(shards) == 3
+    assert sorted(i for shard in shards for i in shard.building_ids) == sorted(sensor.id for sensor in sensors)
+
+
+# === Unit Test: Zone Shards Keep Publish Groups Together ===
+def test_plan_shards_by_zone_subscribes_to_own_groups(app):
+    """
+     Scenario: Shard by zone across 2 workers.
+     Expected: Each publish group belongs to one worker, which alone subscribes to its batch topic.
+    """
+    with app.app_context():
+        sensors = get_registry().sensors()
+    shards = plan_shards(sensors, 2, 'zone')
+
+    for sensor in sensors:
+        owners = [index for index, shard in enumerate(shards) if sensor.id in shard.building_ids]
+        subscribers = [index for index, shard in enumerate(shards)
+                       if iot_simulator.batch_topic('+', sensor.group) in shard.topics]
+        assert owners == subscribers
+    assert all(iot_simulator.TOPIC_GAS in shard.topics for shard in shards)
+
+
+# === Unit Test: on_message Skips Readings Outside the Shard ===
+def test_on_message_skips_other_shards(app):
+    """
+     Scenario: A worker whose shard excludes the reading's building receives a JSON message.
+     Expected: Nothing is handed to its writer; the owning worker gets the reading.
+    """
+    with app.app_context():
+        building_id = get_registry().by_code('B1').id
+    writer = SimpleNamespace(rows=[], submit=lambda row: writer.rows.append(row))
+    msg = SimpleNamespace(topic=iot_simulator.TOPIC_GAS, payload=json.dumps({
+        'timestamp': '2025-01-01T12:00:00+00:00', 'building': 'Medical School', 'building_code': 'B1',
+        'zone': 'Blue', 'value': 42.0
+    }))
+
+    with app.app_context():
+        iot_simulator.on_message(None, None, msg, writer, shard={building_id + 1})
+        assert writer.rows == []
+        iot_simulator.on_message(None, None, msg, writer, shard={building_id})
+    assert [row[1] for row in writer.rows] == [building_id]
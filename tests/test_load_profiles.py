@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from flask import url_for
+
+from app import db
+from app.buildings import get_registry, sync_buildings
+from app.load_profiles import RELATIVE_ACCURACY, bin_values, sketch_bins
+from app.rollups import update_rollups
+
+JAN_1 = datetime(2025, 1, 1)
+
+
+# === Unit Test: Sketch Bins Keep the Relative Accuracy ===
+def test_sketch_bins_stay_within_relative_accuracy():
+    """
+     Scenario: Readings from 0.01 to 100,000 are binned, plus a zero and a negative reading.
+     Expected: Each bin's value is within RELATIVE_ACCURACY of the reading; zero and negative readings map to 0.
+    """
+    values = np.geomspace(0.01, 100_000, 2000)
+    estimates = bin_values(sketch_bins(values))
+
+    assert np.all(np.abs(estimates - values) <= RELATIVE_ACCURACY * values * (1 + 1e-9))
+    assert bin_values(sketch_bins([0.0, -3.0])).tolist() == [0.0, 0.0]
+
+
+# === Integration Test: Load Profile Endpoint ===
+@pytest.fixture
+def two_days_of_load(app, clean_energy_tables):
+    """Two days of 5-minute electricity readings for building 1: 100 overnight, 400 in office hours, one 900 spike."""
+    with app.app_context():
+        sync_buildings()
+        rows = []
+        for step in range(2 * 288):
+            moment = JAN_1 + timedelta(minutes=5 * step)
+            rows.append((moment, 1, 'electricity', 400.0 if 9 <= moment.hour < 17 else 100.0))
+        rows[288 + 14 * 12 + 3] = (datetime(2025, 1, 2, 14, 15), 1, 'electricity', 900.0)
+        update_rollups(rows[:300])
+        update_rollups(rows[300:])
+        db.session.commit()
+        yield get_registry().get(1).name, [value for _, _, _, value in rows]
+
+
+def test_energy_load_profile_endpoint(client, two_days_of_load):
+    """
+     Scenario: Request the load profile of two days with a single spike, plus an unknown building and a bad date.
+     Expected: The exact peak and its hour, the load factor from the mean, sketched percentiles and a
+               load-duration curve from the spike down to the overnight load; 404 and 400 for the bad requests.
+    """
+    name, values = two_days_of_load
+    body = client.get(url_for('energy_dash.get_energy_load_profile', building=name, energy_type='both',
+                              start_date='2025-01-01', end_date='2025-01-02')).get_json()
+    unknown = client.get(url_for('energy_dash.get_energy_load_profile', building='Nowhere'))
+    bad_date = client.get(url_for('energy_dash.get_energy_load_profile', building=name, start_date='2025-13-01',
+                                  end_date='2025-01-02'))
+
+    assert list(body['profiles']) == ['electricity']
+    profile = body['profiles']['electricity']
+    assert profile['readings'] == 576
+    assert profile['peak'] == {'value': 900.0, 'hour': '2025-01-02 14:00:00'}
+    assert profile['load_factor'] == round(np.mean(values) / 900.0, 3)
+    for key, percentile in (('p50', 50), ('p95', 95)):
+        assert profile['percentiles'][key] == pytest.approx(np.percentile(values, percentile, method='lower'),
+                                                            rel=RELATIVE_ACCURACY)
+
+    curve = profile['load_duration']
+    assert curve['demand'] == pytest.approx([900.0, 400.0, 100.0], rel=RELATIVE_ACCURACY)
+    assert curve['percent_of_time'] == [round(100 / 576, 2), round(100 * 192 / 576, 2), 100.0]
+    assert unknown.status_code == 404
+    assert bad_date.status_code == 400
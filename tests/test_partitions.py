@@ -0,0 +1,39 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.partitions import add_months, manage_partitions, month_start, partition_name
+from app.views.energy_analytics import parse_date_range
+
+
+# === Unit Test: Month Arithmetic and Partition Names ===
+def test_month_helpers_cross_year_boundaries():
+    """
+     Scenario: Shift months forwards and backwards across a year end.
+     Expected: First-of-month dates and zero-padded partition names.
+    """
+    assert month_start(datetime(2025, 12, 31, 23, 55)) == date(2025, 12, 1)
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_name(date(2026, 3, 1)) == 'energy_readings_y2026m03'
+
+
+# === Unit Test: Maintenance Skips Unpartitioned Databases ===
+def test_manage_partitions_is_a_no_op_on_sqlite(app):
+    """
+     Scenario: Run partition maintenance against the SQLite test database.
+     Expected: Nothing is created or expired, and unknown retention actions are rejected.
+    """
+    with app.app_context():
+        assert manage_partitions(months_ahead=2, retention_months=6) == {'created': [], 'expired': []}
+        with pytest.raises(ValueError):
+            manage_partitions(action='truncate')
+
+
+# === Unit Test: Half-Open Date Range for Partition Pruning ===
+def test_parse_date_range_includes_whole_end_day():
+    """
+     Scenario: Parse a requested start and end date.
+     Expected: [start, end + 1 day), so filters stay on the raw timestamp column.
+    """
+    assert parse_date_range('2025-01-30', '2025-01-31') == (datetime(2025, 1, 30), datetime(2025, 2, 1))
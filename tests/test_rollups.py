@@ -0,0 +1,200 @@
+from datetime import datetime
+
+import pytest
+from flask import url_for
+
+from app import db
+from app.buildings import sync_buildings
+from app.emissions import seed_emission_factors
+from app.ingest import IngestWriter, bulk_insert_readings
+from app.models import Building, EnergyLoadHistogram, EnergyRollupDaily, EnergyRollupHourly, EnergyZoneTotal
+from app.rollups import read_watermark, rebuild_rollups, reconcile_zone_totals, update_rollups
+from app.tasks import scheduled_reconcile_zone_totals
+from app.views.energy_analytics import get_energy_usage_by_zone
+
+ROWS = [
+    (datetime(2025, 1, 1, 10, 0), 1, 'electricity', 10.0),
+    (datetime(2025, 1, 1, 10, 5), 1, 'electricity', 30.0),
+    (datetime(2025, 1, 1, 11, 0), 1, 'electricity', 20.0),
+    (datetime(2025, 1, 1, 10, 0), 1, 'gas', 5.0),
+]
+
+
+def rollup_rows(model):
+    return [
+        (r.category, r.bucket, r.total, r.count, r.min_value, r.max_value)
+        for r in db.session.query(model).order_by(model.category, model.bucket, model.building_id)
+    ]
+
+
+def histogram_rows():
+    histogram = EnergyLoadHistogram
+    return db.session.query(histogram.category, histogram.bucket, histogram.bin, histogram.count).order_by(
+        histogram.category, histogram.bin, histogram.building_id).all()
+
+
+def zone_rows():
+    return db.session.query(EnergyZoneTotal.zone, EnergyZoneTotal.category, EnergyZoneTotal.total).order_by(
+        EnergyZoneTotal.zone, EnergyZoneTotal.category).all()
+
+
+# === Unit Test: Incremental Rollup Upserts ===
+def test_update_rollups_merges_batches(app, clean_energy_tables):
+    """
+     Scenario: Two ingest batches fall into the same hour and day.
+     Expected: Totals and counts add up; min and max span both batches.
+    """
+    with app.app_context():
+        update_rollups(ROWS[:2])
+        update_rollups(ROWS[2:])
+        db.session.commit()
+
+        assert rollup_rows(EnergyRollupHourly) == [
+            ('electricity', datetime(2025, 1, 1, 10), 40.0, 2, 10.0, 30.0),
+            ('electricity', datetime(2025, 1, 1, 11), 20.0, 1, 20.0, 20.0),
+            ('gas', datetime(2025, 1, 1, 10), 5.0, 1, 5.0, 5.0),
+        ]
+        assert rollup_rows(EnergyRollupDaily) == [
+            ('electricity', datetime(2025, 1, 1), 60.0, 3, 10.0, 30.0),
+            ('gas', datetime(2025, 1, 1), 5.0, 1, 5.0, 5.0),
+        ]
+
+
+# === Unit Test: Rebuild Matches Incremental Rollups ===
+def test_rebuild_rollups_matches_ingest(app, clean_energy_tables):
+    """
+     Scenario: Readings are ingested through the writer, then the rollups are rebuilt from raw rows.
+     Expected: The rebuild reproduces exactly the rollups, load histograms and zone totals the writer maintained.
+    """
+    with app.app_context():
+        sync_buildings()
+
+    writer = IngestWriter(app, batch_size=2, max_latency=60).start()
+    writer.submit_many(ROWS)
+    writer.close()
+
+    with app.app_context():
+        incremental = (rollup_rows(EnergyRollupHourly), rollup_rows(EnergyRollupDaily), histogram_rows(),
+                       zone_rows())
+
+        assert rebuild_rollups() == {'hourly': 3, 'daily': 2, 'histogram': 4, 'zones': 2}
+        db.session.commit()
+        assert (rollup_rows(EnergyRollupHourly), rollup_rows(EnergyRollupDaily), histogram_rows(),
+                zone_rows()) == incremental
+
+
+# === Integration Test: Corrected Readings Revise Only Their Rollups ===
+def test_writer_revises_only_corrected_rollups(app, clean_energy_tables):
+    """
+     Scenario: After a day is ingested for two buildings, an 'update' writer corrects building 1's hourly maximum.
+     Expected: Building 1's rollups, histogram and zone total match a rebuild, the maximum drops to the
+     corrected value, and building 2's rollups on the same day are left alone.
+    """
+    other = (datetime(2025, 1, 1, 10, 0), 2, 'electricity', 7.0)
+    with app.app_context():
+        sync_buildings()
+
+    writer = IngestWriter(app, batch_size=100, max_latency=60).start()
+    writer.submit_many(ROWS + [other])
+    writer.close()
+    with app.app_context():
+        db.session.query(EnergyRollupDaily).filter_by(building_id=2).update({'total': -1.0})  # Marks it untouched
+        db.session.commit()
+
+    writer = IngestWriter(app, batch_size=100, max_latency=60, on_conflict='update').start()
+    writer.submit((*ROWS[1][:3], 12.0))
+    writer.close()
+
+    with app.app_context():
+        assert (writer.rows_written, writer.rows_updated) == (1, 1)
+        assert db.session.query(EnergyRollupDaily).filter_by(building_id=2).one().total == -1.0
+        db.session.query(EnergyRollupDaily).filter_by(building_id=2).update({'total': 7.0})
+        db.session.commit()
+
+        revised = (rollup_rows(EnergyRollupHourly), rollup_rows(EnergyRollupDaily), histogram_rows(), zone_rows())
+        assert revised[0][0] == ('electricity', datetime(2025, 1, 1, 10), 22.0, 2, 10.0, 12.0)
+        rebuild_rollups()
+        db.session.commit()
+        assert (rollup_rows(EnergyRollupHourly), rollup_rows(EnergyRollupDaily), histogram_rows(),
+                zone_rows()) == revised
+
+
+# === Integration Test: CO2 Chart Reads Daily Rollups ===
+def test_emissions_chart_uses_daily_rollups(app, client, clean_energy_tables):
+    """
+     Scenario: Rollups hold a day of electricity for a building; raw readings are empty.
+     Expected: The CO2 chart returns that day's total times the electricity factor.
+    """
+    with app.app_context():
+        sync_buildings()
+        seed_emission_factors()
+        update_rollups([(datetime(2025, 1, 1, 9, 0), 1, 'electricity', 100.0)])
+        db.session.commit()
+        name = db.session.get(Building, 1).name
+
+    response = client.post(url_for('energy_dash.get_emissions_line_chart_view'), json={
+        'buildings': [name], 'energy_type': 'electricity', 'start_date': '2025-01-01', 'end_date': '2025-01-01'
+    })
+    trace = response.get_json()['traces'][0]
+    assert trace['x'] == ['2025-01-01']
+    assert trace['y'] == [pytest.approx(23.3)]
+
+
+# === Unit Test: Rollup-only Writes Through the Bulk Path ===
+def test_bulk_insert_leaves_rollups_to_caller(app, clean_energy_tables):
+    """
+     Scenario: Readings are written with bulk_insert_readings alone.
+     Expected: No rollup rows appear until the rollups are rebuilt.
+    """
+    with app.app_context():
+        bulk_insert_readings(ROWS)
+        db.session.commit()
+        assert db.session.query(EnergyRollupDaily).count() == 0
+
+        rebuild_rollups(datetime(2025, 1, 1), datetime(2025, 1, 1))
+        db.session.commit()
+        assert db.session.query(EnergyRollupDaily).count() == 2
+
+
+# === Unit Test: Ingest Maintains Zone Totals ===
+def test_zone_totals_follow_ingest_and_reconcile(app, clean_energy_tables):
+    """
+     Scenario: A university building and an accommodation flat ingest readings, then the totals drift.
+     Expected: Only the building's zone is counted, and reconciliation restores the rollup sums.
+    """
+    with app.app_context():
+        sync_buildings()
+        flat = db.session.query(Building).filter(Building.code == '').first()
+        building = db.session.query(Building).filter(Building.code != '').first()
+
+        rows = [(timestamp, building.id, category, value) for timestamp, _, category, value in ROWS[:2]]
+        update_rollups(rows + [(datetime(2025, 1, 1, 10, 0), flat.id, 'electricity', 99.0)])
+        update_rollups([(datetime(2025, 1, 2, 10, 0), building.id, 'electricity', 20.0)])
+        db.session.commit()
+        electricity, gas = get_energy_usage_by_zone()
+        assert electricity == {building.zone: 60.0} and gas == {}
+
+        db.session.query(EnergyZoneTotal).update({'total': 0.0})
+        assert reconcile_zone_totals() == 1
+        db.session.commit()
+        assert get_energy_usage_by_zone()[0] == {building.zone: 60.0}
+
+
+# === Unit Test: Scheduled Reconciliation Invalidates Cached Responses ===
+def test_scheduled_reconcile_advances_watermark(app, clean_energy_tables):
+    """
+     Scenario: The scheduled job reconciles zone totals that drifted after a batch was ingested.
+     Expected: The totals are restored and the watermark version moves on, so cached dashboards refetch.
+    """
+    with app.app_context():
+        sync_buildings()
+        update_rollups(ROWS)
+        db.session.query(EnergyZoneTotal).update({'total': 0.0})
+        db.session.commit()
+        version, latest = read_watermark()
+
+    scheduled_reconcile_zone_totals(app)
+
+    with app.app_context():
+        assert read_watermark() == (version + 1, latest)
+        assert sum(electricity for electricity in get_energy_usage_by_zone()[0].values()) == 60.0
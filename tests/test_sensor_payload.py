@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app import iot_simulator
+from app.buildings import get_registry
+from app.sensor_payload import decode_batch, encode_batch
+
+
+# === Unit Test: Encode/Decode Round Trip ===
+def test_batch_payload_round_trip():
+    """
+     Scenario: Encode a batch of readings and decode it again.
+     Expected: Category, timestamp, ids and (float32) values survive the trip.
+    """
+    timestamp = datetime(2025, 3, 1, 9, 30, tzinfo=timezone.utc)
+    payload = encode_batch('gas', timestamp, [3, 7, 11], [12.5, 40.25, 5.0])
+
+    category, decoded_ts, sensor_ids, values = decode_batch(payload)
+    assert category == 'gas'
+    assert decoded_ts == datetime(2025, 3, 1, 9, 30)
+    assert sensor_ids == (3, 7, 11)
+    assert values == pytest.approx((12.5, 40.25, 5.0))
+    assert len(payload) == 8 + 3 * 6
+
+
+# === Unit Test: Mismatched Lengths Rejected ===
+def test_batch_payload_rejects_mismatched_lengths():
+    """
+     Scenario: More sensor ids than values.
+     Expected: ValueError is raised instead of writing a corrupt payload.
+    """
+    with pytest.raises(ValueError):
+        encode_batch('electricity', datetime(2025, 3, 1), [1, 2], [1.0])
+
+
+# === Integration Test: Batched Publish Decodes to One Row per Sensor ===
+def test_publish_batches_covers_every_sensor():
+    """
+     Scenario: Publish one cycle in batch mode and decode every message.
+     Expected: One electricity and one gas reading per registered sensor,
+     with far fewer messages than sensors.
+    """
+    published = []
+    client = SimpleNamespace(publish=lambda topic, payload: published.append((topic, payload)))
+
+    iot_simulator.publish_sensor_data(client, mode='batch')
+
+    rows = []
+    for topic, payload in published:
+        assert topic.startswith(iot_simulator.TOPIC_BATCH)
+        rows.extend(iot_simulator.decode_batch_message(SimpleNamespace(topic=topic, payload=payload)))
+
+    sensors = get_registry().sensors()
+    assert len(rows) == 2 * len(sensors)
+    assert len(published) < len(sensors)
+    assert {row[2] for row in rows} == {'electricity', 'gas'}
+    assert {row[1] for row in rows} == {sensor.id for sensor in sensors}
+
+
+# === Unit Test: Vectorised Reading Generator ===
+def test_generate_readings_follows_profiles_and_seed():
+    """
+     Scenario: Generate electricity for 500 sensors on a Monday at 09:00 and 22:00 and a Saturday at 09:00, twice
+               with the same seed.
+     Expected: One row per time within that time's office-hours, off-hours or weekend range, identical per seed.
+    """
+    times = [datetime(2025, 3, 3, 9), datetime(2025, 3, 3, 22), datetime(2025, 3, 8, 9)]
+
+    values = iot_simulator.generate_readings('electricity', times, 500, seed=7)
+
+    assert values.shape == (3, 500)
+    assert values[0].min() >= 300 and values[0].max() <= 600
+    assert values[1].min() >= 50 and values[1].max() <= 200
+    assert values[2].min() >= 180 and values[2].max() <= 360
+    assert (iot_simulator.generate_readings('electricity', times, 500, seed=7) == values).all()
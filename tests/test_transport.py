@@ -0,0 +1,69 @@
+from datetime import datetime
+
+from app import db
+from app import iot_simulator
+from app.buildings import get_registry, sync_buildings
+from app.models import EnergyReading
+from app.sensor_payload import encode_batch
+from app.transport import InProcessTransport, topic_matches
+
+
+# === Unit Test: MQTT Topic Filters ===
+def test_topic_matches_wildcards():
+    """
+     Scenario: Match topics against exact, '+' and '#' subscription filters.
+     Expected: '+' spans one level, '#' any remaining levels, and exact filters only themselves.
+    """
+    assert topic_matches('uob/gas', 'uob/gas')
+    assert not topic_matches('uob/gas', 'uob/electricity')
+    assert topic_matches('uob/batch/#', 'uob/batch/gas/red')
+    assert topic_matches('uob/batch/+/red', 'uob/batch/gas/red')
+    assert not topic_matches('uob/batch/+', 'uob/batch/gas/red')
+    assert not topic_matches('uob/batch/gas/red', 'uob/batch/gas')
+
+
+# === Unit Test: Only Subscribed Topics Are Delivered ===
+def test_inprocess_transport_delivers_subscribed_topics():
+    """
+     Scenario: Publish to a subscribed and an unsubscribed topic, with a str payload.
+     Expected: Only the subscribed message reaches on_message, as UTF-8 bytes.
+    """
+    received = []
+    client = InProcessTransport()
+    client.on_connect = lambda c, u, flags, rc: c.subscribe('uob/#')
+    client.on_message = lambda c, u, msg: received.append((msg.topic, msg.payload))
+    client.loop_start()
+
+    client.publish('uob/gas', '{"value": 1}')
+    client.publish('other/topic', b'ignored')
+    assert client.wait_until_delivered(timeout=5)
+    client.loop_stop()
+
+    assert received == [('uob/gas', b'{"value": 1}')]
+    assert (client.messages_published, client.messages_delivered, client.messages_dropped) == (2, 1, 1)
+
+
+# === Integration Test: Batched Message Through the Real Ingest Path ===
+def test_inprocess_transport_feeds_ingest_writer(app, clean_energy_tables):
+    """
+     Scenario: Wire an in-process transport to the ingest writer and publish one batched message.
+     Expected: Every reading in it is committed without an MQTT broker.
+    """
+    with app.app_context():
+        sync_buildings()
+        sensor_ids = [sensor.id for sensor in get_registry().sensors()[:3]]
+    client = iot_simulator.connect_mqtt('inprocess')
+    writer = iot_simulator.start_ingest(app, client)
+
+    client.publish(iot_simulator.batch_topic('gas', 'Red'),
+                   encode_batch('gas', datetime(2025, 1, 1, 12, 0), sensor_ids, [1.5, 2.5, 3.5]))
+    assert client.wait_until_delivered(timeout=5)
+    client.loop_stop()
+    writer.close()
+
+    with app.app_context():
+        assert writer.stats()['rows_written'] == 3
+        stored = db.session.query(EnergyReading).order_by(EnergyReading.building_id).all()
+        assert [(r.building_id, r.category, r.value) for r in stored] == [
+            (sensor_id, 'gas', value) for sensor_id, value in zip(sensor_ids, [1.5, 2.5, 3.5])
+        ]